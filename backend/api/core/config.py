@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pydantic import BaseSettings
 from typing import List, Optional
 from dotenv import load_dotenv
@@ -42,6 +43,121 @@ class Settings(BaseSettings):
     UPLOAD_FOLDER: str = "uploads"
     MAX_CONTENT_LENGTH: int = 100 * 1024 * 1024  # 100MB
     ALLOWED_EXTENSIONS: List[str] = ["mp3", "wav", "m4a", "flac", "ogg", "mp4"]
+    # Decoded audio shared between the API and its inference workers, as memory-mapped files
+    SHARED_AUDIO_DIR: str = os.getenv("SHARED_AUDIO_DIR", os.path.join(tempfile.gettempdir(), "stt_shared_audio"))
+    
+    # Inference worker pool settings
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    INFERENCE_MAX_QUEUE: int = int(os.getenv("INFERENCE_MAX_QUEUE", "32"))
+    # Models each worker preloads and prefers, e.g. "base;small;medium,small"
+    INFERENCE_WORKER_MODELS: str = os.getenv("INFERENCE_WORKER_MODELS", "")
+    # Batched decoding trades accuracy for throughput: windows are decoded once, with no
+    # seek back to the last timestamp, temperature fallback or previous-text conditioning
+    # (see batch_engine.transcribe_batched), so it is opt-in
+    INFERENCE_BATCHING: bool = os.getenv("INFERENCE_BATCHING", "false").lower() == "true"
+    # Jobs each worker runs at once. With batching their windows share forward passes;
+    # without it, jobs on the same model take turns on it, so one at a time is the default
+    INFERENCE_WORKER_CONCURRENCY: int = int(os.getenv("INFERENCE_WORKER_CONCURRENCY", "4" if INFERENCE_BATCHING else "1"))
+    INFERENCE_BATCH_MAX_SIZE: int = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "8"))
+    INFERENCE_BATCH_MAX_WAIT_MS: int = int(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "50"))
+    # Split physical cores between busy workers and size torch's thread pool per job
+    INFERENCE_CPU_SCHEDULING: bool = os.getenv("INFERENCE_CPU_SCHEDULING", "true").lower() == "true"
+    # Start the workers and warm these comma-separated models in the background at API startup.
+    # Empty keeps startup free of the ML stack; the pool then starts on the first inference.
+    INFERENCE_WARMUP_MODELS: str = os.getenv("INFERENCE_WARMUP_MODELS", "")
+    
+    # Transcription jobs run at once by each API process; more wait in a queue of
+    # JOB_MAX_PENDING, beyond which uploads are rejected with 429 and Retry-After
+    JOB_MAX_CONCURRENT: int = int(os.getenv("JOB_MAX_CONCURRENT", "4"))
+    JOB_MAX_PENDING: int = int(os.getenv("JOB_MAX_PENDING", "100"))
+    # Initial processing time per MB of upload for start time estimates, refined as jobs complete
+    JOB_ESTIMATE_SECONDS_PER_MB: float = float(os.getenv("JOB_ESTIMATE_SECONDS_PER_MB", "15"))
+    # "local" runs jobs in the API process; "redis" queues them durably in Redis
+    # for worker processes started with `python worker.py`
+    JOB_QUEUE_BACKEND: str = os.getenv("JOB_QUEUE_BACKEND", "local")
+    # Redis queue: a job whose worker stops heartbeating for this long is retried,
+    # after a backoff doubling from JOB_RETRY_BACKOFF_SECONDS, up to JOB_MAX_ATTEMPTS runs
+    JOB_VISIBILITY_TIMEOUT_SECONDS: float = float(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "300"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BACKOFF_SECONDS: float = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "10"))
+    JOB_RETRY_MAX_BACKOFF_SECONDS: float = float(os.getenv("JOB_RETRY_MAX_BACKOFF_SECONDS", "600"))
+    # Job scheduling: shortest estimated job first (audio duration x model real-time factor),
+    # with the cost divided by the subscription tier's weight. A job is never overtaken by jobs
+    # arriving more than JOB_MAX_DELAY_SECONDS after it, and each user runs at most
+    # JOB_MAX_CONCURRENT_PER_USER jobs at a time
+    JOB_MODEL_RTF: str = os.getenv("JOB_MODEL_RTF", "tiny:0.1,base:0.2,small:0.6,medium:1.5,large:3.0")
+    JOB_TIER_WEIGHTS: str = os.getenv("JOB_TIER_WEIGHTS", "free:1,basic:2,pro:4,enterprise:8")
+    JOB_MAX_DELAY_SECONDS: float = float(os.getenv("JOB_MAX_DELAY_SECONDS", "1800"))
+    JOB_MAX_CONCURRENT_PER_USER: int = int(os.getenv("JOB_MAX_CONCURRENT_PER_USER", "2"))
+    # Local job executor: resubmit the jobs that were pending or processing when the API
+    # stopped. Long jobs resume from their chunk checkpoints. Assumes one API process per
+    # database; the Redis queue redelivers interrupted jobs by itself
+    JOB_RESUME_ON_STARTUP: bool = os.getenv("JOB_RESUME_ON_STARTUP", "true").lower() == "true"
+    
+    # Model selection per job: "sla" picks the most accurate model the user's tier allows
+    # (MODEL_TIER_MAX_SIZE) that completes by the deadline, audio duration times
+    # MODEL_TIER_DEADLINE_RATIO (at least MODEL_DEADLINE_MIN_SECONDS), dropping a size for
+    # every MODEL_DOWNGRADE_QUEUE_DEPTH waiting jobs; "ladder" picks by duration alone
+    MODEL_POLICY: str = os.getenv("MODEL_POLICY", "sla")
+    MODEL_TIER_MAX_SIZE: str = os.getenv("MODEL_TIER_MAX_SIZE", "free:small,basic:medium,pro:large,enterprise:large")
+    MODEL_TIER_DEADLINE_RATIO: str = os.getenv("MODEL_TIER_DEADLINE_RATIO", "free:3,basic:2,pro:1.5,enterprise:1.5")
+    MODEL_DEADLINE_MIN_SECONDS: float = float(os.getenv("MODEL_DEADLINE_MIN_SECONDS", "120"))
+    MODEL_DOWNGRADE_QUEUE_DEPTH: int = int(os.getenv("MODEL_DOWNGRADE_QUEUE_DEPTH", "8"))
+    # Use the English-only ".en" models (tiny to medium) for English jobs
+    MODEL_ENGLISH_VARIANTS: bool = os.getenv("MODEL_ENGLISH_VARIANTS", "true").lower() == "true"
+    
+    # Usage accounting settings
+    USAGE_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("USAGE_FLUSH_INTERVAL_SECONDS", "10"))
+    
+    # Model registry settings (per inference worker)
+    MODEL_MEMORY_BUDGET_MB: int = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "4096"))
+    MODEL_PINNED: str = os.getenv("MODEL_PINNED", "base")
+    # Comma-separated model sizes that run with int8-quantized Linear layers unless a request says otherwise.
+    # Registry keys, worker affinity and the admin model endpoints name these variants "<size>:int8".
+    MODEL_QUANTIZED_SIZES: str = os.getenv("MODEL_QUANTIZED_SIZES", "")
+    # Memory-mapped model snapshots shared by all workers on a host; empty loads checkpoints directly
+    MODEL_SNAPSHOT_DIR: str = os.getenv("MODEL_SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "whisper", "snapshots"))
+    
+    # Voice activity detection (silence skipping before Whisper)
+    VAD_ENABLED: bool = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    VAD_THRESHOLD_DB: float = float(os.getenv("VAD_THRESHOLD_DB", "12"))  # Above the noise floor
+    VAD_MIN_ENERGY_DB: float = float(os.getenv("VAD_MIN_ENERGY_DB", "-55"))
+    VAD_MIN_SPEECH_MS: int = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))
+    VAD_MIN_SILENCE_MS: int = int(os.getenv("VAD_MIN_SILENCE_MS", "500"))
+    VAD_PAD_MS: int = int(os.getenv("VAD_PAD_MS", "200"))
+    
+    # Language identification for "auto" requests: a small model on a few speech windows
+    LANGUAGE_ID_MODEL: str = os.getenv("LANGUAGE_ID_MODEL", "tiny")
+    LANGUAGE_ID_WINDOWS: int = int(os.getenv("LANGUAGE_ID_WINDOWS", "3"))
+    # Below this probability the main model decides instead
+    LANGUAGE_ID_MIN_CONFIDENCE: float = float(os.getenv("LANGUAGE_ID_MIN_CONFIDENCE", "0.6"))
+    # Only this much audio from the start of the file is decoded for language ID
+    LANGUAGE_ID_MAX_SECONDS: float = float(os.getenv("LANGUAGE_ID_MAX_SECONDS", "600"))
+    
+    # Draft-then-refine: uploads at least this long first get a quick draft
+    # transcript from DRAFT_MODEL, replaced when the selected model finishes
+    DRAFT_MODEL: str = os.getenv("DRAFT_MODEL", "tiny")
+    DRAFT_MIN_SECONDS: float = float(os.getenv("DRAFT_MIN_SECONDS", "300"))
+    
+    # Custom vocabularies: compiled vocabularies kept per inference worker, and
+    # how close (0-1) a transcribed spelling must be to a term to be corrected
+    VOCABULARY_CACHE_SIZE: int = int(os.getenv("VOCABULARY_CACHE_SIZE", "64"))
+    VOCABULARY_MIN_SIMILARITY: float = float(os.getenv("VOCABULARY_MIN_SIMILARITY", "0.8"))
+    
+    # Long-form mode: files longer than this are cut at quiet points and
+    # the chunks are transcribed in parallel across inference workers
+    LONG_FORM_MIN_SECONDS: float = float(os.getenv("LONG_FORM_MIN_SECONDS", "900"))
+    LONG_FORM_CHUNK_SECONDS: float = float(os.getenv("LONG_FORM_CHUNK_SECONDS", "180"))
+    LONG_FORM_OVERLAP_SECONDS: float = float(os.getenv("LONG_FORM_OVERLAP_SECONDS", "2"))
+    LONG_FORM_SEARCH_SECONDS: float = float(os.getenv("LONG_FORM_SEARCH_SECONDS", "15"))
+    
+    # Transcription segments are stored in buckets of this many seconds of audio
+    SEGMENT_BUCKET_SECONDS: float = float(os.getenv("SEGMENT_BUCKET_SECONDS", "300"))
+    # Largest page of segments the result endpoint returns
+    SEGMENT_PAGE_MAX: int = int(os.getenv("SEGMENT_PAGE_MAX", "1000"))
+    
+    # Transcription result cache settings
+    RESULT_CACHE_TTL_SECONDS: int = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
     
     class Config:
         case_sensitive = True
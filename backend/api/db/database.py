@@ -3,6 +3,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from pymongo import MongoClient
 import redis
+import redis.asyncio
 
 from api.core.config import settings
 
@@ -23,6 +24,13 @@ redis_client = redis.Redis(
     decode_responses=True
 )
 
+# Async Redis connection, for pub/sub subscribers in the event loop
+async_redis_client = redis.asyncio.Redis(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    decode_responses=True
+)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -38,3 +46,7 @@ def get_mongo_db():
 # Dependency to get Redis connection
 def get_redis_client():
     return redis_client
+
+# Dependency to get the async Redis connection
+def get_async_redis_client():
+    return async_redis_client
@@ -19,11 +19,15 @@ class Transcription(Base):
     file_size_bytes = Column(Integer)
     duration_seconds = Column(Float)
     file_format = Column(String)
+    audio_sha256 = Column(String, index=True, nullable=True)  # Hash of the uploaded bytes, used by the result cache
     
     # Processing information
     processing_started_at = Column(DateTime(timezone=True), nullable=True)
     processing_completed_at = Column(DateTime(timezone=True), nullable=True)
     error_message = Column(String, nullable=True)
+    model_size = Column(String, nullable=True)  # Registry key of the model the job ran with
+    model_decision = Column(Text, nullable=True)  # JSON of the model policy's decision and reasons
+    job_options = Column(Text, nullable=True)  # JSON of the processing options, to resume the job after a restart
     
     # Transcription result
     # The actual transcription text is stored in MongoDB for better performance with large texts
@@ -45,7 +49,7 @@ class Transcription(Base):
     # Additional features
     is_public = Column(Boolean, default=False)
     custom_vocabulary_id = Column(Integer, ForeignKey("custom_vocabularies.id"), nullable=True)
-    custom_vocabulary = relationship("CustomVocabulary")
+    custom_vocabulary = relationship("CustomVocabulary", back_populates="transcriptions")
 
 
 class CustomVocabulary(Base):
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, String, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+
+from api.db.database import Base
+
+class UsageDaily(Base):
+    """Per-user, per-day usage rollup, maintained by api.services.usage so dashboards don't scan transcriptions."""
+    __tablename__ = "usage_daily"
+    __table_args__ = (UniqueConstraint("user_id", "day", name="uq_usage_daily_user_day"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    day = Column(Date, index=True)
+    transcription_seconds = Column(Float, default=0.0)
+    transcription_count = Column(Integer, default=0)
+
+class UsageFlushBatch(Base):
+    """A usage batch written by api.services.usage.flush, recorded in the same transaction so it is never applied twice."""
+    __tablename__ = "usage_flush_batches"
+
+    batch_id = Column(String, primary_key=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -1,5 +1,6 @@
 from sqlalchemy import Boolean, Column, Integer, String, DateTime
 from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
 from api.db.database import Base
 
 class User(Base):
@@ -22,3 +23,7 @@ class User(Base):
     # Usage statistics
     total_transcription_seconds = Column(Integer, default=0)
     total_transcription_count = Column(Integer, default=0)
+    
+    # Relationships
+    transcriptions = relationship("Transcription", back_populates="user")
+    custom_vocabularies = relationship("CustomVocabulary", back_populates="user")
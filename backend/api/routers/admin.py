@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from api.models.user import User
+from api.routers.auth import get_current_active_user
+from api.services.inference_pool import get_inference_pool
+from api.services.job_queue import get_job_backend, get_job_queue
+from api.services import result_cache
+
+router = APIRouter()
+
+async def get_current_superuser(current_user: User = Depends(get_current_active_user)):
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return current_user
+
+@router.get("/inference")
+async def get_inference_stats(current_user: User = Depends(get_current_superuser)):
+    return get_inference_pool().stats()
+
+@router.get("/jobs")
+async def get_job_stats(current_user: User = Depends(get_current_superuser)):
+    return get_job_backend().stats()
+
+# Jobs that failed on every attempt (Redis job queue only)
+@router.get("/jobs/dead")
+async def get_dead_jobs(limit: int = 50, current_user: User = Depends(get_current_superuser)):
+    return get_job_queue().dead_letters(limit)
+
+@router.post("/jobs/dead/{job_id}/retry")
+async def retry_dead_job(job_id: str, current_user: User = Depends(get_current_superuser)):
+    if not get_job_queue().retry_dead(job_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found in the dead-letter list"
+        )
+    return {"id": job_id, "status": "queued"}
+
+@router.get("/cache")
+async def get_result_cache_stats(current_user: User = Depends(get_current_superuser)):
+    return result_cache.get_stats()
+
+# Model registry operations are applied to every inference worker.
+# `model_size` is a registry key, e.g. "small" or "small:int8" for the quantized variant.
+@router.get("/models")
+async def get_model_stats(current_user: User = Depends(get_current_superuser)):
+    return {"workers": await get_inference_pool().broadcast("model_stats")}
+
+@router.post("/models/{model_size}/load")
+async def load_model(model_size: str, current_user: User = Depends(get_current_superuser)):
+    return {"workers": await get_inference_pool().broadcast("load_model", model_size=model_size)}
+
+@router.post("/models/{model_size}/unload")
+async def unload_model(model_size: str, current_user: User = Depends(get_current_superuser)):
+    return {"workers": await get_inference_pool().broadcast("unload_model", model_size=model_size)}
+
+@router.post("/models/{model_size}/warm")
+async def warm_model(model_size: str, current_user: User = Depends(get_current_superuser)):
+    return {"workers": await get_inference_pool().broadcast("warm_model", model_size=model_size)}
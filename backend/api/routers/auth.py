@@ -6,7 +6,7 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from typing import Optional
 
-from api.db.database import get_db
+from api.db.database import get_db, SessionLocal
 from api.models.user import User
 from api.schemas.token import Token, TokenData
 from api.schemas.user import UserCreate, UserResponse
@@ -46,7 +46,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def user_from_token(db: Session, token: str) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -65,11 +65,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         raise credentials_exception
     return user
 
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    return user_from_token(db, token)
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_streaming_user(token: str = Depends(oauth2_scheme)):
+    """
+    The active user, looked up with a session closed right away, for
+    streaming endpoints: a `get_db` session would stay checked out of the
+    connection pool until the stream ends. The user is detached; only its
+    loaded columns can be read.
+    """
+    db = SessionLocal()
+    try:
+        user = user_from_token(db, token)
+    finally:
+        db.close()
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
 # Auth endpoints
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 import os
 import uuid
 import json
+import asyncio
 from bson.objectid import ObjectId
 
-from api.db.database import get_db, get_mongo_db
+from api.db.database import get_db, get_mongo_db, SessionLocal
 from api.models.user import User
 from api.models.transcription import Transcription, CustomVocabulary
 from api.schemas.transcription import (
@@ -15,23 +17,65 @@ from api.schemas.transcription import (
     TranscriptionUpdate, 
     TranscriptionResponse, 
     TranscriptionResult,
+    SpeakerSegment,
     CustomVocabularyCreate,
+    CustomVocabularyUpdate,
     CustomVocabularyResponse
 )
-from api.routers.auth import get_current_active_user
+from api.routers.auth import get_current_active_user, get_streaming_user
 from api.core.config import settings
 from api.services.transcription_service import process_transcription
+from api.services.vocabulary import validate_terms
+from api.services.model_policy import get_model_policy, PolicyInput
+from api.services import result_cache, progress, usage, segment_store
+from api.services.job_executor import JobQueueFullError
+from api.services.job_queue import get_job_backend
+from api.services.job_scheduler import estimate_cost
+from api.services.checkpoints import clear_checkpoints
 
 router = APIRouter()
 
+def planned_model(duration: float, language_code: str, tier: str, quantized: Optional[bool]) -> str:
+    """The model the model policy would choose for a job if it started now on an idle queue."""
+    return get_model_policy().choose(PolicyInput(duration, language_code, tier, quantized)).model_size
+
+async def estimate_job_cost(file_path: str, file_size: int, language_code: str, tier: str, quantized: Optional[bool]) -> float:
+    """
+    Estimated processing seconds of an upload for the job scheduler: its duration from the
+    container metadata times the real-time factor of the model it is planned to run with.
+    Falls back to the per-MB estimate if the duration cannot be read.
+    """
+    # Imported here to keep numpy out of the API's import path
+    from api.services.audio_decoder import probe_duration, AudioDecodeError
+    try:
+        duration = await asyncio.to_thread(probe_duration, file_path)
+    except AudioDecodeError as e:
+        print(f"Could not probe {file_path} for its job cost: {str(e)}")
+        duration = None
+    if not duration:
+        return file_size / (1024 * 1024) * settings.JOB_ESTIMATE_SECONDS_PER_MB
+    return estimate_cost(duration, planned_model(duration, language_code, tier, quantized))
+
+def with_queue_status(transcription: Transcription) -> Transcription:
+    """Attach the job's queue position and estimated start time for TranscriptionResponse."""
+    queue_status = get_job_backend().queue_status(transcription.id)
+    if queue_status:
+        transcription.queue_position = queue_status["queue_position"]
+        transcription.estimated_start_time = queue_status["estimated_start_time"]
+    return transcription
+
 # Transcription endpoints
 @router.post("/", response_model=TranscriptionResponse)
 async def create_transcription(
-    background_tasks: BackgroundTasks,
     title: str = Form(...),
     language_code: str = Form("en-US"),
     is_public: bool = Form(False),
     custom_vocabulary_id: Optional[int] = Form(None),
+    speaker_diarization: bool = Form(False),
+    num_speakers: Optional[int] = Form(None),
+    quantized: Optional[bool] = Form(None),
+    draft: Optional[bool] = Form(None),
+    deadline_seconds: Optional[float] = Form(None),
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -44,6 +88,15 @@ async def create_transcription(
             detail=f"File extension not allowed. Allowed extensions: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
     
+    # Reject before storing the upload if the job queue is full
+    job_backend = get_job_backend()
+    if job_backend.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Transcription queue is full. Please try again later.",
+            headers={"Retry-After": str(job_backend.retry_after())}
+        )
+    
     # Create upload directory if it doesn't exist
     os.makedirs(settings.UPLOAD_FOLDER, exist_ok=True)
     
@@ -51,11 +104,30 @@ async def create_transcription(
     unique_filename = f"{uuid.uuid4()}.{file_ext}"
     file_path = os.path.join(settings.UPLOAD_FOLDER, unique_filename)
     
-    # Save file
+    # Save file, hashing it as it streams for the result cache
+    audio_hasher = result_cache.new_audio_hasher()
+    file_size = 0
     with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
-        file_size = len(content)
+        while True:
+            chunk = await file.read(1024 * 1024)
+            if not chunk:
+                break
+            audio_hasher.update(chunk)
+            buffer.write(chunk)
+            file_size += len(chunk)
+    audio_sha256 = audio_hasher.hexdigest()
+    
+    # Processing options, kept with the record so that an interrupted job can be resumed
+    job_options = {
+        "file_path": file_path,
+        "language_code": language_code,
+        "custom_vocabulary_id": custom_vocabulary_id,
+        "use_diarization": speaker_diarization,
+        "num_speakers": num_speakers,
+        "quantized": quantized,
+        "draft": draft,
+        "deadline_seconds": deadline_seconds
+    }
     
     # Create transcription record
     db_transcription = Transcription(
@@ -68,25 +140,70 @@ async def create_transcription(
         file_path=file_path,
         file_size_bytes=file_size,
         file_format=file_ext,
+        audio_sha256=audio_sha256,
         status="pending",
+        job_options=json.dumps(job_options),
         # Duration will be updated during processing
         duration_seconds=0.0
     )
     
+    # Reuse the result of an earlier upload of the same audio
+    custom_vocabulary = None
+    if custom_vocabulary_id:
+        custom_vocabulary = db.query(CustomVocabulary).filter(
+            CustomVocabulary.id == custom_vocabulary_id
+        ).first()
+    cached = result_cache.lookup(
+        audio_sha256,
+        language_code,
+        result_cache.vocabulary_digest(custom_vocabulary),
+        result_cache.diarization_option(speaker_diarization, num_speakers),
+        lambda duration: planned_model(duration, language_code, current_user.subscription_tier, quantized)
+    )
+    if cached:
+        now = datetime.now()
+        for field in result_cache.RESULT_FIELDS:
+            # Entries cached before a field was added don't have it
+            if field in cached:
+                setattr(db_transcription, field, cached[field])
+        db_transcription.duration_seconds = cached["duration_seconds"]
+        db_transcription.status = "completed"
+        db_transcription.processing_started_at = now
+        db_transcription.processing_completed_at = now
+    
     db.add(db_transcription)
     db.commit()
     db.refresh(db_transcription)
     
-    # Start transcription process in background
-    background_tasks.add_task(
-        process_transcription,
-        db_transcription.id,
-        file_path,
-        language_code,
-        custom_vocabulary_id
-    )
+    if cached:
+        usage.record(current_user.id, cached["duration_seconds"])
+        return db_transcription
+    
+    # Queue the transcription, in this process or for the worker processes
+    job = {"transcription_id": db_transcription.id, **job_options}
+    cost_seconds = await estimate_job_cost(file_path, file_size, language_code, current_user.subscription_tier, quantized)
+    scheduling = {
+        "cost_seconds": cost_seconds,
+        "user_id": current_user.id,
+        "tier": current_user.subscription_tier
+    }
+    try:
+        if settings.JOB_QUEUE_BACKEND == "redis":
+            job_backend.enqueue(db_transcription.id, job, file_size, **scheduling)
+        else:
+            job_backend.submit(db_transcription.id, lambda: process_transcription(**job), file_size, **scheduling)
+    except JobQueueFullError as e:
+        # The queue filled up while the file was uploading
+        db.delete(db_transcription)
+        db.commit()
+        os.remove(file_path)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Transcription queue is full. Please try again later.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     
-    return db_transcription
+    return with_queue_status(db_transcription)
 
 @router.get("/", response_model=List[TranscriptionResponse])
 async def get_transcriptions(
@@ -98,7 +215,7 @@ async def get_transcriptions(
     transcriptions = db.query(Transcription).filter(
         Transcription.user_id == current_user.id
     ).offset(skip).limit(limit).all()
-    return transcriptions
+    return [with_queue_status(transcription) for transcription in transcriptions]
 
 @router.get("/{transcription_id}", response_model=TranscriptionResponse)
 async def get_transcription(
@@ -117,15 +234,72 @@ async def get_transcription(
             detail="Transcription not found"
         )
     
-    return transcription
+    return with_queue_status(transcription)
 
-@router.get("/{transcription_id}/result", response_model=TranscriptionResult)
-async def get_transcription_result(
+@router.get("/{transcription_id}/events")
+async def stream_transcription_events(
     transcription_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
-    mongo_db = Depends(get_mongo_db)
+    current_user: User = Depends(get_streaming_user)
 ):
+    """
+    Server-sent events with the job's stage, progress and ETA, replacing status polling.
+    
+    The stream ends after the `completed` or `failed` event. The database is
+    only used before the stream starts, so watchers don't hold pooled connections.
+    """
+    db = SessionLocal()
+    try:
+        transcription = db.query(Transcription).filter(
+            Transcription.id == transcription_id,
+            Transcription.user_id == current_user.id
+        ).first()
+        
+        if not transcription:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Transcription not found"
+            )
+        
+        # Jobs that finished before their progress was published, or whose events expired
+        initial = None
+        if transcription.status in progress.FINAL_STAGES or progress.latest(transcription_id) is None:
+            transcription = with_queue_status(transcription)
+            initial = {
+                "transcription_id": transcription_id,
+                "stage": "queued" if transcription.status == "pending" else transcription.status,
+                "progress": 1.0 if transcription.status == "completed" else 0.0,
+                "queue_position": getattr(transcription, "queue_position", None),
+                "estimated_start_time": getattr(transcription, "estimated_start_time", None),
+                "error": transcription.error_message
+            }
+    finally:
+        db.close()
+    
+    async def events():
+        if initial:
+            yield f"event: progress\ndata: {json.dumps(initial, default=str)}\n\n"
+            if initial["stage"] in progress.FINAL_STAGES:
+                return
+        async for event in progress.subscribe(transcription_id):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def get_result_document(
+    transcription_id: int,
+    current_user: User,
+    db: Session,
+    mongo_db,
+    include_text: bool = True
+) -> Tuple[Transcription, Dict[str, Any]]:
+    """Return the transcription and its result document. Raises HTTPException if the result can't be read."""
     transcription = db.query(Transcription).filter(
         Transcription.id == transcription_id,
         Transcription.user_id == current_user.id
@@ -137,7 +311,8 @@ async def get_transcription_result(
             detail="Transcription not found"
         )
     
-    if transcription.status != "completed":
+    # While a transcription is refined, its draft is readable
+    if transcription.status != "completed" and not (transcription.status == "processing" and transcription.mongo_document_id):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Transcription is not completed yet. Current status: {transcription.status}"
@@ -150,7 +325,10 @@ async def get_transcription_result(
         )
     
     # Retrieve transcription result from MongoDB
-    result = mongo_db.transcription_results.find_one({"_id": ObjectId(transcription.mongo_document_id)})
+    result = mongo_db.transcription_results.find_one(
+        {"_id": ObjectId(transcription.mongo_document_id)},
+        None if include_text else {"text": 0}
+    )
     
     if not result:
         raise HTTPException(
@@ -158,16 +336,90 @@ async def get_transcription_result(
             detail="Transcription result not found"
         )
     
+    return transcription, result
+
+def segment_position(start: Optional[float], end: Optional[float], cursor: Optional[str]) -> Optional[Tuple[float, int]]:
+    """Validate a time range and decode a pagination cursor."""
+    if start is not None and end is not None and end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start"
+        )
+    if cursor is None:
+        return None
+    try:
+        return segment_store.decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/{transcription_id}/result", response_model=TranscriptionResult)
+async def get_transcription_result(
+    transcription_id: int,
+    start: Optional[float] = Query(None, ge=0, description="Only segments that end after this time (seconds)"),
+    end: Optional[float] = Query(None, ge=0, description="Only segments that start before this time (seconds)"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.SEGMENT_PAGE_MAX, description="Segments per page; all by default"),
+    include_text: bool = Query(True, description="Include the full transcript text"),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+    mongo_db = Depends(get_mongo_db)
+):
+    after = segment_position(start, end, cursor)
+    transcription, result = get_result_document(transcription_id, current_user, db, mongo_db, include_text)
+    
+    # Only the segment buckets overlapping the range are read
+    segments = segment_store.read_segments(mongo_db, result, start, end, after)
+    if limit is not None:
+        segments, next_cursor = segment_store.page(segments, limit, after)
+    else:
+        segments, next_cursor = list(segments), None
+    
     # Convert MongoDB document to TranscriptionResult
     return TranscriptionResult(
-        text=result["text"],
-        segments=result.get("segments", None),
+        text=result["text"] if include_text else None,
+        segments=segments,
+        next_cursor=next_cursor,
         language_code=transcription.language_code,
         confidence_score=transcription.confidence_score,
         word_count=transcription.word_count,
-        speaker_count=transcription.speaker_count
+        speaker_count=transcription.speaker_count,
+        draft=result.get("draft", False),
+        model_decision=result.get("model")
     )
 
+@router.get("/{transcription_id}/segments")
+async def stream_transcription_segments(
+    transcription_id: int,
+    start: Optional[float] = Query(None, ge=0, description="Only segments that end after this time (seconds)"),
+    end: Optional[float] = Query(None, ge=0, description="Only segments that start before this time (seconds)"),
+    cursor: Optional[str] = Query(None, description="Resume after a result page's next_cursor"),
+    current_user: User = Depends(get_streaming_user),
+    mongo_db = Depends(get_mongo_db)
+):
+    """
+    Stream the segments as newline-delimited JSON, one SpeakerSegment per line, in time order.
+    
+    Segments are sent as their buckets are read from MongoDB, so large
+    transcripts render progressively and the server holds one bucket at a time.
+    Postgres is only used before the stream starts.
+    """
+    after = segment_position(start, end, cursor)
+    db = SessionLocal()
+    try:
+        _, result = get_result_document(transcription_id, current_user, db, mongo_db, include_text=False)
+    finally:
+        db.close()
+    
+    # A plain generator: Starlette iterates it in a thread, off the event loop
+    def lines():
+        for segment in segment_store.read_segments(mongo_db, result, start, end, after):
+            yield json.dumps(SpeakerSegment(**segment).dict()) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 @router.delete("/{transcription_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_transcription(
     transcription_id: int,
@@ -190,9 +442,18 @@ async def delete_transcription(
     if os.path.exists(transcription.file_path):
         os.remove(transcription.file_path)
     
-    # Delete MongoDB document if it exists
+    # Delete MongoDB document if it exists and no cached copy of this result still uses it
     if transcription.mongo_document_id:
-        mongo_db.transcription_results.delete_one({"_id": ObjectId(transcription.mongo_document_id)})
+        shared = db.query(Transcription).filter(
+            Transcription.mongo_document_id == transcription.mongo_document_id,
+            Transcription.id != transcription.id
+        ).count()
+        if not shared:
+            result_cache.evict_document(transcription.mongo_document_id)
+            mongo_db.transcription_results.delete_one({"_id": ObjectId(transcription.mongo_document_id)})
+            segment_store.delete_segments(mongo_db, ObjectId(transcription.mongo_document_id))
+    
+    clear_checkpoints(mongo_db, transcription.id)
     
     # Delete from database
     db.delete(transcription)
@@ -207,14 +468,19 @@ async def create_custom_vocabulary(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    # Validate JSON format of terms
+    # Validate the JSON format and shape of terms
     try:
-        json.loads(vocabulary.terms)
+        validate_terms(vocabulary.terms)
     except json.JSONDecodeError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Terms must be a valid JSON string"
         )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
     
     db_vocabulary = CustomVocabulary(
         user_id=current_user.id,
@@ -240,3 +506,49 @@ async def get_custom_vocabularies(
     ).all()
     
     return vocabularies
+
+@router.put("/vocabulary/{vocabulary_id}", response_model=CustomVocabularyResponse)
+async def update_custom_vocabulary(
+    vocabulary_id: int,
+    vocabulary_update: CustomVocabularyUpdate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    vocabulary = db.query(CustomVocabulary).filter(
+        CustomVocabulary.id == vocabulary_id,
+        CustomVocabulary.user_id == current_user.id
+    ).first()
+    
+    if not vocabulary:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Vocabulary not found"
+        )
+    
+    if vocabulary_update.name is not None:
+        vocabulary.name = vocabulary_update.name
+    
+    if vocabulary_update.description is not None:
+        vocabulary.description = vocabulary_update.description
+    
+    # New terms get a new digest, so inference workers compile them again and
+    # cached results transcribed with the old terms are not reused
+    if vocabulary_update.terms is not None:
+        try:
+            validate_terms(vocabulary_update.terms)
+        except json.JSONDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Terms must be a valid JSON string"
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(e)
+            )
+        vocabulary.terms = vocabulary_update.terms
+    
+    db.commit()
+    db.refresh(vocabulary)
+    
+    return vocabulary
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List
 
@@ -6,6 +6,7 @@ from api.db.database import get_db
 from api.models.user import User
 from api.schemas.user import UserResponse, UserUpdate
 from api.routers.auth import get_current_active_user, get_password_hash
+from api.services import usage
 
 router = APIRouter()
 
@@ -46,9 +47,20 @@ async def update_user(
 
 @router.get("/usage")
 async def get_usage_statistics(current_user: User = Depends(get_current_active_user)):
+    # Usage is written to the users row in batches; add what is still buffered
+    pending = usage.pending_usage(current_user.id)
     return {
-        "total_transcription_seconds": current_user.total_transcription_seconds,
-        "total_transcription_count": current_user.total_transcription_count,
+        "total_transcription_seconds": (current_user.total_transcription_seconds or 0) + int(pending["billed"]),
+        "total_transcription_count": (current_user.total_transcription_count or 0) + int(pending["count"]),
         "subscription_tier": current_user.subscription_tier,
         "subscription_expires": current_user.subscription_expires
     }
+
+@router.get("/usage/daily")
+async def get_daily_usage(
+    days: int = Query(30, ge=1, le=366),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    # From the daily rollup; the last settings.USAGE_FLUSH_INTERVAL_SECONDS of usage may not be in it yet
+    return {"days": usage.daily_usage(db, current_user.id, days)}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 
 class TranscriptionBase(BaseModel):
@@ -23,12 +23,15 @@ class SpeakerSegment(BaseModel):
     confidence: float
 
 class TranscriptionResult(BaseModel):
-    text: str
+    text: Optional[str] = None  # None when requested with include_text=false
     segments: Optional[List[SpeakerSegment]] = None
+    next_cursor: Optional[str] = None  # Cursor of the next page of segments, when paginated
     language_code: str
     confidence_score: float
     word_count: int
     speaker_count: int = 0
+    draft: bool = False  # A quick draft, replaced when the refined transcription completes
+    model_decision: Optional[Dict[str, Any]] = None  # The model the job ran with and why
 
 class TranscriptionResponse(TranscriptionBase):
     id: int
@@ -46,6 +49,10 @@ class TranscriptionResponse(TranscriptionBase):
     processing_started_at: Optional[datetime] = None
     processing_completed_at: Optional[datetime] = None
     error_message: Optional[str] = None
+    model_size: Optional[str] = None
+    # While the job waits or runs in the job executor; position 0 means running
+    queue_position: Optional[int] = None
+    estimated_start_time: Optional[datetime] = None
     
     class Config:
         orm_mode = True
@@ -0,0 +1,110 @@
+import json
+import subprocess
+import threading
+from typing import Optional
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Bytes read from ffmpeg per call (about 4 seconds of float32 audio at 16 kHz)
+READ_CHUNK_BYTES = 256 * 1024
+
+
+class AudioDecodeError(Exception):
+    """Raised when ffmpeg cannot decode an audio file."""
+
+
+def probe_duration(file_path: str) -> Optional[float]:
+    """
+    Read a file's duration from its container metadata with ffprobe, without decoding it.
+
+    Args:
+        file_path: Path to the audio or video file
+
+    Returns:
+        Duration in seconds, or None if neither the container nor its streams record one
+    """
+    cmd = [
+        "ffprobe", "-v", "error",
+        "-show_entries", "format=duration:stream=duration",
+        "-of", "json", file_path
+    ]
+    try:
+        completed = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=60)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffprobe is not installed or not on PATH")
+    if completed.returncode != 0:
+        message = completed.stderr.decode("utf-8", errors="replace").strip()
+        raise AudioDecodeError(f"ffprobe failed to read {file_path}: {message}")
+
+    info = json.loads(completed.stdout or b"{}")
+    durations = [info.get("format", {}).get("duration")]
+    durations += [stream.get("duration") for stream in info.get("streams", [])]
+    for duration in durations:
+        try:
+            if float(duration) > 0:
+                return float(duration)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def decode_audio(
+    file_path: str,
+    start: Optional[float] = None,
+    duration: Optional[float] = None,
+    sample_rate: int = SAMPLE_RATE
+) -> np.ndarray:
+    """
+    Decode any ffmpeg-readable file to mono float32 PCM at `sample_rate`.
+
+    ffmpeg resamples and downmixes, and its raw output is read from a pipe
+    straight into the returned array: no temporary files and no second resample.
+
+    Args:
+        file_path: Path to the audio or video file
+        start: Offset in seconds to start decoding from
+        duration: Maximum number of seconds to decode
+        sample_rate: Output sample rate
+
+    Returns:
+        1-D float32 array with samples in [-1, 1]
+    """
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0"]
+    if start:
+        # Input seeking: ffmpeg skips to the nearest keyframe without decoding the prefix
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", file_path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "-acodec", "pcm_f32le", "-"]
+
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise AudioDecodeError("ffmpeg is not installed or not on PATH")
+
+    # Drain stderr in the background so ffmpeg never blocks on a full pipe
+    errors = []
+    stderr_reader = threading.Thread(target=lambda: errors.append(process.stderr.read()), daemon=True)
+    stderr_reader.start()
+
+    # Growing a bytearray reallocates in place for large buffers, so peak
+    # memory stays close to the size of the decoded audio
+    pcm = bytearray()
+    while True:
+        chunk = process.stdout.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        pcm += chunk
+
+    process.wait()
+    stderr_reader.join()
+    if process.returncode != 0:
+        message = b"".join(errors).decode("utf-8", errors="replace").strip()
+        raise AudioDecodeError(f"ffmpeg failed to decode {file_path}: {message}")
+
+    # Drop a trailing partial sample, if any
+    usable = len(pcm) - len(pcm) % 4
+    return np.frombuffer(pcm, dtype=np.float32, count=usable // 4)
@@ -0,0 +1,233 @@
+import math
+import time
+import threading
+from collections import deque
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Any, Optional, List
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES, SAMPLE_RATE, CHUNK_LENGTH
+from whisper.tokenizer import get_tokenizer
+
+# Seconds per timestamp token
+TIME_PRECISION = 0.02
+
+
+class _WindowRequest:
+    __slots__ = ("key", "mel", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, key, mel):
+        self.key = key
+        self.mel = mel
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BatchInferenceEngine:
+    """
+    Batches 30-second mel windows from concurrent jobs into shared forward passes.
+
+    Jobs running on different threads of a worker process submit all of their
+    windows at once. A single scheduler thread groups queued windows that share
+    a model and decoding options, and runs them through `whisper.decode` as one
+    batch: one encoder pass, then batched token decoding. A batch is started as
+    soon as it is full or its oldest window has waited `max_wait_seconds`;
+    windows arriving while a batch runs form the next one.
+
+    This is static micro-batching, not continuous batching: `whisper.decode`
+    runs a batch's token decoding to completion, so windows cannot join a
+    batch between decoding steps, and a batch takes as long as its longest
+    window. Per-step joining would need a decoding loop of our own around
+    whisper's kv-cache. A batch runs under
+    `lock_model(model_size)`, the lock other users of the model instance take,
+    and holds the model with `use_model(model_size)` so it isn't evicted.
+    """
+
+    def __init__(self, use_model: Callable[[str], ContextManager], max_batch_size: int = 8, max_wait_seconds: float = 0.05,
+                 lock_model: Callable[[str], ContextManager] = lambda model_size: nullcontext()):
+        self.use_model = use_model
+        self.lock_model = lock_model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max_wait_seconds
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._thread = None
+        self._counters = {"batches": 0, "windows": 0}
+
+    def decode_windows(self, model_size: str, mels: List[torch.Tensor], language: Optional[str] = None,
+                       prompt: Optional[str] = None) -> List[Any]:
+        """
+        Decode mel windows, batched with windows from other jobs.
+
+        Returns:
+            One whisper DecodingResult per window, in order
+        """
+        key = (model_size, language, prompt)
+        requests = [_WindowRequest(key, mel) for mel in mels]
+
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batch-inference", daemon=True)
+                self._thread.start()
+            self._queue.extend(requests)
+            self._cond.notify()
+
+        for request in requests:
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+        return [request.result for request in requests]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+
+                head = self._queue[0]
+                deadline = head.enqueued_at + self.max_wait_seconds
+                while True:
+                    ready = sum(1 for r in self._queue if r.key == head.key)
+                    remaining = deadline - time.monotonic()
+                    if ready >= self.max_batch_size or remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = []
+                rest = deque()
+                for request in self._queue:
+                    if request.key == head.key and len(batch) < self.max_batch_size:
+                        batch.append(request)
+                    else:
+                        rest.append(request)
+                self._queue = rest
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch: List[_WindowRequest]):
+        model_size, language, prompt = batch[0].key
+        try:
+            with self.use_model(model_size) as model:
+                mel = torch.stack([request.mel for request in batch]).to(model.device)
+                options = whisper.DecodingOptions(
+                    language=language,
+                    prompt=prompt,
+                    without_timestamps=False,
+                    fp16=model.device.type == "cuda"
+                )
+                # whisper.decode installs kv-cache hooks on the model; other threads
+                # (e.g. language ID) must not run it meanwhile
+                with self.lock_model(model_size), torch.no_grad():
+                    results = whisper.decode(model, mel, options)
+            for request, result in zip(batch, results):
+                request.result = result
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            self._counters["batches"] += 1
+            self._counters["windows"] += len(batch)
+            for request in batch:
+                request.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            batches = self._counters["batches"]
+            return {
+                **self._counters,
+                "queued_windows": len(self._queue),
+                "mean_batch_size": self._counters["windows"] / batches if batches else 0.0
+            }
+
+
+def _segments_from_tokens(tokens: List[int], tokenizer, offset: float, window_seconds: float) -> List[Dict[str, Any]]:
+    """Split a decoded window into segments at its timestamp tokens."""
+    segments = []
+    start = None
+    text_tokens = []
+
+    def close(end):
+        text = tokenizer.decode(text_tokens).strip()
+        if text:
+            segments.append({
+                "start": offset + start,
+                "end": offset + min(end, window_seconds),
+                "text": text
+            })
+
+    for token in tokens:
+        if token >= tokenizer.timestamp_begin:
+            timestamp = (token - tokenizer.timestamp_begin) * TIME_PRECISION
+            if start is not None and text_tokens:
+                close(timestamp)
+                start = None
+                text_tokens = []
+            else:
+                start = timestamp
+        elif token < tokenizer.eot:
+            if start is None:
+                start = 0.0
+            text_tokens.append(token)
+
+    if text_tokens:
+        close(window_seconds)
+    return segments
+
+
+def transcribe_batched(
+    engine: BatchInferenceEngine,
+    model,
+    model_size: str,
+    audio: np.ndarray,
+    language: Optional[str] = None,
+    initial_prompt: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe audio as independent 30-second windows decoded through the batch engine.
+
+    Unlike `model.transcribe`, windows are not conditioned on the previous
+    window's text, which is what lets them be decoded in parallel. Nor do
+    they seek back to the last complete timestamp or retry at higher
+    temperatures, so words crossing a window boundary can be cut or dropped
+    and repetition loops are kept; hence settings.INFERENCE_BATCHING is off
+    by default.
+
+    Returns:
+        A dictionary shaped like the result of `model.transcribe`
+    """
+    n_mels = getattr(model.dims, "n_mels", 80)
+    offsets = list(range(0, max(len(audio), 1), N_SAMPLES))
+    mels = [
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(audio[o:o + N_SAMPLES]), n_mels=n_mels)
+        for o in offsets
+    ]
+
+    results = engine.decode_windows(model_size, mels, language=language, prompt=initial_prompt)
+
+    detected_language = language or (results[0].language if results else "en")
+    tokenizer = get_tokenizer(
+        model.is_multilingual,
+        num_languages=getattr(model, "num_languages", 99),
+        language=detected_language,
+        task="transcribe"
+    )
+
+    segments = []
+    for offset, result in zip(offsets, results):
+        window_seconds = min(CHUNK_LENGTH, (len(audio) - offset) / SAMPLE_RATE)
+        confidence = float(math.exp(result.avg_logprob)) if np.isfinite(result.avg_logprob) else 0.0
+        for segment in _segments_from_tokens(result.tokens, tokenizer, offset / SAMPLE_RATE, window_seconds):
+            segment["avg_logprob"] = result.avg_logprob
+            segment["confidence"] = confidence
+            segments.append(segment)
+
+    return {
+        "text": " ".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": detected_language
+    }
@@ -0,0 +1,75 @@
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+import pymongo
+
+# Checkpoints of jobs that never finish (e.g. deleted while interrupted) expire after this long
+CHECKPOINT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def ensure_indexes(mongo_db):
+    """Create the indexes of the transcription_chunks collection. Safe to call at every startup."""
+    mongo_db.transcription_chunks.create_index(
+        [("transcription_id", pymongo.ASCENDING), ("variant", pymongo.ASCENDING), ("index", pymongo.ASCENDING)],
+        unique=True
+    )
+    mongo_db.transcription_chunks.create_index("created_at", expireAfterSeconds=CHECKPOINT_TTL_SECONDS)
+
+
+class ChunkCheckpoints:
+    """
+    Results of the finished chunks of a long-form transcription, stored in
+    MongoDB as each chunk completes, so that a job interrupted by a restart
+    only re-runs its missing chunks.
+
+    Checkpoints are kept per `variant` (model, language and vocabulary
+    version), since a chunk's result depends on all three, and are only
+    reused for chunks with the same boundaries.
+    """
+
+    def __init__(self, mongo_db, transcription_id: int, variant: str):
+        self.collection = mongo_db.transcription_chunks
+        self.transcription_id = transcription_id
+        self.variant = variant
+
+    def load(self, chunks: List[Dict[str, int]]) -> Dict[int, Dict[str, Any]]:
+        """Stored results of the given chunks, by chunk index."""
+        stored = {
+            document["index"]: document
+            for document in self.collection.find({"transcription_id": self.transcription_id, "variant": self.variant})
+        }
+        return {
+            chunk["index"]: stored[chunk["index"]]["result"]
+            for chunk in chunks
+            if chunk["index"] in stored
+            and (stored[chunk["index"]]["start"], stored[chunk["index"]]["end"]) == (chunk["start"], chunk["end"])
+        }
+
+    def save(self, chunk: Dict[str, int], result: Dict[str, Any]):
+        try:
+            self.collection.replace_one(
+                {"transcription_id": self.transcription_id, "variant": self.variant, "index": chunk["index"]},
+                {
+                    "transcription_id": self.transcription_id,
+                    "variant": self.variant,
+                    "index": chunk["index"],
+                    "start": chunk["start"],
+                    "end": chunk["end"],
+                    "result": result,
+                    "created_at": datetime.now()
+                },
+                upsert=True
+            )
+        except pymongo.errors.PyMongoError as e:
+            # The job goes on; only its resumability suffers
+            print(f"Could not checkpoint chunk {chunk['index']} of transcription {self.transcription_id}: {str(e)}")
+
+
+def checkpoint_variant(model_size: str, language_code: Optional[str], custom_vocabulary: Optional[Dict[str, Any]]) -> str:
+    vocabulary = f"{custom_vocabulary['id']}@{custom_vocabulary['version']}" if custom_vocabulary else "none"
+    return f"{model_size}:{language_code or 'auto'}:{vocabulary}"
+
+
+def clear_checkpoints(mongo_db, transcription_id: int):
+    """Delete the checkpoints of a transcription once its result is stored."""
+    mongo_db.transcription_chunks.delete_many({"transcription_id": transcription_id})
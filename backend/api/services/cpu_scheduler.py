@@ -0,0 +1,88 @@
+import os
+from typing import Dict, Any, List, Optional
+
+
+def available_cpus() -> List[int]:
+    """Logical CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def physical_cores(cpus: Optional[List[int]] = None) -> List[List[int]]:
+    """
+    Group logical CPUs into physical cores, so hyperthread siblings are allocated together.
+
+    Returns:
+        One list of logical CPUs per physical core, in CPU order
+    """
+    cores: Dict[str, List[int]] = {}
+    for cpu in cpus if cpus is not None else available_cpus():
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                siblings = f.read().strip()
+        except OSError:
+            siblings = str(cpu)
+        cores.setdefault(siblings, []).append(cpu)
+    return list(cores.values())
+
+
+def split_cores(cores: List[List[int]], demands: Dict[Any, int]) -> Dict[Any, List[List[int]]]:
+    """
+    Share physical cores between consumers in proportion to their active jobs.
+
+    Every consumer with jobs gets at least one core and a contiguous range of
+    cores. With more consumers than cores, cores are shared round-robin.
+
+    Args:
+        cores: Physical cores from `physical_cores`
+        demands: Number of active jobs per consumer
+
+    Returns:
+        The cores allocated to each consumer with at least one job
+    """
+    consumers = sorted(consumer for consumer, jobs in demands.items() if jobs > 0)
+    if not consumers or not cores:
+        return {}
+    if len(consumers) >= len(cores):
+        return {consumer: [cores[i % len(cores)]] for i, consumer in enumerate(consumers)}
+
+    total = sum(demands[consumer] for consumer in consumers)
+    extra = len(cores) - len(consumers)
+    shares = {consumer: 1 + extra * demands[consumer] // total for consumer in consumers}
+    # Hand out the cores lost to rounding, largest remainder first
+    leftover = len(cores) - sum(shares.values())
+    for consumer in sorted(consumers, key=lambda c: -(extra * demands[c] % total))[:leftover]:
+        shares[consumer] += 1
+
+    allocation = {}
+    position = 0
+    for consumer in consumers:
+        allocation[consumer] = cores[position:position + shares[consumer]]
+        position += shares[consumer]
+    return allocation
+
+
+def threads_per_job(cores: List[List[int]], jobs: int) -> int:
+    """Intra-op threads for each of `jobs` concurrent inferences sharing `cores`: one per physical core."""
+    return max(1, len(cores) // max(1, jobs))
+
+
+def apply_allocation(cpus: List[int], threads: int):
+    """
+    Restrict this process to `cpus` and set torch's intra-op thread count.
+
+    Affinity is applied to every existing thread of the process, since threads
+    only inherit it when they are created.
+    """
+    import torch
+
+    torch.set_num_threads(threads)
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    for thread_id in os.listdir("/proc/self/task"):
+        try:
+            os.sched_setaffinity(int(thread_id), cpus)
+        except OSError:
+            # The thread exited in the meantime
+            pass
@@ -0,0 +1,238 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import dct
+from scipy.cluster.hierarchy import linkage, fcluster
+
+# Feature extraction: 25 ms frames every 10 ms
+FRAME_LENGTH = 400
+HOP_LENGTH = 160
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 20
+
+# Embedding windows, in feature frames (1.5 s windows every 0.75 s)
+WINDOW_FRAMES = 150
+WINDOW_HOP_FRAMES = 75
+
+# Frames processed at a time, to bound memory on long recordings (60 s)
+BLOCK_FRAMES = 6000
+
+# Clustering
+MAX_CLUSTER_POINTS = 2000
+MAX_SPEAKERS = 8
+MIN_SILHOUETTE = 0.15
+# Candidate speaker counts leaving a cluster smaller than this share of windows are rejected
+MIN_CLUSTER_SHARE = 0.05
+
+
+def _mel_filterbank(sample_rate: int) -> np.ndarray:
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    mel_points = np.linspace(hz_to_mel(0), hz_to_mel(sample_rate / 2), N_MELS + 2)
+    bins = np.floor((N_FFT + 1) * mel_to_hz(mel_points) / sample_rate).astype(int)
+    freqs = np.arange(N_FFT // 2 + 1)[None, :]
+    left, center, right = bins[:-2, None], bins[1:-1, None], bins[2:, None]
+    rising = (freqs - left) / np.maximum(center - left, 1)
+    falling = (right - freqs) / np.maximum(right - center, 1)
+    return np.clip(np.minimum(rising, falling), 0, None).astype(np.float32)
+
+
+def mfcc(audio: np.ndarray, sample_rate: int = 16000) -> np.ndarray:
+    """
+    Compute MFCCs (without c0, so loudness does not separate speakers).
+
+    Returns:
+        Array of shape (n_frames, N_MFCC - 1)
+    """
+    if len(audio) < FRAME_LENGTH:
+        return np.empty((0, N_MFCC - 1), dtype=np.float32)
+
+    emphasized = np.append(audio[:1], audio[1:] - 0.97 * audio[:-1]).astype(np.float32)
+    frames = sliding_window_view(emphasized, FRAME_LENGTH)[::HOP_LENGTH]
+    window = np.hamming(FRAME_LENGTH).astype(np.float32)
+    filterbank = _mel_filterbank(sample_rate)
+
+    features = np.empty((len(frames), N_MFCC - 1), dtype=np.float32)
+    for start in range(0, len(frames), BLOCK_FRAMES):
+        block = frames[start:start + BLOCK_FRAMES] * window
+        power = np.abs(np.fft.rfft(block, n=N_FFT)) ** 2
+        log_mel = np.log(power @ filterbank.T + 1e-10)
+        features[start:start + len(block)] = dct(log_mel, type=2, norm="ortho")[:, 1:N_MFCC]
+    return features
+
+
+def window_embeddings(features: np.ndarray, speech: np.ndarray):
+    """
+    Summarize features over sliding windows as mean and standard deviation.
+
+    Windows that are less than half speech are dropped.
+
+    Returns:
+        (embeddings, window start frames)
+    """
+    n_frames = len(features)
+    if n_frames < WINDOW_FRAMES:
+        starts = np.array([0]) if n_frames and speech.mean() >= 0.5 else np.empty(0, dtype=int)
+        if len(starts) == 0:
+            return np.empty((0, 2 * features.shape[1])), starts
+        return np.concatenate((features.mean(0), features.std(0)))[None, :], starts
+
+    starts = np.arange(0, n_frames - WINDOW_FRAMES + 1, WINDOW_HOP_FRAMES)
+    ends = starts + WINDOW_FRAMES
+
+    def window_sums(values):
+        cumulative = np.concatenate((np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0, dtype=np.float64)))
+        return cumulative[ends] - cumulative[starts]
+
+    speech_ratio = window_sums(speech.astype(np.float64)) / WINDOW_FRAMES
+    mean = window_sums(features) / WINDOW_FRAMES
+    variance = window_sums(features.astype(np.float64) ** 2) / WINDOW_FRAMES - mean ** 2
+    embeddings = np.concatenate((mean, np.sqrt(np.clip(variance, 0, None))), axis=1)
+
+    keep = speech_ratio >= 0.5
+    return embeddings[keep], starts[keep]
+
+
+def _silhouette(distances: np.ndarray, labels: np.ndarray) -> float:
+    clusters = np.unique(labels)
+    if len(clusters) < 2:
+        return -1.0
+    membership = (labels[:, None] == clusters[None, :]).astype(np.float64)
+    counts = membership.sum(0)
+    sums = distances @ membership
+    own = membership.astype(bool)
+    own_counts = counts[np.argmax(membership, axis=1)]
+    a = np.where(own_counts > 1, sums[own] / np.maximum(own_counts - 1, 1), 0.0)
+    mean_other = np.where(own, np.inf, sums / counts)
+    b = mean_other.min(1)
+    return float(np.mean((b - a) / np.maximum(np.maximum(a, b), 1e-10)))
+
+
+def cluster_embeddings(embeddings: np.ndarray, num_speakers: Optional[int] = None) -> np.ndarray:
+    """
+    Cluster window embeddings into speakers with average-linkage cosine clustering.
+
+    Without a `num_speakers` hint, the speaker count with the best silhouette
+    score is used, or a single speaker if no split is convincing. Clustering
+    runs on an evenly spaced subsample; every window is then assigned to the
+    nearest cluster centroid.
+
+    Returns:
+        Speaker index per window, numbered by first appearance
+    """
+    n = len(embeddings)
+    if n < 2 or num_speakers == 1:
+        return np.zeros(n, dtype=int)
+
+    normalized = (embeddings - embeddings.mean(0)) / (embeddings.std(0) + 1e-8)
+    normalized /= np.linalg.norm(normalized, axis=1, keepdims=True) + 1e-8
+
+    sample = normalized[np.unique(np.linspace(0, n - 1, min(n, MAX_CLUSTER_POINTS)).astype(int))]
+    tree = linkage(sample, method="average", metric="cosine")
+
+    if num_speakers:
+        labels = fcluster(tree, num_speakers, criterion="maxclust")
+    else:
+        distances = 1.0 - sample @ sample.T
+        best_score, labels = MIN_SILHOUETTE, np.ones(len(sample), dtype=int)
+        for k in range(2, min(MAX_SPEAKERS, len(sample) - 1) + 1):
+            candidate = fcluster(tree, k, criterion="maxclust")
+            # Windows straddling a speaker change form tiny clusters of their own
+            if np.bincount(candidate)[1:].min() < max(2, MIN_CLUSTER_SHARE * len(sample)):
+                continue
+            score = _silhouette(distances, candidate)
+            if score > best_score:
+                best_score, labels = score, candidate
+
+    clusters = np.unique(labels)
+    centroids = np.stack([sample[labels == c].mean(0) for c in clusters])
+    centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-8
+    assigned = np.argmax(normalized @ centroids.T, axis=1)
+
+    # Renumber so speaker 0 is the first to talk
+    _, first_seen = np.unique(assigned, return_index=True)
+    order = np.argsort(np.argsort(first_seen))
+    return order[np.searchsorted(np.unique(assigned), assigned)]
+
+
+def diarize(
+    audio: np.ndarray,
+    speech_regions: np.ndarray,
+    sample_rate: int = 16000,
+    num_speakers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Find who spoke when.
+
+    Args:
+        audio: Mono float32 audio
+        speech_regions: [start, end) sample indices of speech, from the VAD
+        sample_rate: Sample rate of `audio`
+        num_speakers: Number of speakers, if known
+
+    Returns:
+        Dictionary with speaker turns as [start_time, end_time, speaker_index] and the speaker count
+    """
+    features = mfcc(audio, sample_rate)
+
+    speech = np.zeros(len(features), dtype=bool)
+    for start, end in speech_regions:
+        speech[start // HOP_LENGTH:end // HOP_LENGTH + 1] = True
+
+    embeddings, starts = window_embeddings(features, speech)
+    labels = cluster_embeddings(embeddings, num_speakers)
+
+    # Each window speaks for the hop-length span around its center
+    frame_seconds = HOP_LENGTH / sample_rate
+    centers = (starts + WINDOW_FRAMES / 2) * frame_seconds
+    half_hop = WINDOW_HOP_FRAMES * frame_seconds / 2
+
+    turns = []
+    for center, label in zip(centers, labels):
+        start, end, label = max(center - half_hop, 0.0), center + half_hop, int(label)
+        if turns and turns[-1][2] == label and start - turns[-1][1] < 1e-6:
+            turns[-1][1] = float(end)
+        else:
+            turns.append([float(start), float(end), label])
+
+    return {"turns": turns, "speaker_count": int(len(np.unique(labels))) if len(labels) else 0}
+
+
+def align_speakers(segments: List[Dict[str, Any]], turns: List[List[float]]) -> List[Dict[str, Any]]:
+    """
+    Label each transcript segment with the speaker who talks most during it.
+
+    Segments that overlap no turn take the speaker of the nearest turn.
+    """
+    if not turns:
+        for segment in segments:
+            segment["speaker_id"] = "speaker_1"
+        return segments
+
+    turn_starts = [turn[0] for turn in turns]
+    turn_ends = [turn[1] for turn in turns]
+
+    for segment in segments:
+        start, end = segment["start_time"], segment["end_time"]
+        overlap = {}
+        for i in range(bisect_right(turn_ends, start), bisect_left(turn_starts, end)):
+            seconds = min(end, turn_ends[i]) - max(start, turn_starts[i])
+            overlap[turns[i][2]] = overlap.get(turns[i][2], 0.0) + seconds
+
+        if overlap:
+            speaker = max(overlap, key=overlap.get)
+        else:
+            i = bisect_left(turn_starts, start)
+            candidates = [j for j in (i - 1, i) if 0 <= j < len(turns)]
+            nearest = min(candidates, key=lambda j: min(abs(turn_starts[j] - end), abs(turn_ends[j] - start)))
+            speaker = turns[nearest][2]
+        segment["speaker_id"] = f"speaker_{speaker + 1}"
+
+    return segments
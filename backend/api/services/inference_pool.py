@@ -0,0 +1,487 @@
+import os
+import time
+import asyncio
+import itertools
+import threading
+import traceback
+import multiprocessing
+from multiprocessing.connection import wait
+from collections import deque
+from typing import Dict, Any, Optional, List
+
+from api.core.config import settings
+from api.services import cpu_scheduler
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the inference queue is full and a new task cannot be admitted."""
+
+
+class WorkerCrashedError(Exception):
+    """Raised for tasks that were running on a worker process that died."""
+
+
+class InferenceTaskError(Exception):
+    """Raised when a task fails inside a worker process."""
+
+
+def _worker_main(worker_index: int, conn, preload_models: List[str], concurrency: int):
+    """
+    Entry point of an inference worker process.
+
+    The worker imports the ML stack once, keeps its models loaded for its whole
+    lifetime and runs up to `concurrency` of the tasks it receives over `conn`
+    at a time, so their windows can be batched together.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from api.services import whisper_service
+
+    for model_size in preload_models:
+        whisper_service.get_whisper_model(model_size)
+
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    def run(job_id, task_name, kwargs):
+        try:
+            task = whisper_service.WORKER_TASKS[task_name]
+            send(("done", job_id, task(**kwargs)))
+        except Exception as e:
+            send(("error", job_id, f"{type(e).__name__}: {e}\n{traceback.format_exc()}"))
+
+    send(("ready", None, os.getpid()))
+
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="inference-task")
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+
+        if message is None:
+            break
+
+        kind, *payload = message
+        if kind == "cpus":
+            cpu_scheduler.apply_allocation(*payload)
+        else:
+            executor.submit(run, *payload)
+
+    executor.shutdown(wait=True)
+
+
+class _Job:
+    def __init__(self, job_id: int, task_name: str, kwargs: Dict[str, Any], loop, future, worker_index: Optional[int] = None):
+        self.id = job_id
+        self.task_name = task_name
+        self.kwargs = kwargs
+        self.model_size = kwargs.get("model_size")
+        self.worker_index = worker_index
+        self.loop = loop
+        self.future = future
+        self.submitted_at = time.time()
+        # Intra-op thread counts the job ran with, as the CPU scheduler rebalanced
+        self.threads: List[int] = []
+
+
+class _Worker:
+    def __init__(self, index: int, affinity: List[str]):
+        self.index = index
+        self.affinity = affinity
+        self.process = None
+        self.conn = None
+        self.ready = False
+        self.restarts = 0
+        self.loaded_models = set(affinity)
+        self.in_flight: Dict[int, _Job] = {}
+        self.cpus: Optional[List[int]] = None
+        self.threads: Optional[int] = None
+
+
+class InferencePool:
+    """
+    Pool of long-lived worker processes running Whisper inference.
+
+    Each worker holds its own loaded models. Tasks are dispatched to workers
+    with a free task slot, preferring workers with affinity for (or already holding) the
+    requested model size. Workers that die are respawned and their in-flight
+    tasks fail with `WorkerCrashedError`; other workers are unaffected.
+    """
+
+    def __init__(
+        self,
+        num_workers: int,
+        max_queue_size: int,
+        worker_models: Optional[List[List[str]]] = None,
+        worker_concurrency: int = 1,
+        cpu_scheduling: bool = False,
+        batching: bool = False
+    ):
+        self.num_workers = max(1, num_workers)
+        self.max_queue_size = max_queue_size
+        self.worker_models = worker_models or []
+        self.worker_concurrency = max(1, worker_concurrency)
+        self.cpu_scheduling = cpu_scheduling
+        self.batching = batching
+        self._cores = cpu_scheduler.physical_cores() if cpu_scheduling else []
+        self._allocations = deque(maxlen=100)
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._job_ids = itertools.count(1)
+        self._workers: List[_Worker] = []
+        self._monitor = None
+        self._running = False
+
+    # Lifecycle
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._workers = [
+                _Worker(i, self.worker_models[i] if i < len(self.worker_models) else [])
+                for i in range(self.num_workers)
+            ]
+            for worker in self._workers:
+                self._spawn(worker)
+
+        self._monitor = threading.Thread(target=self._monitor_loop, name="inference-pool-monitor", daemon=True)
+        self._monitor.start()
+
+    def stop(self, timeout: float = 10.0):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            workers = list(self._workers)
+            pending = list(self._pending)
+            self._pending.clear()
+
+        for job in pending:
+            self._fail(job, WorkerCrashedError("Inference pool is shutting down"))
+
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            for job in worker.in_flight.values():
+                self._fail(job, WorkerCrashedError("Inference pool is shutting down"))
+            worker.in_flight.clear()
+            worker.conn.close()
+
+        if self._monitor is not None:
+            self._monitor.join(timeout)
+
+    def _spawn(self, worker: _Worker):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker.index, child_conn, worker.affinity, self.worker_concurrency),
+            name=f"inference-worker-{worker.index}",
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        worker.process = process
+        worker.conn = parent_conn
+        worker.ready = False
+        worker.loaded_models = set(worker.affinity)
+        worker.cpus = None
+        worker.threads = None
+
+    # Submission
+
+    def is_saturated(self) -> bool:
+        """Return True if a bounded submission would currently be rejected."""
+        with self._lock:
+            return len(self._pending) >= self.max_queue_size
+
+    async def submit(self, task_name: str, *, bounded: bool = True, **kwargs) -> Any:
+        """
+        Run a task from `whisper_service.WORKER_TASKS` on a worker and await its result.
+
+        Args:
+            task_name: Name of the worker task
+            bounded: Reject with `PoolSaturatedError` if the queue is full.
+                Tasks belonging to an already admitted job pass False.
+            **kwargs: Arguments of the task. `model_size` is also used for worker affinity.
+
+        Returns:
+            The value returned by the task in the worker process
+        """
+        return await self._submit(task_name, kwargs, bounded=bounded)
+
+    async def warm_up(self, model_sizes: List[str]):
+        """Start the workers and load and run each model once on every worker."""
+        start = time.time()
+        for model_size in model_sizes:
+            try:
+                await self.broadcast("warm_model", model_size=model_size)
+            except Exception as e:
+                print(f"Warm-up of Whisper {model_size} model failed: {str(e)}")
+        print(f"Inference workers warmed {', '.join(model_sizes)} in {time.time() - start:.1f}s")
+
+    async def broadcast(self, task_name: str, **kwargs) -> List[Any]:
+        """
+        Run a task once on every worker, e.g. model registry admin operations.
+
+        Returns:
+            The task results, indexed by worker
+        """
+        if not self._running:
+            self.start()
+        return await asyncio.gather(*(
+            self._submit(task_name, kwargs, bounded=False, worker_index=i)
+            for i in range(self.num_workers)
+        ))
+
+    async def _submit(self, task_name: str, kwargs: Dict[str, Any], bounded: bool, worker_index: Optional[int] = None) -> Any:
+        if not self._running:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        with self._lock:
+            if bounded and len(self._pending) >= self.max_queue_size:
+                raise PoolSaturatedError(
+                    f"Inference queue is full ({len(self._pending)} tasks waiting)"
+                )
+            job = _Job(next(self._job_ids), task_name, kwargs, loop, future, worker_index)
+            self._pending.append(job)
+            self._dispatch()
+
+        return await future
+
+    def _dispatch(self):
+        """Hand pending jobs to idle workers. Must be called with the lock held."""
+        waiting = deque()
+        while self._pending:
+            job = self._pending.popleft()
+            if job.future.cancelled():
+                continue
+
+            if job.worker_index is not None:
+                candidates = [self._workers[job.worker_index]]
+            else:
+                candidates = self._workers
+            idle = [w for w in candidates if w.ready and len(w.in_flight) < self.worker_concurrency]
+            if not idle:
+                waiting.append(job)
+                continue
+
+            worker = self._pick_worker(idle, job.model_size)
+            try:
+                worker.conn.send(("run", job.id, job.task_name, job.kwargs))
+            except (OSError, ValueError):
+                # The worker is dying; keep the job for the next worker
+                worker.ready = False
+                waiting.append(job)
+                continue
+
+            worker.in_flight[job.id] = job
+            if job.model_size:
+                worker.loaded_models.add(job.model_size)
+
+        self._pending = waiting
+        self._rebalance()
+
+    def _rebalance(self):
+        """
+        Give each busy worker a share of the physical cores in proportion to its
+        running jobs, and each job one intra-op thread per core of that share,
+        so concurrent inferences don't oversubscribe the CPU. Must be called
+        with the lock held.
+        """
+        if not self.cpu_scheduling:
+            return
+        demands = {w.index: self._running_jobs(w) for w in self._workers if w.ready}
+        for index, cores in cpu_scheduler.split_cores(self._cores, demands).items():
+            worker = self._workers[index]
+            cpus = sorted(cpu for core in cores for cpu in core)
+            threads = cpu_scheduler.threads_per_job(cores, self._running_jobs(worker))
+            if (cpus, threads) != (worker.cpus, worker.threads):
+                try:
+                    worker.conn.send(("cpus", cpus, threads))
+                except (OSError, ValueError):
+                    continue
+                worker.cpus, worker.threads = cpus, threads
+            for job in worker.in_flight.values():
+                if not job.threads or job.threads[-1] != threads:
+                    job.threads.append(threads)
+
+    def _running_jobs(self, worker: _Worker) -> int:
+        """
+        Jobs of a worker that run at the same time. Without batching, jobs on the
+        same model wait for each other on the model's lock, so they count once.
+        """
+        if self.batching:
+            return len(worker.in_flight)
+        return len({job.model_size or job.id for job in worker.in_flight.values()})
+
+    @staticmethod
+    def _pick_worker(idle: List[_Worker], model_size: Optional[str]) -> _Worker:
+        # Least loaded first, so concurrent tasks spread across processes
+        idle = sorted(idle, key=lambda w: len(w.in_flight))
+        if model_size:
+            for worker in idle:
+                if model_size in worker.affinity:
+                    return worker
+            for worker in idle:
+                if model_size in worker.loaded_models:
+                    return worker
+            # Prefer workers without affinity so dedicated workers stay free
+            for worker in idle:
+                if not worker.affinity:
+                    return worker
+        return idle[0]
+
+    # Result handling
+
+    def _monitor_loop(self):
+        while self._running:
+            with self._lock:
+                handles = {}
+                for worker in self._workers:
+                    handles[worker.conn] = worker
+                    handles[worker.process.sentinel] = worker
+
+            for handle in wait(list(handles), timeout=1.0):
+                worker = handles[handle]
+                if handle is worker.conn:
+                    self._receive(worker)
+                elif self._running:
+                    self._respawn(worker)
+
+    def _receive(self, worker: _Worker):
+        try:
+            kind, job_id, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            # The sentinel will report the dead process
+            return
+
+        with self._lock:
+            if kind == "ready":
+                worker.ready = True
+                print(f"Inference worker {worker.index} ready (pid {payload})")
+                self._dispatch()
+                return
+
+            job = worker.in_flight.pop(job_id, None)
+            if job is not None:
+                self._record_allocation(job, worker)
+            self._dispatch()
+
+        if job is None:
+            return
+        if kind == "done":
+            self._resolve(job, payload)
+        else:
+            self._fail(job, InferenceTaskError(payload))
+
+    def _respawn(self, worker: _Worker):
+        with self._lock:
+            if not self._running or worker.process.is_alive():
+                return
+            exitcode = worker.process.exitcode
+            lost = list(worker.in_flight.values())
+            worker.in_flight.clear()
+            worker.conn.close()
+            worker.restarts += 1
+            print(f"Inference worker {worker.index} died (exit code {exitcode}), respawning")
+            self._spawn(worker)
+
+        for job in lost:
+            self._fail(job, WorkerCrashedError(
+                f"Inference worker {worker.index} crashed (exit code {exitcode}) while running {job.task_name}"
+            ))
+
+    def _record_allocation(self, job: _Job, worker: _Worker):
+        if job.threads:
+            self._allocations.append({
+                "job_id": job.id,
+                "task": job.task_name,
+                "worker": worker.index,
+                "threads": job.threads,
+                "cpus": worker.cpus,
+                "seconds": time.time() - job.submitted_at
+            })
+
+    @staticmethod
+    def _resolve(job: _Job, result: Any):
+        def _set():
+            if not job.future.done():
+                job.future.set_result(result)
+        try:
+            job.loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            # The event loop that submitted the job is already closed
+            pass
+
+    @staticmethod
+    def _fail(job: _Job, error: Exception):
+        def _set():
+            if not job.future.done():
+                job.future.set_exception(error)
+        try:
+            job.loop.call_soon_threadsafe(_set)
+        except RuntimeError:
+            # The event loop that submitted the job is already closed
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._running,
+                "queued": len(self._pending),
+                "max_queue_size": self.max_queue_size,
+                "workers": [
+                    {
+                        "index": w.index,
+                        "pid": w.process.pid if w.process else None,
+                        "ready": w.ready,
+                        "in_flight": len(w.in_flight),
+                        "affinity": w.affinity,
+                        "loaded_models": sorted(w.loaded_models),
+                        "restarts": w.restarts,
+                        "cpus": w.cpus,
+                        "threads_per_job": w.threads
+                    }
+                    for w in self._workers
+                ],
+                # Most recent first
+                "job_allocations": list(reversed(self._allocations))
+            }
+
+
+def _parse_worker_models(spec: str) -> List[List[str]]:
+    """Parse "base;small,medium" into [["base"], ["small", "medium"]]."""
+    if not spec:
+        return []
+    return [[m.strip() for m in part.split(",") if m.strip()] for part in spec.split(";")]
+
+
+inference_pool = InferencePool(
+    num_workers=settings.INFERENCE_WORKERS,
+    max_queue_size=settings.INFERENCE_MAX_QUEUE,
+    worker_models=_parse_worker_models(settings.INFERENCE_WORKER_MODELS),
+    worker_concurrency=settings.INFERENCE_WORKER_CONCURRENCY,
+    cpu_scheduling=settings.INFERENCE_CPU_SCHEDULING,
+    batching=settings.INFERENCE_BATCHING
+)
+
+
+def get_inference_pool() -> InferencePool:
+    return inference_pool
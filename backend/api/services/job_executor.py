@@ -0,0 +1,213 @@
+import time
+import math
+import heapq
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Awaitable, Dict, Any, Optional, List
+
+from api.core.config import settings
+from api.services.job_scheduler import priority, WaitStats
+
+# Weight of the latest job in the moving average of processing seconds per MB
+RATE_SMOOTHING = 0.2
+
+
+class JobQueueFullError(Exception):
+    """Raised when the pending job queue is full and a new job cannot be admitted."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Job:
+    def __init__(
+        self,
+        job_id: int,
+        run: Callable[[], Awaitable[Any]],
+        size_mb: float,
+        estimated_seconds: float,
+        user_id: Optional[int],
+        tier: Optional[str]
+    ):
+        self.id = job_id
+        self.run = run
+        self.size_mb = size_mb
+        self.estimated_seconds = estimated_seconds
+        self.user_id = user_id
+        self.tier = tier
+        self.submitted_at = time.time()
+        self.priority = priority(self.submitted_at, estimated_seconds, tier)
+        self.started_at: Optional[float] = None
+
+
+class JobExecutor:
+    """
+    Runs transcription jobs in the API process, at most `max_concurrent` at a time.
+
+    Further jobs wait in a queue of at most `max_pending`; a full queue
+    rejects new jobs with `JobQueueFullError`, so uploads can be answered with
+    429 instead of piling up. Waiting jobs start in the order of their
+    `job_scheduler.priority` (cheapest first, weighted by subscription tier),
+    skipping users already running `max_per_user` jobs. A job's processing
+    time is its estimated cost if given, otherwise estimated from its file
+    size and a moving average of recent jobs' seconds per MB; these give the
+    waiting jobs' estimated start times.
+    """
+
+    def __init__(self, max_concurrent: int, max_pending: int, seconds_per_mb: float = 15.0, max_per_user: int = 0):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_pending = max_pending
+        self.seconds_per_mb = seconds_per_mb
+        self.max_per_user = max_per_user
+        self._pending: Dict[int, _Job] = {}
+        self._running: Dict[int, _Job] = {}
+        self._counters = {"completed": 0, "failed": 0, "rejected": 0}
+        self.waits = WaitStats()
+
+    def is_full(self) -> bool:
+        """
+        Return True if a new job would currently be rejected.
+
+        Only the waiting jobs count: with the per-user cap, slots can sit idle
+        while one user's jobs fill the queue, and those jobs must still be bounded.
+        """
+        return len(self._pending) >= self.max_pending
+
+    def depth(self) -> int:
+        """Number of jobs waiting to start."""
+        return len(self._pending)
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is expected to free up."""
+        starts = self._estimated_starts()
+        if not starts:
+            return 1
+        return max(1, math.ceil(next(iter(starts.values())) - time.time()))
+
+    def submit(
+        self,
+        job_id: int,
+        run: Callable[[], Awaitable[Any]],
+        size_bytes: int,
+        cost_seconds: Optional[float] = None,
+        user_id: Optional[int] = None,
+        tier: Optional[str] = None
+    ):
+        """
+        Queue a job, starting it right away if a slot is free.
+
+        Must be called from the event loop the jobs run on.
+
+        Args:
+            job_id: Transcription id
+            run: Function returning the job's coroutine
+            size_bytes: Size of the uploaded file, for the processing time estimate
+            cost_seconds: Estimated processing seconds, if known (see job_scheduler.estimate_cost)
+            user_id: Owner of the job, for the per-user concurrency cap
+            tier: Owner's subscription tier, for the job's weight and wait metrics
+        """
+        if self.is_full():
+            self._counters["rejected"] += 1
+            raise JobQueueFullError(
+                f"Transcription queue is full ({len(self._pending)} jobs waiting)",
+                self.retry_after()
+            )
+        size_mb = size_bytes / (1024 * 1024)
+        estimated_seconds = cost_seconds if cost_seconds is not None else size_mb * self.seconds_per_mb
+        self._pending[job_id] = _Job(job_id, run, size_mb, max(1.0, estimated_seconds), user_id, tier)
+        self._start_ready()
+
+    def _queue_order(self) -> List[_Job]:
+        return sorted(self._pending.values(), key=lambda job: job.priority)
+
+    def _start_ready(self):
+        while self._pending and len(self._running) < self.max_concurrent:
+            running_per_user = Counter(job.user_id for job in self._running.values())
+            job = next((
+                job for job in self._queue_order()
+                if not self.max_per_user or job.user_id is None
+                or running_per_user[job.user_id] < self.max_per_user
+            ), None)
+            if job is None:
+                # Every waiting job belongs to a user at their cap
+                return
+            del self._pending[job.id]
+            job.started_at = time.time()
+            self.waits.record(job.tier, job.started_at - job.submitted_at)
+            self._running[job.id] = job
+            asyncio.ensure_future(self._run(job))
+
+    async def _run(self, job: _Job):
+        try:
+            await job.run()
+            self._counters["completed"] += 1
+            if job.size_mb > 0:
+                rate = (time.time() - job.started_at) / job.size_mb
+                self.seconds_per_mb += RATE_SMOOTHING * (rate - self.seconds_per_mb)
+        except Exception as e:
+            self._counters["failed"] += 1
+            print(f"Transcription job {job.id} failed: {str(e)}")
+        finally:
+            del self._running[job.id]
+            self._start_ready()
+
+    def _estimated_starts(self) -> Dict[int, float]:
+        """Estimated start times of the pending jobs, in queue order (ignoring the per-user cap)."""
+        now = time.time()
+        # When each slot frees up, assuming running jobs take their estimate
+        slots = [max(job.started_at + job.estimated_seconds - now, 0.0) for job in self._running.values()]
+        slots += [0.0] * (self.max_concurrent - len(slots))
+        heapq.heapify(slots)
+
+        starts = {}
+        for job in self._queue_order():
+            free_at = heapq.heappop(slots)
+            starts[job.id] = now + free_at
+            heapq.heappush(slots, free_at + job.estimated_seconds)
+        return starts
+
+    def queue_status(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Queue position (1 for the next job to start, 0 once running) and
+        estimated start time of a job, or None if it is not queued here.
+        """
+        if job_id in self._running:
+            return {
+                "queue_position": 0,
+                "estimated_start_time": datetime.fromtimestamp(self._running[job_id].started_at)
+            }
+        if job_id not in self._pending:
+            return None
+        starts = self._estimated_starts()
+        return {
+            "queue_position": list(starts).index(job_id) + 1,
+            "estimated_start_time": datetime.fromtimestamp(starts[job_id])
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "local",
+            "max_concurrent": self.max_concurrent,
+            "max_pending": self.max_pending,
+            "running": len(self._running),
+            "pending": len(self._pending),
+            "max_per_user": self.max_per_user,
+            "seconds_per_mb": self.seconds_per_mb,
+            "queue_wait_seconds": self.waits.summary(),
+            **self._counters
+        }
+
+
+# Shared by the routers of this API process
+job_executor = JobExecutor(
+    max_concurrent=settings.JOB_MAX_CONCURRENT,
+    max_pending=settings.JOB_MAX_PENDING,
+    seconds_per_mb=settings.JOB_ESTIMATE_SECONDS_PER_MB,
+    max_per_user=settings.JOB_MAX_CONCURRENT_PER_USER
+)
+
+
+def get_job_executor() -> JobExecutor:
+    return job_executor
@@ -0,0 +1,406 @@
+import json
+import time
+import uuid
+import random
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+import redis
+
+from api.core.config import settings
+from api.db.database import get_redis_client
+from api.services.job_executor import JobQueueFullError, get_job_executor
+from api.services.job_scheduler import priority, summarize_waits, WAIT_SAMPLES
+
+# Redis keys
+READY_KEY = "stt:jobs:ready"  # Sorted set: job id -> scheduling priority (lowest runs first)
+DELAYED_KEY = "stt:jobs:delayed"  # Sorted set: job id -> time its retry backoff ends
+PROCESSING_KEY = "stt:jobs:processing"  # Sorted set: job id -> visibility deadline
+DEAD_KEY = "stt:jobs:dead"  # List of job ids that ran out of attempts
+JOB_PREFIX = "stt:jobs:job:"  # Hash per job: payload, attempts, errors, owner, priority
+LOCK_PREFIX = "stt:jobs:lock:"  # Per transcription id: token of the worker running it
+USER_RUNNING_KEY = "stt:jobs:user_running"  # Hash: user id -> jobs in the processing set
+WAITS_PREFIX = "stt:jobs:waits:"  # List per tier of recent queue waits in seconds
+WAIT_TIERS_KEY = "stt:jobs:wait_tiers"  # Set of tiers with recorded waits
+
+# Ready jobs looked at per claim; jobs of users at their concurrency cap are skipped
+CLAIM_BATCH = 50
+
+# Sent as Retry-After when the queue is full
+RETRY_AFTER_SECONDS = 30
+
+
+class ClaimedJob:
+    def __init__(self, job_id: str, payload: Dict[str, Any], attempts: int, token: str):
+        self.id = job_id
+        self.payload = payload
+        self.attempts = attempts
+        self.token = token
+
+
+class JobQueue:
+    """
+    Durable transcription job queue on Redis, shared by the API and worker processes.
+
+    Ready jobs are claimed in the order of their `job_scheduler.priority`
+    (cheapest first, weighted by subscription tier), skipping users who
+    already run `max_per_user` jobs. A claimed job moves from the ready set to the processing set with a
+    visibility deadline, which the worker extends with `heartbeat` while it
+    runs. Jobs whose deadline passes (the worker died or hung) are put back,
+    like failed jobs, with exponential backoff until `max_attempts`; then
+    they move to the dead-letter list. A per-transcription lock with the
+    same timeout ensures at most one worker runs a transcription at a time.
+
+    Uses only plain commands and WATCH/MULTI transactions (no Lua), so it
+    also runs against fakeredis.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        visibility_timeout: float = 300.0,
+        max_attempts: int = 3,
+        backoff_seconds: float = 10.0,
+        max_backoff_seconds: float = 600.0,
+        max_pending: int = 100,
+        seconds_per_mb: float = 15.0,
+        max_per_user: int = 0
+    ):
+        self.redis = redis_client
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.max_pending = max_pending
+        self.seconds_per_mb = seconds_per_mb
+        self.max_per_user = max_per_user
+
+    # Producer side
+
+    def is_full(self) -> bool:
+        """Return True if a new job would currently be rejected."""
+        return self.depth() >= self.max_pending
+
+    def depth(self) -> int:
+        """Number of jobs waiting to be claimed, including retries in backoff."""
+        return self.redis.zcard(READY_KEY) + self.redis.zcard(DELAYED_KEY)
+
+    def retry_after(self) -> int:
+        return RETRY_AFTER_SECONDS
+
+    def enqueue(
+        self,
+        job_id,
+        payload: Dict[str, Any],
+        size_bytes: int = 0,
+        cost_seconds: Optional[float] = None,
+        user_id: Optional[int] = None,
+        tier: Optional[str] = None
+    ):
+        """
+        Add a job, e.g. the arguments of process_transcription for a transcription id.
+
+        Enqueueing a job id that is already queued keeps its place.
+
+        Args:
+            job_id: Transcription id
+            payload: Arguments the worker runs the job with
+            size_bytes: Size of the uploaded file, estimating the cost if `cost_seconds` is not given
+            cost_seconds: Estimated processing seconds (see job_scheduler.estimate_cost)
+            user_id: Owner of the job, for the per-user concurrency cap
+            tier: Owner's subscription tier, for the job's weight and wait metrics
+        """
+        if self.is_full():
+            raise JobQueueFullError(
+                f"Transcription queue is full ({self.max_pending} jobs waiting)",
+                self.retry_after()
+            )
+        now = time.time()
+        if cost_seconds is None:
+            cost_seconds = size_bytes / (1024 * 1024) * self.seconds_per_mb
+        job_priority = priority(now, cost_seconds, tier)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(_job_key(job_id), mapping={
+            "payload": json.dumps(payload),
+            "attempts": 0,
+            "size_bytes": size_bytes,
+            "cost_seconds": cost_seconds,
+            "user_id": "" if user_id is None else user_id,
+            "tier": tier or "",
+            "priority": job_priority,
+            "enqueued_at": now
+        })
+        pipe.zadd(READY_KEY, {str(job_id): job_priority}, nx=True)
+        pipe.execute()
+
+    def queue_status(self, job_id) -> Optional[Dict[str, Any]]:
+        """
+        Queue position (1 for the next job to run, 0 once running) of a job, or
+        None if it is not queued. The start time is only known for retries
+        waiting out their backoff.
+        """
+        job_id = str(job_id)
+        if self.redis.zscore(PROCESSING_KEY, job_id) is not None:
+            return {"queue_position": 0, "estimated_start_time": None}
+        rank = self.redis.zrank(READY_KEY, job_id)
+        if rank is not None:
+            return {"queue_position": rank + 1, "estimated_start_time": None}
+        ready_at = self.redis.zscore(DELAYED_KEY, job_id)
+        if ready_at is None:
+            return None
+        # Retries rejoin the ready set with their original priority once the backoff ends
+        return {
+            "queue_position": self.redis.zcard(READY_KEY) + self.redis.zrank(DELAYED_KEY, job_id) + 1,
+            "estimated_start_time": datetime.fromtimestamp(ready_at)
+        }
+
+    # Worker side
+
+    def claim(self, worker_id: str) -> Optional[ClaimedJob]:
+        """
+        Claim the highest-priority ready job whose user is below the concurrency
+        cap, first putting back jobs whose visibility deadline or retry backoff passed.
+
+        Returns:
+            The claimed job, or None if no job is ready
+        """
+        self.requeue_expired()
+        self.promote_delayed()
+
+        now = time.time()
+        for job_id in self.redis.zrange(READY_KEY, 0, CLAIM_BATCH - 1):
+            token = f"{worker_id}:{uuid.uuid4().hex}"
+            # Another worker may still be running this transcription after its deadline passed
+            if not self.redis.set(_lock_key(job_id), token, nx=True, px=int(self.visibility_timeout * 1000)):
+                continue
+
+            attempts = self._move_to_processing(job_id, now + self.visibility_timeout)
+            if attempts is None:
+                self._release_lock(job_id, token)
+                continue
+
+            payload, tier, enqueued_at = self.redis.hmget(_job_key(job_id), "payload", "tier", "enqueued_at")
+            job = ClaimedJob(job_id, json.loads(payload) if payload else {}, attempts, token)
+            if payload is None:
+                # Acknowledged by an earlier run while it was queued again
+                self.ack(job)
+                continue
+            if attempts == 1:
+                self._record_wait(tier or "free", now - float(enqueued_at))
+            return job
+        return None
+
+    def heartbeat(self, job: ClaimedJob) -> bool:
+        """
+        Extend a running job's visibility deadline and lock.
+
+        Returns:
+            False if the job is no longer ours (its deadline passed and it was put back)
+        """
+        if self.redis.zscore(PROCESSING_KEY, job.id) is None:
+            return False
+        self.redis.zadd(PROCESSING_KEY, {job.id: time.time() + self.visibility_timeout}, xx=True)
+        # Compare-and-extend without Lua; the lock can only have expired in between if the
+        # heartbeat was already a full visibility timeout late
+        if self.redis.get(_lock_key(job.id)) == job.token:
+            self.redis.pexpire(_lock_key(job.id), int(self.visibility_timeout * 1000))
+        return True
+
+    def ack(self, job: ClaimedJob):
+        """Remove a job that completed."""
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(PROCESSING_KEY)
+                    running = pipe.zscore(PROCESSING_KEY, job.id) is not None
+                    user_id = pipe.hget(_job_key(job.id), "user_id")
+                    pipe.multi()
+                    pipe.zrem(PROCESSING_KEY, job.id)
+                    pipe.zrem(READY_KEY, job.id)
+                    pipe.zrem(DELAYED_KEY, job.id)
+                    if running and user_id:
+                        pipe.hincrby(USER_RUNNING_KEY, user_id, -1)
+                    pipe.delete(_job_key(job.id))
+                    pipe.execute()
+                    break
+                except redis.WatchError:
+                    continue
+        self._release_lock(job.id, job.token)
+
+    def fail(self, job: ClaimedJob, error: str):
+        """Retry a failed job after a backoff, or dead-letter it after its last attempt."""
+        self._retry_or_bury(job.id, error)
+        self._release_lock(job.id, job.token)
+
+    def requeue_expired(self) -> int:
+        """Put back the jobs whose visibility deadline passed. Returns how many."""
+        expired = self.redis.zrangebyscore(PROCESSING_KEY, "-inf", time.time())
+        return sum(1 for job_id in expired if self._retry_or_bury(job_id, "Visibility timeout expired", expired_only=True))
+
+    def promote_delayed(self) -> int:
+        """Move retries whose backoff ended back to the ready set, with their original priority."""
+        promoted = 0
+        for job_id in self.redis.zrangebyscore(DELAYED_KEY, "-inf", time.time()):
+            with self.redis.pipeline() as pipe:
+                try:
+                    pipe.watch(DELAYED_KEY)
+                    if pipe.zscore(DELAYED_KEY, job_id) is None:
+                        continue
+                    job_priority = float(pipe.hget(_job_key(job_id), "priority") or time.time())
+                    pipe.multi()
+                    pipe.zrem(DELAYED_KEY, job_id)
+                    pipe.zadd(READY_KEY, {job_id: job_priority})
+                    pipe.execute()
+                    promoted += 1
+                except redis.WatchError:
+                    continue
+        return promoted
+
+    # Dead letters and monitoring
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return [
+            {"id": job_id, **self.redis.hgetall(_job_key(job_id))}
+            for job_id in self.redis.lrange(DEAD_KEY, 0, limit - 1)
+        ]
+
+    def retry_dead(self, job_id) -> bool:
+        """Move a dead-lettered job back to the ready set with fresh attempts."""
+        job_id = str(job_id)
+        if not self.redis.lrem(DEAD_KEY, 0, job_id):
+            return False
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(_job_key(job_id), "attempts", 0)
+        pipe.zadd(READY_KEY, {job_id: float(self.redis.hget(_job_key(job_id), "priority") or time.time())})
+        pipe.execute()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        waits = {
+            tier: [float(wait) for wait in self.redis.lrange(f"{WAITS_PREFIX}{tier}", 0, -1)]
+            for tier in self.redis.smembers(WAIT_TIERS_KEY)
+        }
+        return {
+            "backend": "redis",
+            "ready": self.redis.zcard(READY_KEY),
+            "delayed": self.redis.zcard(DELAYED_KEY),
+            "processing": self.redis.zcard(PROCESSING_KEY),
+            "dead": self.redis.llen(DEAD_KEY),
+            "max_pending": self.max_pending,
+            "max_per_user": self.max_per_user,
+            "queue_wait_seconds": summarize_waits(waits)
+        }
+
+    # Internals
+
+    def backoff(self, attempts: int) -> float:
+        """Delay before retry number `attempts`, doubling per attempt, with jitter."""
+        delay = min(self.backoff_seconds * 2 ** max(attempts - 1, 0), self.max_backoff_seconds)
+        return delay * random.uniform(0.8, 1.2)
+
+    def _move_to_processing(self, job_id: str, deadline: float) -> Optional[int]:
+        """
+        Atomically move a ready job to the processing set, unless its user is at the
+        concurrency cap. Returns its attempt number, or None if taken or capped.
+        """
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(READY_KEY, USER_RUNNING_KEY)
+                if pipe.zscore(READY_KEY, job_id) is None:
+                    return None
+                user_id = pipe.hget(_job_key(job_id), "user_id")
+                if user_id and self.max_per_user and int(pipe.hget(USER_RUNNING_KEY, user_id) or 0) >= self.max_per_user:
+                    return None
+                pipe.multi()
+                pipe.zrem(READY_KEY, job_id)
+                pipe.zadd(PROCESSING_KEY, {job_id: deadline})
+                if user_id:
+                    pipe.hincrby(USER_RUNNING_KEY, user_id, 1)
+                pipe.hincrby(_job_key(job_id), "attempts", 1)
+                return pipe.execute()[-1]
+            except redis.WatchError:
+                return None
+
+    def _retry_or_bury(self, job_id: str, error: str, expired_only: bool = False) -> bool:
+        """Move a job from the processing set back to the ready set or to the dead letters."""
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(PROCESSING_KEY)
+                deadline = pipe.zscore(PROCESSING_KEY, job_id)
+                # Gone (acknowledged or put back by another process) or extended by a heartbeat
+                if deadline is None or (expired_only and deadline > time.time()):
+                    return False
+                attempts = int(pipe.hget(_job_key(job_id), "attempts") or 0)
+                user_id = pipe.hget(_job_key(job_id), "user_id")
+                pipe.multi()
+                pipe.zrem(PROCESSING_KEY, job_id)
+                if user_id:
+                    pipe.hincrby(USER_RUNNING_KEY, user_id, -1)
+                pipe.hset(_job_key(job_id), "last_error", error[-2000:])
+                if attempts >= self.max_attempts:
+                    pipe.hset(_job_key(job_id), "dead_at", time.time())
+                    pipe.rpush(DEAD_KEY, job_id)
+                else:
+                    pipe.zadd(DELAYED_KEY, {job_id: time.time() + self.backoff(attempts)})
+                pipe.execute()
+            except redis.WatchError:
+                return False
+
+        if attempts >= self.max_attempts:
+            print(f"Job {job_id} moved to the dead-letter list after {attempts} attempts: {error[:200]}")
+        return True
+
+    def _record_wait(self, tier: str, wait_seconds: float):
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.sadd(WAIT_TIERS_KEY, tier)
+        pipe.lpush(f"{WAITS_PREFIX}{tier}", wait_seconds)
+        pipe.ltrim(f"{WAITS_PREFIX}{tier}", 0, WAIT_SAMPLES - 1)
+        pipe.execute()
+
+    def _release_lock(self, job_id: str, token: str):
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(_lock_key(job_id))
+                if pipe.get(_lock_key(job_id)) != token:
+                    return
+                pipe.multi()
+                pipe.delete(_lock_key(job_id))
+                pipe.execute()
+            except redis.WatchError:
+                pass
+
+
+def _job_key(job_id) -> str:
+    return f"{JOB_PREFIX}{job_id}"
+
+
+def _lock_key(job_id) -> str:
+    return f"{LOCK_PREFIX}{job_id}"
+
+
+# Used by the API to enqueue jobs and by worker processes (worker.py) to run them
+job_queue = JobQueue(
+    get_redis_client(),
+    visibility_timeout=settings.JOB_VISIBILITY_TIMEOUT_SECONDS,
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    backoff_seconds=settings.JOB_RETRY_BACKOFF_SECONDS,
+    max_backoff_seconds=settings.JOB_RETRY_MAX_BACKOFF_SECONDS,
+    max_pending=settings.JOB_MAX_PENDING,
+    seconds_per_mb=settings.JOB_ESTIMATE_SECONDS_PER_MB,
+    max_per_user=settings.JOB_MAX_CONCURRENT_PER_USER
+)
+
+
+def get_job_queue() -> JobQueue:
+    return job_queue
+
+
+def get_job_backend():
+    """
+    Where the API sends transcription jobs: this process's JobExecutor, or
+    the Redis queue served by worker processes (settings.JOB_QUEUE_BACKEND).
+    Both provide is_full, depth, retry_after, queue_status and stats.
+    """
+    if settings.JOB_QUEUE_BACKEND == "redis":
+        return job_queue
+    return get_job_executor()
@@ -0,0 +1,95 @@
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Any, Optional, Iterable, List
+
+from api.core.config import settings
+from api.services.model_registry import split_model_key
+
+# int8 models run at about this fraction of their FP32 real-time factor on CPU
+INT8_RTF_RATIO = 0.6
+
+# Queue waits kept per tier for the percentiles
+WAIT_SAMPLES = 1000
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """Parse "name:value,name:value" settings such as JOB_TIER_WEIGHTS."""
+    weights = {}
+    for item in spec.split(","):
+        name, _, value = item.partition(":")
+        if name.strip() and value.strip():
+            weights[name.strip()] = float(value)
+    return weights
+
+
+MODEL_RTF = parse_weights(settings.JOB_MODEL_RTF)
+TIER_WEIGHTS = parse_weights(settings.JOB_TIER_WEIGHTS)
+
+
+def estimate_cost(duration_seconds: float, model_size: str) -> float:
+    """
+    Estimated processing seconds of a job: audio duration times the model's real-time factor.
+
+    Args:
+        duration_seconds: Audio duration
+        model_size: Registry key of the model, e.g. "small" or "small:int8"
+    """
+    if model_size in MODEL_RTF:
+        return duration_seconds * MODEL_RTF[model_size]
+    size, quantized = split_model_key(model_size)
+    # "small.en" and "large-v3" run at the speed of "small" and "large"
+    rtf = MODEL_RTF.get(size, MODEL_RTF.get(size.split(".")[0].split("-")[0], 1.0))
+    return duration_seconds * rtf * (INT8_RTF_RATIO if quantized else 1.0)
+
+
+def tier_weight(tier: Optional[str]) -> float:
+    return TIER_WEIGHTS.get(tier or "", 1.0)
+
+
+def priority(arrival: float, cost_seconds: float, tier: Optional[str],
+             max_delay: Optional[float] = None) -> float:
+    """
+    Scheduling score of a job; lower runs first.
+
+    Jobs are ordered by arrival time pushed back by their cost divided by
+    their tier's weight, so short jobs and higher tiers go first. The push
+    back is capped at `max_delay` (settings.JOB_MAX_DELAY_SECONDS): a job
+    never waits behind jobs that arrived more than that after it, so long
+    jobs are not starved.
+    """
+    if max_delay is None:
+        max_delay = settings.JOB_MAX_DELAY_SECONDS
+    return arrival + min(cost_seconds / tier_weight(tier), max_delay)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of `values`, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def summarize_waits(waits_by_tier: Dict[str, Iterable[float]]) -> Dict[str, Dict[str, Any]]:
+    """p50/p95 queue wait in seconds per tier."""
+    summary = {}
+    for tier, waits in waits_by_tier.items():
+        waits = list(waits)
+        summary[tier] = {"jobs": len(waits), "p50": percentile(waits, 0.5), "p95": percentile(waits, 0.95)}
+    return summary
+
+
+class WaitStats:
+    """Recent queue waits (submission to start) per subscription tier."""
+
+    def __init__(self, max_samples: int = WAIT_SAMPLES):
+        self._lock = threading.Lock()
+        self._waits = defaultdict(lambda: deque(maxlen=max_samples))
+
+    def record(self, tier: Optional[str], wait_seconds: float):
+        with self._lock:
+            self._waits[tier or "free"].append(wait_seconds)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return summarize_waits(self._waits)
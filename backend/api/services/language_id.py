@@ -0,0 +1,110 @@
+from contextlib import nullcontext
+from typing import Callable, ContextManager, Dict, Any, Optional
+
+import numpy as np
+import torch
+import whisper
+
+from api.services import vad
+
+# Language-ID windows are Whisper's 30-second input
+WINDOW_SECONDS = 30
+
+
+def normalize_language(language_code: Optional[str]) -> Optional[str]:
+    """Convert a language code such as "en-US" to Whisper's "en", or None for auto-detection."""
+    if not language_code or language_code.lower() == "auto":
+        return None
+    return language_code.split("-")[0].lower()
+
+
+def speech_windows(audio: np.ndarray, speech_regions: np.ndarray, sample_rate: int, max_windows: int):
+    """
+    Pick up to `max_windows` 30-second windows of speech-only audio, spread over the recording.
+    """
+    if len(speech_regions):
+        audio, _ = vad.pack_speech(audio, speech_regions, sample_rate)
+    window = WINDOW_SECONDS * sample_rate
+    n_windows = max(1, min(max_windows, -(-len(audio) // window)))
+    starts = np.linspace(0, max(len(audio) - window, 0), n_windows).astype(int)
+    return [audio[start:start + window] for start in starts]
+
+
+def detect_language(model, windows) -> Dict[str, float]:
+    """Average Whisper's language probabilities over the windows, weighted by their length."""
+    if not model.is_multilingual:
+        return {"en": 1.0}
+
+    n_mels = getattr(model.dims, "n_mels", 80)
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(window), n_mels=n_mels)
+        for window in windows
+    ]).to(model.device)
+    with torch.no_grad():
+        _, probabilities = model.detect_language(mels)
+
+    weights = np.array([len(window) for window in windows], dtype=np.float64)
+    weights /= weights.sum()
+    averaged: Dict[str, float] = {}
+    for weight, probs in zip(weights, probabilities):
+        for language, p in probs.items():
+            averaged[language] = averaged.get(language, 0.0) + weight * float(p)
+    return averaged
+
+
+def identify_language(
+    audio: np.ndarray,
+    speech_regions: np.ndarray,
+    use_model: Callable[[str], ContextManager],
+    lock_model: Callable[[str], ContextManager] = lambda model_size: nullcontext(),
+    sample_rate: int = 16000,
+    model_size: str = "tiny",
+    fallback_model_size: Optional[str] = None,
+    max_windows: int = 3,
+    min_confidence: float = 0.6
+) -> Dict[str, Any]:
+    """
+    Identify the spoken language from a few speech windows with a small model.
+
+    If the small model's confidence is below `min_confidence`, the same windows
+    are run through `fallback_model_size` (usually the model of the main decode).
+
+    Args:
+        audio: Mono float32 audio
+        speech_regions: [start, end) sample indices of speech, from the VAD
+        use_model: Function returning a context holding the loaded model of a model size,
+            so it isn't evicted while it runs
+        lock_model: Function returning the lock a model must be held under while it runs,
+            since other threads may be decoding with the same model instance
+        sample_rate: Sample rate of `audio`
+        model_size: Model used for the fast pass
+        fallback_model_size: Model used when the fast pass is not confident
+        max_windows: Number of 30-second windows to look at
+        min_confidence: Probability of the top language needed to accept the fast pass
+
+    Returns:
+        Dictionary with the language, its probability, the runner-up and the model that decided
+    """
+    windows = speech_windows(audio, speech_regions, sample_rate, max_windows)
+    speech_seconds = float(sum(len(window) for window in windows)) / sample_rate
+    if speech_seconds == 0:
+        return {"language": None, "confidence": 0.0, "runner_up": None, "model_size": None,
+                "windows": 0, "speech_seconds": 0.0}
+
+    with use_model(model_size) as model, lock_model(model_size):
+        probabilities = detect_language(model, windows)
+    decided_by = model_size
+    if max(probabilities.values()) < min_confidence and fallback_model_size and fallback_model_size != model_size:
+        with use_model(fallback_model_size) as model, lock_model(fallback_model_size):
+            probabilities = detect_language(model, windows)
+        decided_by = fallback_model_size
+
+    ranked = sorted(probabilities.items(), key=lambda item: -item[1])
+    return {
+        "language": ranked[0][0],
+        "confidence": ranked[0][1],
+        "runner_up": ranked[1][0] if len(ranked) > 1 else None,
+        "model_size": decided_by,
+        "windows": len(windows),
+        "speech_seconds": speech_seconds
+    }
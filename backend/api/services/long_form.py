@@ -0,0 +1,86 @@
+from typing import Dict, Any, List
+
+import numpy as np
+
+# Resolution of the energy curve used to place chunk boundaries
+CUT_FRAME_SECONDS = 0.1
+
+
+def find_cut_points(audio: np.ndarray, sample_rate: int, chunk_seconds: float, search_seconds: float) -> List[int]:
+    """
+    Place chunk boundaries about `chunk_seconds` apart at the quietest point
+    within `search_seconds` of each target, so cuts fall between words.
+
+    Returns:
+        Sample indices of the boundaries, starting with 0 and ending with len(audio)
+    """
+    frame = int(sample_rate * CUT_FRAME_SECONDS)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return [0, len(audio)]
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.einsum("ij,ij->i", frames, frames)
+
+    chunk_frames = int(chunk_seconds / CUT_FRAME_SECONDS)
+    search_frames = int(search_seconds / CUT_FRAME_SECONDS)
+
+    cuts = [0]
+    position = 0
+    # Leave the remainder in the last chunk when it is shorter than half a chunk
+    while n_frames - position > chunk_frames * 1.5:
+        target = position + chunk_frames
+        low = max(position + 1, target - search_frames)
+        high = min(n_frames, target + search_frames + 1)
+        position = low + int(np.argmin(energy[low:high]))
+        cuts.append(position * frame + frame // 2)
+    cuts.append(len(audio))
+    return cuts
+
+
+def plan_chunks(cuts: List[int], overlap_samples: int, total_samples: int) -> List[Dict[str, int]]:
+    """
+    Turn cut points into chunks that extend `overlap_samples` past each cut.
+
+    Each chunk owns the range between its cuts; the overlap only gives the
+    model context and is de-duplicated when the results are stitched.
+    """
+    return [
+        {
+            "index": i,
+            "start": max(0, own_start - overlap_samples),
+            "end": min(total_samples, own_end + overlap_samples),
+            "own_start": own_start,
+            "own_end": own_end
+        }
+        for i, (own_start, own_end) in enumerate(zip(cuts[:-1], cuts[1:]))
+    ]
+
+
+def stitch_chunk_results(chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine chunk transcriptions whose timestamps are already in file time.
+
+    A segment is kept only by the chunk that owns its midpoint, which drops
+    the copies transcribed twice in the overlaps.
+    """
+    segments = []
+    language = None
+    for chunk in sorted(chunk_results, key=lambda c: c["own_start_time"]):
+        language = language or chunk.get("language")
+        for segment in chunk["segments"]:
+            midpoint = (segment["start_time"] + segment["end_time"]) / 2
+            if chunk["own_start_time"] <= midpoint < chunk["own_end_time"]:
+                segments.append(segment)
+
+    total_duration = sum(s["end_time"] - s["start_time"] for s in segments)
+    if total_duration > 0:
+        confidence = sum(s["confidence"] * (s["end_time"] - s["start_time"]) for s in segments) / total_duration
+    else:
+        confidence = float(np.mean([s["confidence"] for s in segments])) if segments else 0.0
+
+    return {
+        "text": " ".join(segment["text"].strip() for segment in segments),
+        "segments": segments,
+        "confidence": float(confidence),
+        "language": language
+    }
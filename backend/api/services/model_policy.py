@@ -0,0 +1,219 @@
+from typing import Dict, Any, Optional, List
+
+from api.core.config import settings
+from api.services.model_registry import model_key, split_model_key
+from api.services.job_scheduler import estimate_cost
+from api.services import progress
+
+# Multilingual model sizes from fastest to most accurate
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large"]
+
+# Sizes with an English-only ".en" variant, which is more accurate on English at the same speed
+ENGLISH_ONLY_SIZES = ("tiny", "base", "small", "medium")
+
+
+def choose_model_size(duration: float) -> str:
+    """Choose the Whisper model size for an audio duration in seconds."""
+    model_size = "base"  # Default
+    if duration > 1800:  # 30+ minutes
+        model_size = "medium"
+    elif duration > 600:  # 10+ minutes
+        model_size = "small"
+    return model_size
+
+
+def resolve_model_key(model_size: str, quantized: Optional[bool] = None) -> str:
+    """
+    Return the registry key of the model variant a job runs with.
+
+    Args:
+        model_size: Whisper model size
+        quantized: Use int8 weights. Defaults to whether the size is in settings.MODEL_QUANTIZED_SIZES.
+    """
+    if quantized is None:
+        # "small.en" is quantized with "small"
+        quantized = model_size.split(".")[0] in [size.strip() for size in settings.MODEL_QUANTIZED_SIZES.split(",")]
+    return model_key(model_size, quantized)
+
+
+def is_english(language_code: Optional[str]) -> bool:
+    return bool(language_code) and language_code.split("-")[0].lower() == "en"
+
+
+def english_variant(model_size: str, language_code: Optional[str]) -> str:
+    """The ".en" variant of a model size for English-only jobs, if it has one."""
+    if settings.MODEL_ENGLISH_VARIANTS and is_english(language_code) and model_size in ENGLISH_ONLY_SIZES:
+        return f"{model_size}.en"
+    return model_size
+
+
+def multilingual_variant(key: str) -> str:
+    """The registry key of the multilingual model of the same size as `key`."""
+    model_size, quantized = split_model_key(key)
+    if model_size.endswith(".en"):
+        model_size = model_size[:-len(".en")]
+    return model_key(model_size, quantized)
+
+
+def with_language(decision: Dict[str, Any], language_code: Optional[str]) -> Dict[str, Any]:
+    """A decision (`ModelDecision.to_dict`) made before the language was known, for a job in `language_code`."""
+    model_size, quantized = split_model_key(decision["model_size"])
+    variant = english_variant(model_size, language_code)
+    if variant == model_size:
+        return decision
+    return {
+        **decision,
+        "model_size": model_key(variant, quantized),
+        "reasons": decision["reasons"] + [f"identified as English, uses {variant}"]
+    }
+
+
+def model_rtf(key: str) -> float:
+    """Real-time factor of a model: measured on recent jobs, else the scheduler's estimate."""
+    rtf = progress.measured_rtf(key)
+    return rtf if rtf is not None else estimate_cost(1.0, key)
+
+
+def parse_sizes(spec: str) -> Dict[str, str]:
+    """Parse "tier:size,tier:size" settings such as MODEL_TIER_MAX_SIZE."""
+    sizes = {}
+    for item in spec.split(","):
+        name, _, size = item.partition(":")
+        if name.strip() and size.strip():
+            sizes[name.strip()] = size.strip()
+    return sizes
+
+
+class PolicyInput:
+    """What a model policy knows about a job when it starts."""
+
+    def __init__(
+        self,
+        duration: float,
+        language_code: Optional[str] = None,
+        tier: Optional[str] = None,
+        quantized: Optional[bool] = None,
+        queued_seconds: float = 0.0,
+        queue_depth: int = 0,
+        deadline_seconds: Optional[float] = None
+    ):
+        self.duration = duration
+        self.language_code = language_code
+        self.tier = tier or "free"
+        self.quantized = quantized
+        self.queued_seconds = queued_seconds
+        self.queue_depth = queue_depth
+        self.deadline_seconds = deadline_seconds
+
+
+class ModelDecision:
+    """The model a job runs with, and why."""
+
+    def __init__(self, model_size: str, policy: str, reasons: List[str],
+                 estimated_seconds: Optional[float] = None, deadline_seconds: Optional[float] = None):
+        self.model_size = model_size
+        self.policy = policy
+        self.reasons = reasons
+        self.estimated_seconds = estimated_seconds
+        self.deadline_seconds = deadline_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "model_size": self.model_size,
+            "policy": self.policy,
+            "reasons": self.reasons,
+            "estimated_seconds": self.estimated_seconds,
+            "deadline_seconds": self.deadline_seconds
+        }
+
+
+class ModelPolicy:
+    """Chooses the model a job runs with. Subclasses are registered in POLICIES."""
+
+    name = ""
+
+    def choose(self, job: PolicyInput) -> ModelDecision:
+        raise NotImplementedError
+
+
+class DurationLadderPolicy(ModelPolicy):
+    """The model size from the audio duration alone (`choose_model_size`)."""
+
+    name = "ladder"
+
+    def choose(self, job: PolicyInput) -> ModelDecision:
+        size = choose_model_size(job.duration)
+        reasons = [f"{job.duration:.0f}s of audio uses {size}"]
+        variant = english_variant(size, job.language_code)
+        if variant != size:
+            reasons.append(f"English-only job uses {variant}")
+        key = resolve_model_key(variant, job.quantized)
+        return ModelDecision(key, self.name, reasons, estimated_seconds=job.duration * model_rtf(key))
+
+
+class SlaPolicy(ModelPolicy):
+    """
+    The most accurate model the user's tier allows that still completes the
+    job by its deadline.
+
+    The deadline is the job's own, or the audio duration times the tier's
+    ratio (settings.MODEL_TIER_DEADLINE_RATIO, at least
+    MODEL_DEADLINE_MIN_SECONDS), minus the time the job already spent
+    queued. A model's processing time is the duration times its measured
+    real-time factor. Under load, the candidates drop one size for every
+    MODEL_DOWNGRADE_QUEUE_DEPTH jobs waiting, so the queue drains faster.
+    """
+
+    name = "sla"
+
+    def __init__(self):
+        self.tier_max_sizes = parse_sizes(settings.MODEL_TIER_MAX_SIZE)
+        self.tier_deadline_ratios = {tier: float(ratio) for tier, ratio in parse_sizes(settings.MODEL_TIER_DEADLINE_RATIO).items()}
+
+    def choose(self, job: PolicyInput) -> ModelDecision:
+        reasons = []
+        max_size = self.tier_max_sizes.get(job.tier, self.tier_max_sizes.get("free", "small"))
+        candidates = MODEL_SIZES[:MODEL_SIZES.index(max_size) + 1] if max_size in MODEL_SIZES else MODEL_SIZES[:3]
+        reasons.append(f"tier {job.tier} allows up to {candidates[-1]}")
+
+        if settings.MODEL_DOWNGRADE_QUEUE_DEPTH > 0:
+            steps = min(job.queue_depth // settings.MODEL_DOWNGRADE_QUEUE_DEPTH, len(candidates) - 1)
+            if steps:
+                candidates = candidates[:-steps]
+                reasons.append(f"{job.queue_depth} jobs waiting: at most {candidates[-1]}")
+
+        deadline = job.deadline_seconds
+        if deadline is None:
+            ratio = self.tier_deadline_ratios.get(job.tier, self.tier_deadline_ratios.get("free", 2.0))
+            deadline = max(settings.MODEL_DEADLINE_MIN_SECONDS, job.duration * ratio)
+        budget = deadline - job.queued_seconds
+
+        # Most accurate first; the fastest is used even if nothing fits
+        for size in reversed(candidates):
+            key = resolve_model_key(english_variant(size, job.language_code), job.quantized)
+            estimated = job.duration * model_rtf(key)
+            if estimated <= budget or size == candidates[0]:
+                break
+        if estimated <= budget:
+            reasons.append(f"{key} takes about {estimated:.0f}s of the {budget:.0f}s left before the deadline")
+        else:
+            reasons.append(f"no allowed model meets the deadline ({budget:.0f}s left), using the fastest, {key}")
+        if split_model_key(key)[0].endswith(".en"):
+            reasons.append("English-only job uses the .en variant")
+        return ModelDecision(key, self.name, reasons, estimated_seconds=estimated, deadline_seconds=deadline)
+
+
+# Selected with settings.MODEL_POLICY
+POLICIES = {
+    DurationLadderPolicy.name: DurationLadderPolicy,
+    SlaPolicy.name: SlaPolicy,
+}
+
+_policy: Optional[ModelPolicy] = None
+
+
+def get_model_policy() -> ModelPolicy:
+    global _policy
+    if _policy is None:
+        _policy = POLICIES[settings.MODEL_POLICY]()
+    return _policy
@@ -0,0 +1,247 @@
+import gc
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Optional, List
+
+# Approximate resident size of FP32 Whisper models in MB, used before a model is loaded
+MODEL_FOOTPRINT_ESTIMATES_MB = {
+    "tiny": 160,
+    "tiny.en": 160,
+    "base": 300,
+    "base.en": 300,
+    "small": 1000,
+    "small.en": 1000,
+    "medium": 3100,
+    "medium.en": 3100,
+    "large": 6300,
+    "large-v1": 6300,
+    "large-v2": 6300,
+    "large-v3": 6300,
+}
+
+DEFAULT_FOOTPRINT_MB = 1000
+
+# Registry keys of models with int8-quantized Linear layers end with this suffix
+INT8_SUFFIX = ":int8"
+
+# Share of the FP32 footprint left after int8 quantization (embeddings stay FP32)
+INT8_FOOTPRINT_RATIO = 0.4
+
+
+def model_key(model_size: str, quantized: bool = False) -> str:
+    """Return the registry key of a model size, optionally its int8 variant."""
+    return f"{model_size}{INT8_SUFFIX}" if quantized else model_size
+
+
+def split_model_key(key: str):
+    """Split a registry key into (model_size, quantized)."""
+    if key.endswith(INT8_SUFFIX):
+        return key[:-len(INT8_SUFFIX)], True
+    return key, False
+
+
+def estimate_footprint_bytes(key: str) -> int:
+    """Estimate the resident size of a model that has not been loaded yet."""
+    model_size, quantized = split_model_key(key)
+    estimate = MODEL_FOOTPRINT_ESTIMATES_MB.get(model_size, DEFAULT_FOOTPRINT_MB) * 1024 * 1024
+    return int(estimate * INT8_FOOTPRINT_RATIO) if quantized else estimate
+
+
+def measure_model_bytes(model) -> int:
+    """Return the number of bytes held by a torch module's parameters, buffers and packed int8 weights."""
+    from torch.ao.nn.quantized.modules.linear import LinearPackedParams
+
+    tensors = list(model.parameters()) + list(model.buffers())
+    for module in model.modules():
+        # Dynamically quantized Linear layers keep their weights outside of parameters()
+        if isinstance(module, LinearPackedParams):
+            tensors.extend(t for t in module._weight_bias() if t is not None)
+    return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+
+
+class ModelRegistry:
+    """
+    LRU cache of loaded models bounded by a memory budget.
+
+    Before a model is loaded, least recently used models are evicted until its
+    estimated footprint fits in the budget. The pinned model and models in
+    use (held with `use`) are never evicted: dropping a model another thread
+    still runs would not free its memory, and the next load would make a
+    second copy. Once loaded, the estimate is replaced by the measured size.
+
+    Models load outside the registry lock, so cache hits on other models
+    don't wait for a load; concurrent requests for a model being loaded wait
+    for that load instead of starting another.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        budget_bytes: int,
+        pinned: Optional[str] = None,
+        measure: Callable[[Any], int] = measure_model_bytes
+    ):
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+        self.pinned = pinned
+        self.measure = measure
+
+        self._lock = threading.RLock()
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._footprints: Dict[str, int] = {}
+        self._in_use: Dict[str, int] = {}  # Holders of each model, see `use`
+        self._loading: Dict[str, Future] = {}  # Models being loaded, resolved with the model
+        self._reserved: Dict[str, int] = {}  # Estimated footprints of the models being loaded
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "loads": 0, "unloads": 0}
+
+    @contextmanager
+    def use(self, model_size: str):
+        """
+        Hold a model while running it, loading it (and evicting others) if needed.
+
+        A held model is not evicted until every holder is done with it.
+        """
+        model = self._acquire(model_size, count_access=True, hold=True)
+        try:
+            yield model
+        finally:
+            with self._lock:
+                self._in_use[model_size] -= 1
+                if not self._in_use[model_size]:
+                    del self._in_use[model_size]
+
+    def get(self, model_size: str):
+        """Return a loaded model, loading it if needed. Prefer `use` to run it, which keeps it from being evicted."""
+        return self._acquire(model_size, count_access=True, hold=False)
+
+    def load(self, model_size: str):
+        """Load a model without counting a cache access."""
+        return self._acquire(model_size, count_access=False, hold=False)
+
+    def unload(self, model_size: str) -> bool:
+        """Drop a model from memory. Returns False if it was not loaded or is in use."""
+        with self._lock:
+            if model_size not in self._models or self._in_use.get(model_size):
+                return False
+            self._drop(model_size)
+            self._counters["unloads"] += 1
+        gc.collect()
+        return True
+
+    def warm(self, model_sizes: List[str]):
+        """Load each of the given models in order."""
+        for model_size in model_sizes:
+            self.load(model_size)
+
+    def _acquire(self, model_size: str, count_access: bool, hold: bool):
+        while True:
+            with self._lock:
+                if model_size in self._models:
+                    if count_access:
+                        self._counters["hits"] += 1
+                    self._models.move_to_end(model_size)
+                    if hold:
+                        self._in_use[model_size] = self._in_use.get(model_size, 0) + 1
+                    return self._models[model_size]
+
+                if count_access:
+                    self._counters["misses"] += 1
+                    count_access = False
+                loading = self._loading.get(model_size)
+                if loading is None:
+                    loading = self._loading[model_size] = Future()
+                    estimate = self._footprints.get(model_size, estimate_footprint_bytes(model_size))
+                    evicted = self._make_room(estimate)
+                    self._reserved[model_size] = estimate
+                    break
+
+            # Another thread is loading it; take a hold once it is in the registry
+            loading.result()
+
+        if evicted:
+            gc.collect()
+        try:
+            model = self._load(model_size)
+        except BaseException as e:
+            with self._lock:
+                del self._loading[model_size]
+                del self._reserved[model_size]
+            loading.set_exception(e)
+            raise
+        with self._lock:
+            self._models[model_size] = model
+            self._footprints[model_size] = self.measure(model)
+            del self._loading[model_size]
+            del self._reserved[model_size]
+            if hold:
+                self._in_use[model_size] = self._in_use.get(model_size, 0) + 1
+            print(
+                f"Loaded Whisper {model_size} model "
+                f"({self._footprints[model_size] / (1024 * 1024):.0f} MB, "
+                f"{self.resident_bytes() / (1024 * 1024):.0f} MB resident)"
+            )
+        loading.set_result(model)
+        return model
+
+    def _load(self, model_size: str):
+        print(f"Loading Whisper {model_size} model...")
+        start = time.time()
+        model = self.loader(model_size)
+        print(f"Loaded Whisper {model_size} weights in {time.time() - start:.1f}s")
+        with self._lock:
+            self._counters["loads"] += 1
+        return model
+
+    def _make_room(self, needed: int) -> bool:
+        """Evict idle models until `needed` more bytes fit in the budget. Returns True if any was evicted."""
+        evicted = False
+        while self.resident_bytes() + needed > self.budget_bytes:
+            victim = next((
+                name for name in self._models
+                if name != self.pinned and not self._in_use.get(name)
+            ), None)
+            if victim is None:
+                break
+            print(f"Evicting Whisper {victim} model to stay within the memory budget")
+            self._drop(victim)
+            self._counters["evictions"] += 1
+            evicted = True
+
+        if self.resident_bytes() + needed > self.budget_bytes:
+            print(
+                f"Warning: loading a {needed / (1024 * 1024):.0f} MB model exceeds "
+                f"the {self.budget_bytes / (1024 * 1024):.0f} MB model memory budget"
+            )
+        return evicted
+
+    def _drop(self, model_size: str):
+        del self._models[model_size]
+
+    def resident_bytes(self) -> int:
+        """Bytes of the loaded models, plus the estimates of those being loaded."""
+        with self._lock:
+            return sum(self._footprints[name] for name in self._models) + sum(self._reserved.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "hit_rate": self._counters["hits"] / lookups if lookups else 0.0,
+                "budget_mb": self.budget_bytes / (1024 * 1024),
+                "resident_mb": self.resident_bytes() / (1024 * 1024),
+                "pinned": self.pinned,
+                "loading": list(self._loading),
+                # Least recently used first
+                "models": [
+                    {
+                        "model_size": name,
+                        "size_mb": self._footprints[name] / (1024 * 1024),
+                        "in_use": self._in_use.get(name, 0)
+                    }
+                    for name in self._models
+                ]
+            }
@@ -0,0 +1,128 @@
+import os
+import sys
+from dataclasses import asdict
+from typing import Optional, List
+
+# Imports only torch and whisper (lazily), so the root scripts can use it as
+# backend.api.services.model_snapshot without the backend's settings
+
+# Next to whisper's own checkpoint cache
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "whisper", "snapshots")
+
+# Bumped when the layout of a snapshot changes, so old snapshots are rebuilt
+SNAPSHOT_FORMAT = 1
+
+
+def snapshot_path(snapshot_dir: str, model_size: str) -> str:
+    return os.path.join(snapshot_dir, f"whisper-{model_size}-v{SNAPSHOT_FORMAT}.pt")
+
+
+def save_snapshot(model, path: str):
+    """
+    Save a loaded Whisper model as a snapshot that `load_snapshot` can memory-map.
+
+    Weights are stored in FP32, the dtype they run in on CPU, so loading needs
+    no conversion. The snapshot is written to a temporary file and renamed, so
+    processes loading concurrently never see a partial file.
+    """
+    import torch
+
+    state_dict = {name: tensor.detach().float().cpu() for name, tensor in model.state_dict().items()}
+    # Non-persistent buffers (attention mask, alignment heads) are not in the state dict
+    buffers = {name: buffer.cpu() for name, buffer in model.named_buffers() if name not in state_dict}
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    torch.save({
+        "dims": asdict(model.dims),
+        "state_dict": state_dict,
+        "buffers": {name: buffer.to_dense() if buffer.is_sparse else buffer for name, buffer in buffers.items()},
+        "sparse_buffers": [name for name, buffer in buffers.items() if buffer.is_sparse],
+    }, temp_path)
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path: str, device: str = "cpu"):
+    """
+    Load a Whisper model from a snapshot without copying its weights.
+
+    The file is memory-mapped and the model is built on the meta device, then
+    its parameters are pointed at the mapped tensors. Weights are paged in on
+    first use, and processes loading the same snapshot share those pages
+    through the page cache.
+    """
+    import torch
+    import whisper
+
+    checkpoint = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+    dims = whisper.model.ModelDimensions(**checkpoint["dims"])
+    try:
+        with torch.device("meta"):
+            model = whisper.model.Whisper(dims)
+    except (NotImplementedError, RuntimeError):
+        # Older torch builds can't create every buffer on the meta device
+        model = whisper.model.Whisper(dims)
+    model.load_state_dict(checkpoint["state_dict"], assign=True)
+
+    for name, tensor in checkpoint["buffers"].items():
+        module_name, _, buffer_name = name.rpartition(".")
+        if name in checkpoint["sparse_buffers"]:
+            tensor = tensor.to_sparse()
+        model.get_submodule(module_name).register_buffer(buffer_name, tensor, persistent=False)
+
+    return model.to(device) if device != "cpu" else model
+
+
+def load_whisper_model(model_size: str, device: Optional[str] = None, snapshot_dir: Optional[str] = DEFAULT_SNAPSHOT_DIR):
+    """
+    Load a Whisper model from its snapshot, building the snapshot on first use.
+
+    Args:
+        model_size: Whisper model size
+        device: Device to load the model on. Defaults to CUDA when available.
+        snapshot_dir: Directory of snapshots. None loads the checkpoint with whisper.load_model.
+
+    Returns:
+        The loaded model
+    """
+    import torch
+    import whisper
+
+    if device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+    if not snapshot_dir:
+        return whisper.load_model(model_size, device=device)
+
+    path = snapshot_path(snapshot_dir, model_size)
+    if os.path.exists(path):
+        try:
+            return load_snapshot(path, device)
+        except Exception as e:
+            print(f"Could not load model snapshot {path}, loading the checkpoint instead: {e}")
+
+    model = whisper.load_model(model_size, device="cpu")
+    try:
+        save_snapshot(model, path)
+        print(f"Saved Whisper {model_size} model snapshot to {path}")
+    except OSError as e:
+        print(f"Could not save model snapshot {path}: {e}")
+    return model.to(device) if device != "cpu" else model
+
+
+def build_snapshots(model_sizes: List[str], snapshot_dir: str = DEFAULT_SNAPSHOT_DIR):
+    """Build (or rebuild) the snapshots of the given model sizes, e.g. at deploy time."""
+    import whisper
+
+    for model_size in model_sizes:
+        path = snapshot_path(snapshot_dir, model_size)
+        save_snapshot(whisper.load_model(model_size, device="cpu"), path)
+        print(f"Saved Whisper {model_size} model snapshot to {path} ({os.path.getsize(path) / (1024 * 1024):.0f} MB)")
+
+
+if __name__ == "__main__":
+    # python -m api.services.model_snapshot <model_size> [<model_size> ...]
+    if len(sys.argv) < 2:
+        print("Usage: python -m api.services.model_snapshot <model_size> [<model_size> ...]")
+        print("Snapshots are written to MODEL_SNAPSHOT_DIR (default: ~/.cache/whisper/snapshots)")
+        sys.exit(1)
+    build_snapshots(sys.argv[1:], os.getenv("MODEL_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
@@ -0,0 +1,212 @@
+import json
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, AsyncGenerator
+
+import redis
+
+from api.db.database import get_redis_client, get_async_redis_client
+from api.services.job_scheduler import estimate_cost
+
+# Redis keys
+CHANNEL_PREFIX = "stt:progress:"  # Pub/sub channel per transcription id
+LAST_PREFIX = "stt:progress:last:"  # Latest event per transcription id, for subscribers that join late
+RTF_KEY = "stt:progress:rtf"  # Hash: model key -> measured seconds of processing per second of audio
+
+# How long the latest event of a job is kept
+LAST_EVENT_TTL_SECONDS = 24 * 3600
+
+# Weight of the latest job in the moving average of each model's real-time factor
+RTF_SMOOTHING = 0.2
+
+# Stages after which no more events are published
+FINAL_STAGES = ("completed", "failed")
+
+
+def publish(transcription_id: int, event: Dict[str, Any]):
+    """Publish a progress event of a job and keep it as the job's latest. Best effort."""
+    payload = json.dumps(event, default=str)
+    try:
+        pipe = get_redis_client().pipeline()
+        pipe.set(f"{LAST_PREFIX}{transcription_id}", payload, ex=LAST_EVENT_TTL_SECONDS)
+        pipe.publish(f"{CHANNEL_PREFIX}{transcription_id}", payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Could not publish progress of transcription {transcription_id}: {str(e)}")
+
+
+def latest(transcription_id: int) -> Optional[Dict[str, Any]]:
+    """The latest progress event of a job, or None."""
+    try:
+        payload = get_redis_client().get(f"{LAST_PREFIX}{transcription_id}")
+    except redis.RedisError as e:
+        print(f"Could not read progress of transcription {transcription_id}: {str(e)}")
+        return None
+    return json.loads(payload) if payload else None
+
+
+async def subscribe(transcription_id: int, keepalive_seconds: float = 15.0) -> AsyncGenerator[Optional[Dict[str, Any]], None]:
+    """
+    Yield the progress events of a job as they are published, starting with its latest one.
+
+    Yields None every `keepalive_seconds` without events, so that the caller
+    can keep its connection alive. Ends after the job completes or fails.
+    """
+    pubsub = get_async_redis_client().pubsub()
+    await pubsub.subscribe(f"{CHANNEL_PREFIX}{transcription_id}")
+    try:
+        # Subscribed before reading the latest event, so that none is missed in between
+        event = latest(transcription_id)
+        if event:
+            yield event
+            if event["stage"] in FINAL_STAGES:
+                return
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=keepalive_seconds)
+            if message is None:
+                yield None
+                continue
+            event = json.loads(message["data"])
+            yield event
+            if event["stage"] in FINAL_STAGES:
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.close()
+
+
+def measured_rtf(model_size: str) -> Optional[float]:
+    try:
+        rtf = get_redis_client().hget(RTF_KEY, model_size)
+    except redis.RedisError:
+        return None
+    return float(rtf) if rtf else None
+
+
+def record_rtf(model_size: str, rtf: float):
+    """Fold a job's measured real-time factor into the model's moving average."""
+    previous = measured_rtf(model_size)
+    if previous is not None:
+        rtf = previous + RTF_SMOOTHING * (rtf - previous)
+    try:
+        get_redis_client().hset(RTF_KEY, model_size, rtf)
+    except redis.RedisError as e:
+        print(f"Could not record the real-time factor of {model_size}: {str(e)}")
+
+
+class ProgressTracker:
+    """
+    Stage-level progress and ETA of one transcription job, published on every change.
+
+    Before transcription starts, the ETA is the audio duration times the
+    model's real-time factor: the moving average measured on earlier jobs,
+    or the scheduler's estimate (settings.JOB_MODEL_RTF). Once chunks
+    complete, the factor measured on this job so far is used instead.
+    Progress is the elapsed share of elapsed plus remaining time.
+    """
+
+    def __init__(self, transcription_id: int):
+        self.transcription_id = transcription_id
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.model_size: Optional[str] = None
+        self.draft_model_size: Optional[str] = None
+        self.stage_name = "queued"
+        self.stage_started_at = self.started_at
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.audio_done = 0.0
+        self.audio_restored = 0.0
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+
+    def plan(self, duration: float, model_size: str, draft_model_size: Optional[str] = None):
+        self.duration = duration
+        self.model_size = model_size
+        self.draft_model_size = draft_model_size
+
+    def stage(self, name: str, chunks_total: int = 0):
+        """Enter a stage; `chunks_total` for stages that report chunks."""
+        now = time.time()
+        # Audio transcribed in the stage being left; restored chunks took no time
+        processed = self.audio_done or (self.duration or 0.0) - self.audio_restored
+        if self.stage_name in ("transcribe", "draft") and name != "failed" and processed >= 1.0:
+            # Calibrates the ETA of later jobs with the same model
+            model = self.model_size if self.stage_name == "transcribe" else self.draft_model_size
+            record_rtf(model, (now - self.stage_started_at) / processed)
+        self.stage_name = name
+        self.stage_started_at = now
+        self.chunks_total = chunks_total
+        self.chunks_done = 0
+        self.audio_done = 0.0
+        self.audio_restored = 0.0
+        self.publish()
+
+    def chunk_done(self, audio_seconds: float):
+        self.chunks_done += 1
+        self.audio_done += audio_seconds
+        self.publish()
+
+    def chunks_restored(self, count: int, audio_seconds: float):
+        """Count chunks restored from checkpoints as done, without letting them speed up the measured RTF."""
+        self.chunks_done += count
+        self.audio_restored += audio_seconds
+        self.publish()
+
+    def finish(self, error: Optional[str] = None):
+        self.error = error
+        self.stage("failed" if error else "completed")
+
+    def _rtf(self, model_size: str) -> float:
+        rtf = measured_rtf(model_size)
+        if rtf is None:
+            rtf = estimate_cost(1.0, model_size)
+        return rtf
+
+    def eta_seconds(self) -> Optional[float]:
+        if self.stage_name in FINAL_STAGES:
+            return 0.0
+        if self.duration is None or self.model_size is None:
+            return None
+        elapsed = time.time() - self.stage_started_at
+        remaining = 0.0
+        if self.stage_name in ("draft", "transcribe"):
+            model = self.model_size if self.stage_name == "transcribe" else self.draft_model_size
+            audio_left = self.duration - self.audio_restored
+            if self.audio_done > 0:
+                remaining = (audio_left - self.audio_done) * elapsed / self.audio_done
+            else:
+                remaining = max(audio_left * self._rtf(model) - elapsed, 0.0)
+            if self.stage_name == "draft":
+                remaining += self.duration * self._rtf(self.model_size)
+        elif self.stage_name not in ("diarize", "save"):
+            # Stages before transcription
+            remaining = self.duration * self._rtf(self.model_size)
+            if self.draft_model_size:
+                remaining += self.duration * self._rtf(self.draft_model_size)
+        return remaining
+
+    def publish(self):
+        now = time.time()
+        elapsed = now - self.started_at
+        eta = self.eta_seconds()
+        if self.stage_name == "completed":
+            progress = 1.0
+        elif eta is None:
+            progress = 0.0
+        else:
+            progress = min(elapsed / (elapsed + eta), 0.99) if elapsed + eta > 0 else 0.0
+        event = {
+            "transcription_id": self.transcription_id,
+            "stage": self.stage_name,
+            "progress": round(progress, 3),
+            "eta_seconds": None if eta is None else round(eta, 1),
+            "elapsed_seconds": round(elapsed, 1),
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "timings": self.timings,
+            "updated_at": datetime.now().isoformat()
+        }
+        if self.error:
+            event["error"] = self.error
+        publish(self.transcription_id, event)
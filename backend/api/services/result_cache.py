@@ -0,0 +1,146 @@
+import json
+import hashlib
+from typing import Optional, Dict, Any
+
+import redis
+
+from api.db.database import get_redis_client
+from api.core.config import settings
+
+# Redis keys
+ENTRY_PREFIX = "stt:result_cache:entry:"
+DOCUMENT_PREFIX = "stt:result_cache:doc:"
+LANGUAGE_PREFIX = "stt:result_cache:language:"
+STATS_KEY = "stt:result_cache:stats"
+
+# Result fields copied onto a Transcription on a cache hit, with the model that produced the result
+RESULT_FIELDS = (
+    "mongo_document_id", "word_count", "confidence_score", "has_speaker_diarization", "speaker_count",
+    "model_size", "model_decision"
+)
+
+
+def new_audio_hasher():
+    """Return a hasher to feed the upload bytes to while they are streamed to disk."""
+    return hashlib.sha256()
+
+
+def vocabulary_digest(custom_vocabulary) -> str:
+    """Digest of a CustomVocabulary's terms, so that editing the terms invalidates cached results."""
+    if custom_vocabulary is None or not custom_vocabulary.terms:
+        return "none"
+    return hashlib.sha256(custom_vocabulary.terms.encode("utf-8")).hexdigest()[:16]
+
+
+def diarization_option(use_diarization: bool, num_speakers: Optional[int] = None) -> str:
+    """Cache key component for the speaker diarization options."""
+    if not use_diarization:
+        return "nodiar"
+    return f"diar{num_speakers or 'auto'}"
+
+
+def _entry_key(audio_hash: str, language_code: str, vocab_digest: str, diarization: str) -> str:
+    return f"{ENTRY_PREFIX}{audio_hash}:{language_code or 'auto'}:{vocab_digest}:{diarization}"
+
+
+def lookup(audio_hash: str, language_code: str, vocab_digest: str, diarization: str, choose_model_size) -> Optional[Dict[str, Any]]:
+    """
+    Look up a cached result for the same audio, language, vocabulary and diarization options.
+
+    The cache entry remembers the audio duration, so the model size the job
+    would run with can be chosen without decoding the upload.
+
+    Args:
+        audio_hash: SHA-256 of the uploaded bytes
+        language_code: Requested language code
+        vocab_digest: Digest from `vocabulary_digest`
+        diarization: Option string from `diarization_option`
+        choose_model_size: Function mapping a duration in seconds to a model size
+
+    Returns:
+        The cached result fields plus `duration_seconds` and `model_size`, or None
+    """
+    redis_client = get_redis_client()
+    try:
+        entry = redis_client.hgetall(_entry_key(audio_hash, language_code, vocab_digest, diarization))
+        result = None
+        if entry and "duration" in entry:
+            duration = float(entry["duration"])
+            model_size = choose_model_size(duration)
+            if model_size in entry:
+                result = json.loads(entry[model_size])
+                result["duration_seconds"] = duration
+                result["model_size"] = model_size
+        redis_client.hincrby(STATS_KEY, "hits" if result else "misses", 1)
+        return result
+    except redis.RedisError as e:
+        print(f"Result cache lookup failed: {str(e)}")
+        return None
+
+
+def store(audio_hash: str, language_code: str, vocab_digest: str, diarization: str, model_size: str,
+          duration: float, transcription):
+    """Cache the result of a completed transcription."""
+    key = _entry_key(audio_hash, language_code, vocab_digest, diarization)
+    value = json.dumps({field: getattr(transcription, field) for field in RESULT_FIELDS})
+    try:
+        pipe = get_redis_client().pipeline()
+        pipe.hset(key, mapping={"duration": duration, model_size: value})
+        pipe.expire(key, settings.RESULT_CACHE_TTL_SECONDS)
+        # Reverse index so deleting the Mongo document can evict the entry
+        pipe.set(f"{DOCUMENT_PREFIX}{transcription.mongo_document_id}", f"{key}|{model_size}",
+                 ex=settings.RESULT_CACHE_TTL_SECONDS)
+        pipe.hincrby(STATS_KEY, "stores", 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Result cache store failed: {str(e)}")
+
+
+def lookup_language(audio_hash: str) -> Optional[Dict[str, Any]]:
+    """Return the cached language-ID report for the audio, or None."""
+    try:
+        report = get_redis_client().get(f"{LANGUAGE_PREFIX}{audio_hash}")
+        return json.loads(report) if report else None
+    except redis.RedisError as e:
+        print(f"Language cache lookup failed: {str(e)}")
+        return None
+
+
+def store_language(audio_hash: str, report: Dict[str, Any]):
+    """Cache the language-ID report for the audio, whatever the requested model or options."""
+    try:
+        get_redis_client().set(f"{LANGUAGE_PREFIX}{audio_hash}", json.dumps(report), ex=settings.RESULT_CACHE_TTL_SECONDS)
+    except redis.RedisError as e:
+        print(f"Language cache store failed: {str(e)}")
+
+
+def evict_document(mongo_document_id: str):
+    """Evict the cache entry pointing at a result document that is being deleted."""
+    redis_client = get_redis_client()
+    try:
+        reference = redis_client.get(f"{DOCUMENT_PREFIX}{mongo_document_id}")
+        if not reference:
+            return
+        key, model_size = reference.rsplit("|", 1)
+        pipe = redis_client.pipeline()
+        pipe.hdel(key, model_size)
+        pipe.delete(f"{DOCUMENT_PREFIX}{mongo_document_id}")
+        pipe.hincrby(STATS_KEY, "evictions", 1)
+        pipe.execute()
+    except redis.RedisError as e:
+        print(f"Result cache eviction failed: {str(e)}")
+
+
+def get_stats() -> Dict[str, Any]:
+    try:
+        counters = {name: int(value) for name, value in get_redis_client().hgetall(STATS_KEY).items()}
+    except redis.RedisError as e:
+        return {"error": str(e)}
+    lookups = counters.get("hits", 0) + counters.get("misses", 0)
+    return {
+        "hits": counters.get("hits", 0),
+        "misses": counters.get("misses", 0),
+        "stores": counters.get("stores", 0),
+        "evictions": counters.get("evictions", 0),
+        "hit_rate": counters.get("hits", 0) / lookups if lookups else 0.0
+    }
@@ -0,0 +1,147 @@
+import base64
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+import pymongo
+from bson import ObjectId
+
+from api.core.config import settings
+
+
+def ensure_indexes(mongo_db):
+    """Create the indexes of the transcription_segments collection. Safe to call at every startup."""
+    # Bucket lookups by time range: equality on the result and revision, then the bucket's span
+    mongo_db.transcription_segments.create_index(
+        [
+            ("result_id", pymongo.ASCENDING),
+            ("revision", pymongo.ASCENDING),
+            ("start_time", pymongo.ASCENDING),
+            ("end_time", pymongo.ASCENDING)
+        ],
+        unique=True
+    )
+
+
+def bucket_segments(segments: List[Dict[str, Any]], bucket_seconds: float) -> List[List[Dict[str, Any]]]:
+    """Group time-ordered segments into buckets of `bucket_seconds` by their start time."""
+    buckets: Dict[int, List[Dict[str, Any]]] = {}
+    for segment in segments:
+        buckets.setdefault(int(segment["start_time"] // bucket_seconds), []).append(segment)
+    return [buckets[index] for index in sorted(buckets)]
+
+
+def store_segments(mongo_db, result_id: ObjectId, segments: List[Dict[str, Any]]) -> Optional[ObjectId]:
+    """
+    Store the segments of a result document in fixed-size time buckets.
+
+    The segments are written as a new revision, with a single bulk insert,
+    and only become visible once the result document points at it (its
+    `segments_revision`), so that a result can be replaced in place without
+    readers ever seeing a partial set. Remove the superseded revisions with
+    `drop_old_revisions` afterwards.
+
+    Returns:
+        The revision to store on the result document, or None if there are no segments
+    """
+    if not segments:
+        return None
+    revision = ObjectId()
+    documents = []
+    for bucket in bucket_segments(segments, settings.SEGMENT_BUCKET_SECONDS):
+        documents.append({
+            "result_id": result_id,
+            "revision": revision,
+            "start_time": bucket[0]["start_time"],
+            # Segments can run past the bucket; range reads compare against the latest end
+            "end_time": max(segment["end_time"] for segment in bucket),
+            "count": len(bucket),
+            "segments": bucket
+        })
+    mongo_db.transcription_segments.insert_many(documents)
+    return revision
+
+
+def encode_cursor(after: Tuple[float, int]) -> str:
+    start_time, seen = after
+    return base64.urlsafe_b64encode(f"{start_time!r}:{seen}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    """The position encoded by `encode_cursor`. Raises ValueError for a malformed cursor."""
+    try:
+        start_time, seen = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(start_time), int(seen)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def read_segments(mongo_db, result: Dict[str, Any], start: Optional[float] = None,
+                  end: Optional[float] = None, after: Optional[Tuple[float, int]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the segments of a result document in time order, bucket by bucket.
+
+    With `start` and/or `end`, only the buckets and segments overlapping
+    [start, end) are read. `after` is a pagination position (see `page`):
+    segments starting before its start time, and the first `seen` starting
+    at it, are skipped. Results stored before segments were bucketed keep
+    them inline.
+    """
+    if "segments_revision" not in result:
+        segments = result.get("segments") or []
+    else:
+        if result["segments_revision"] is None:
+            return
+        query: Dict[str, Any] = {"result_id": result["_id"], "revision": result["segments_revision"]}
+        if end is not None:
+            query["start_time"] = {"$lt": end}
+        if start is not None:
+            query["end_time"] = {"$gt": start}
+        if after is not None:
+            query.setdefault("end_time", {})["$gte"] = after[0]
+        segments = (
+            segment
+            for bucket in mongo_db.transcription_segments.find(query).sort("start_time", pymongo.ASCENDING)
+            for segment in bucket["segments"]
+        )
+    skipped = 0
+    for segment in segments:
+        if start is not None and segment["end_time"] <= start:
+            continue
+        if end is not None and segment["start_time"] >= end:
+            continue
+        if after is not None:
+            if segment["start_time"] < after[0]:
+                continue
+            if segment["start_time"] == after[0] and skipped < after[1]:
+                skipped += 1
+                continue
+        yield segment
+
+
+def page(segments: Iterator[Dict[str, Any]], limit: int,
+         after: Optional[Tuple[float, int]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Take up to `limit` segments from `read_segments(..., after=after)`.
+
+    Returns:
+        The segments and the cursor of the next page, or None on the last page
+    """
+    taken = []
+    for segment in segments:
+        if len(taken) == limit:
+            # Position: the last start time, and how many segments starting at it were returned
+            last_start = taken[-1]["start_time"]
+            seen = sum(1 for s in taken if s["start_time"] == last_start)
+            if after is not None and after[0] == last_start:
+                seen += after[1]
+            return taken, encode_cursor((last_start, seen))
+        taken.append(segment)
+    return taken, None
+
+
+def drop_old_revisions(mongo_db, result_id: ObjectId, revision: Optional[ObjectId]):
+    """Delete the segment buckets of a result document other than its current revision."""
+    mongo_db.transcription_segments.delete_many({"result_id": result_id, "revision": {"$ne": revision}})
+
+
+def delete_segments(mongo_db, result_id: ObjectId):
+    mongo_db.transcription_segments.delete_many({"result_id": result_id})
@@ -0,0 +1,55 @@
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Any
+
+import numpy as np
+
+from api.core.config import settings
+
+
+def create_shared_audio(audio: np.ndarray) -> Dict[str, Any]:
+    """
+    Write decoded audio to a file in settings.SHARED_AUDIO_DIR that other processes can map.
+
+    The file is memory-mapped rather than put in POSIX shared memory: /dev/shm
+    is only 64 MB in a default Docker container, less than 20 minutes of
+    float32 audio. The mapped pages still come from the shared page cache,
+    so every process reads the same copy.
+
+    Returns:
+        A picklable handle for `open_shared_audio` and `release_shared_audio`
+    """
+    audio = np.ascontiguousarray(audio, dtype=np.float32)
+    os.makedirs(settings.SHARED_AUDIO_DIR, exist_ok=True)
+    path = os.path.join(settings.SHARED_AUDIO_DIR, f"{uuid.uuid4().hex}.f32")
+    if len(audio):
+        mapped = np.memmap(path, dtype=np.float32, mode="w+", shape=audio.shape)
+        mapped[:] = audio
+        mapped.flush()
+        del mapped
+    else:
+        # np.memmap can't map an empty file
+        open(path, "wb").close()
+    return {"path": path, "samples": int(len(audio))}
+
+
+@contextmanager
+def open_shared_audio(handle: Dict[str, Any]):
+    """Map shared audio into this process without copying it."""
+    if not handle["samples"]:
+        yield np.zeros(0, dtype=np.float32)
+        return
+    audio = np.memmap(handle["path"], dtype=np.float32, mode="r", shape=(handle["samples"],))
+    try:
+        yield audio
+    finally:
+        del audio
+
+
+def release_shared_audio(handle: Dict[str, Any]):
+    """Free shared audio once every stage using it has finished."""
+    try:
+        os.remove(handle["path"])
+    except FileNotFoundError:
+        pass
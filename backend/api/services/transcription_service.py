@@ -2,34 +2,347 @@ import os
 import json
 import time
 import asyncio
+import functools
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Optional, Dict, Any, AsyncGenerator, List
+from typing import Optional, Dict, Any, AsyncGenerator, Awaitable, Callable, List
 from sqlalchemy.orm import Session
 from fastapi import WebSocket
-import numpy as np
-import librosa
 from bson.objectid import ObjectId
 
-# Import the Whisper service for speech recognition
-from api.services.whisper_service import transcribe_audio, transcribe_with_diarization
+# Speech recognition runs in the inference worker processes. Modules that
+# import the audio and ML stack (numpy, scipy, librosa, torch, whisper) are
+# imported where they are first used, so the API starts without them.
+from api.services.inference_pool import get_inference_pool, PoolSaturatedError
+from api.services import result_cache, usage
+from api.services.model_policy import (
+    resolve_model_key, english_variant, multilingual_variant, with_language, get_model_policy, PolicyInput
+)
+from api.services.vocabulary import vocabulary_reference
+from api.services.progress import ProgressTracker
+from api.services.checkpoints import ChunkCheckpoints, checkpoint_variant, clear_checkpoints
+from api.services import segment_store
+from api.services.job_executor import JobQueueFullError, get_job_executor
+from api.services.job_queue import get_job_backend
 
 from api.db.database import SessionLocal, get_mongo_db
 from api.models.transcription import Transcription, CustomVocabulary
 from api.core.config import settings
 
+class RetryableTranscriptionError(Exception):
+    """
+    Raised by process_transcription, after marking the transcription failed,
+    for failures a later attempt may not hit (e.g. an inference worker
+    crashed), so that the job queue retries the job.
+    """
+
+
+def is_input_error(error: Exception) -> bool:
+    """Return True if a job failed because of its audio file, which no retry fixes."""
+    # Errors of worker tasks arrive as InferenceTaskError("<type>: <message>")
+    return type(error).__name__ == "AudioDecodeError" or str(error).startswith("AudioDecodeError")
+
+def is_auto_language(language_code: Optional[str]) -> bool:
+    """Return True if the language should be identified from the audio."""
+    return not language_code or language_code.lower() == "auto"
+
+async def identify_language(
+    decoded: Dict[str, Any],
+    audio_hash: Optional[str],
+    model_size: str
+) -> Optional[Dict[str, Any]]:
+    """
+    Identify the spoken language with the fast language-ID pass, cached per audio hash.
+    
+    Args:
+        decoded: Decoded audio from the decode_shared worker task
+        audio_hash: SHA-256 of the uploaded bytes, if known
+        model_size: Model of the main decode, which decides when the fast pass is not confident
+    
+    Returns:
+        Language-ID report, or None if identification failed and Whisper should detect the language itself
+    """
+    if audio_hash:
+        report = result_cache.lookup_language(audio_hash)
+        if report:
+            return {**report, "cached": True}
+    
+    try:
+        report = await get_inference_pool().submit(
+            "identify_language",
+            bounded=False,
+            shared_audio=decoded["shared_audio"],
+            fallback_model_size=model_size,
+            speech_regions=decoded["speech_regions"]
+        )
+    except Exception as e:
+        print(f"Language identification failed: {str(e)}")
+        return None
+    
+    if audio_hash and report["language"]:
+        result_cache.store_language(audio_hash, report)
+    return report
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str):
+    """Add the wall time spent in the block to timings[stage]."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+async def run_timed(awaitable: Awaitable[Any], timings: Dict[str, float], stage: str) -> Any:
+    with timed(timings, stage):
+        return await awaitable
+
+async def transcribe_decoded(
+    decoded: Dict[str, Any],
+    language_code: str,
+    model_size: str,
+    timings: Dict[str, float],
+    custom_vocabulary: Optional[Dict[str, Any]] = None,
+    use_diarization: bool = False,
+    num_speakers: Optional[int] = None,
+    draft_model_size: Optional[str] = None,
+    on_draft: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    progress: Optional[ProgressTracker] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe audio decoded by the decode_shared worker task.
+    
+    Every pass reads the same shared buffer and speech regions, so the file
+    is decoded and VAD'd only once. Diarization runs alongside transcription.
+    
+    With `draft_model_size`, the audio is first transcribed quickly with the
+    draft model and `on_draft` is called with that result before the refined pass.
+    
+    Returns:
+        The result of the selected model
+    """
+    from api.services.diarization import align_speakers
+    
+    inference_pool = get_inference_pool()
+    
+    def transcribe(model: str):
+        return inference_pool.submit(
+            "transcribe_shared",
+            bounded=False,
+            shared_audio=decoded["shared_audio"],
+            language_code=language_code,
+            model_size=model,
+            custom_vocabulary=custom_vocabulary,
+            speech_regions=decoded["speech_regions"]
+        )
+    
+    diarizing = None
+    if use_diarization:
+        diarizing = asyncio.ensure_future(run_timed(inference_pool.submit(
+            "diarize_shared",
+            bounded=False,
+            shared_audio=decoded["shared_audio"],
+            num_speakers=num_speakers,
+            speech_regions=decoded["speech_regions"]
+        ), timings, "diarize"))
+    
+    try:
+        if draft_model_size and on_draft:
+            if progress:
+                progress.stage("draft")
+            await on_draft(await run_timed(transcribe(draft_model_size), timings, "draft"))
+        if progress:
+            progress.stage("transcribe")
+        result = await run_timed(transcribe(model_size), timings, "transcribe")
+        if diarizing is not None:
+            if progress and not diarizing.done():
+                progress.stage("diarize")
+            result["segments"] = align_speakers(result["segments"], (await diarizing)["turns"])
+    finally:
+        # The caller releases the shared audio, which diarization may still be reading
+        if diarizing is not None and not diarizing.done():
+            await asyncio.wait([diarizing])
+    
+    result["vad"] = decoded["vad"]
+    return result
+
+async def transcribe_chunks(
+    decoded: Dict[str, Any],
+    chunks: List[Dict[str, int]],
+    language_code: str,
+    model_size: str,
+    custom_vocabulary: Optional[Dict[str, Any]] = None,
+    progress: Optional[ProgressTracker] = None,
+    transcription_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe the chunks of a long-form plan in parallel and stitch them together.
+    
+    With `transcription_id`, each chunk's result is checkpointed as it
+    completes, and chunks checkpointed by an interrupted earlier run are
+    not transcribed again. Reports each completed chunk to `progress`.
+    """
+    from api.services.long_form import stitch_chunk_results
+    from api.services.audio_decoder import SAMPLE_RATE
+    
+    inference_pool = get_inference_pool()
+    
+    checkpoints = None
+    restored: Dict[int, Dict[str, Any]] = {}
+    if transcription_id is not None:
+        checkpoints = ChunkCheckpoints(
+            get_mongo_db(),
+            transcription_id,
+            checkpoint_variant(model_size, language_code, custom_vocabulary)
+        )
+        restored = await asyncio.to_thread(checkpoints.load, chunks)
+        if restored:
+            print(f"Resuming transcription {transcription_id} with {len(restored)}/{len(chunks)} chunks from checkpoints")
+            if progress:
+                progress.chunks_restored(len(restored), sum(
+                    (chunk["own_end"] - chunk["own_start"]) / SAMPLE_RATE
+                    for chunk in chunks if chunk["index"] in restored
+                ))
+    
+    async def transcribe_chunk(chunk: Dict[str, int]) -> Dict[str, Any]:
+        if chunk["index"] in restored:
+            return restored[chunk["index"]]
+        chunk_result = await inference_pool.submit(
+            "transcribe_chunk",
+            bounded=False,
+            shared_audio=decoded["shared_audio"],
+            chunk=chunk,
+            language_code=language_code,
+            model_size=model_size,
+            custom_vocabulary=custom_vocabulary,
+            speech_regions=decoded["speech_regions"]
+        )
+        if checkpoints:
+            await asyncio.to_thread(checkpoints.save, chunk, chunk_result)
+        if progress:
+            progress.chunk_done((chunk["own_end"] - chunk["own_start"]) / SAMPLE_RATE)
+        return chunk_result
+    
+    chunk_results = await asyncio.gather(*(transcribe_chunk(chunk) for chunk in chunks))
+    
+    result = stitch_chunk_results(chunk_results)
+    result["language"] = result["language"] or language_code
+    result["vad"] = decoded["vad"]
+    if custom_vocabulary:
+        corrections: Dict[str, int] = {}
+        for chunk_result in chunk_results:
+            for term, count in chunk_result["vocabulary"]["corrections"].items():
+                corrections[term] = corrections.get(term, 0) + count
+        result["vocabulary"] = {"id": custom_vocabulary["id"], "corrections": corrections}
+    return result
+
+async def transcribe_long_form(
+    decoded: Dict[str, Any],
+    language_code: str,
+    model_size: str,
+    timings: Dict[str, float],
+    custom_vocabulary: Optional[Dict[str, Any]] = None,
+    use_diarization: bool = False,
+    num_speakers: Optional[int] = None,
+    draft_model_size: Optional[str] = None,
+    on_draft: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+    progress: Optional[ProgressTracker] = None,
+    transcription_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe long decoded audio as overlapping chunks in parallel across inference workers.
+    
+    The audio is split into chunks at quiet points; the chunks are then
+    transcribed concurrently and stitched back together. Diarization of the
+    same shared audio runs alongside the chunks. With `transcription_id`,
+    chunk results are checkpointed so that a rerun resumes where this one stopped.
+    
+    With `draft_model_size`, the chunks are first transcribed with the draft
+    model and `on_draft` is called with that result before the refined pass.
+    """
+    from api.services.diarization import align_speakers
+    
+    inference_pool = get_inference_pool()
+    chunks = await run_timed(inference_pool.submit(
+        "plan_long_form",
+        bounded=False,
+        shared_audio=decoded["shared_audio"],
+        chunk_seconds=settings.LONG_FORM_CHUNK_SECONDS,
+        overlap_seconds=settings.LONG_FORM_OVERLAP_SECONDS,
+        search_seconds=settings.LONG_FORM_SEARCH_SECONDS
+    ), timings, "plan")
+    print(f"Transcribing {decoded['duration']:.0f}s of audio as {len(chunks)} chunks")
+    
+    if draft_model_size and on_draft:
+        if progress:
+            progress.stage("draft", chunks_total=len(chunks))
+        await on_draft(await run_timed(
+            transcribe_chunks(decoded, chunks, language_code, draft_model_size, custom_vocabulary, progress, transcription_id),
+            timings, "draft"
+        ))
+    
+    async def transcribe_and_report() -> Dict[str, Any]:
+        result = await transcribe_chunks(decoded, chunks, language_code, model_size, custom_vocabulary, progress, transcription_id)
+        if progress and use_diarization and not stages[-1].done():
+            progress.stage("diarize")
+        return result
+    
+    if progress:
+        progress.stage("transcribe", chunks_total=len(chunks))
+    stages = [asyncio.ensure_future(run_timed(transcribe_and_report(), timings, "transcribe"))]
+    if use_diarization:
+        stages.append(asyncio.ensure_future(run_timed(inference_pool.submit(
+            "diarize_shared",
+            bounded=False,
+            shared_audio=decoded["shared_audio"],
+            num_speakers=num_speakers,
+            speech_regions=decoded["speech_regions"]
+        ), timings, "diarize")))
+    # Wait for every stage before raising, as the caller then releases the shared audio
+    stage_results = await asyncio.gather(*stages, return_exceptions=True)
+    for stage_result in stage_results:
+        if isinstance(stage_result, BaseException):
+            raise stage_result
+    
+    result = stage_results[0]
+    if use_diarization:
+        result["segments"] = align_speakers(result["segments"], stage_results[-1]["turns"])
+    
+    return result
+
 async def process_transcription(
     transcription_id: int,
     file_path: str,
     language_code: str,
-    custom_vocabulary_id: Optional[int] = None
+    custom_vocabulary_id: Optional[int] = None,
+    use_diarization: bool = False,
+    num_speakers: Optional[int] = None,
+    quantized: Optional[bool] = None,
+    draft: Optional[bool] = None,
+    deadline_seconds: Optional[float] = None
 ):
     """
     Process an audio file and generate a transcription.
     This is a background task that updates the transcription record in the database.
+    
+    With `draft` (by default for files of at least settings.DRAFT_MIN_SECONDS),
+    a quick draft from settings.DRAFT_MODEL is stored first and readable while
+    the selected model refines it.
+    
+    The model is chosen by the model policy (settings.MODEL_POLICY) from the
+    audio, the user's tier, the load and the job's deadline (`deadline_seconds`
+    after upload, by default the tier's); the decision is recorded on the
+    transcription and in the result.
+    
+    Stage progress and the ETA are published through api.services.progress.
+    
+    Failures are recorded on the transcription. Those a retry may fix are
+    then raised as RetryableTranscriptionError, for the job queue to retry
+    the job with backoff; failures of the audio file itself are not.
     """
     # Create a new database session
     db = SessionLocal()
     mongo_db = get_mongo_db()
+    progress = ProgressTracker(transcription_id)
     
     try:
         # Get the transcription record
@@ -39,6 +352,11 @@ async def process_transcription(
             print(f"Transcription {transcription_id} not found")
             return
         
+        # A queued job can be delivered again after it completed, e.g. if its worker died before acknowledging it
+        if transcription.status == "completed":
+            print(f"Transcription {transcription_id} is already completed")
+            return
+        
         # Update status to processing
         transcription.status = "processing"
         transcription.processing_started_at = datetime.now()
@@ -51,65 +369,180 @@ async def process_transcription(
                 CustomVocabulary.id == custom_vocabulary_id
             ).first()
         
-        # Load audio file and get duration
+        # Stage wall times of this job, stored with the result
+        timings: Dict[str, float] = {}
+        progress.timings = timings
+        progress.stage("decode")
+        
+        # Get the duration from the container metadata instead of decoding the file
         try:
-            y, sr = librosa.load(file_path, sr=None)
-            duration = librosa.get_duration(y=y, sr=sr)
-            transcription.duration_seconds = duration
-            db.commit()
+            from api.services.audio_decoder import probe_duration
+            from api.services.shared_audio import release_shared_audio
+            with timed(timings, "probe"):
+                duration = await asyncio.to_thread(probe_duration, file_path)
         except Exception as e:
             transcription.status = "failed"
             transcription.error_message = f"Failed to load audio file: {str(e)}"
             db.commit()
+            progress.finish(transcription.error_message)
             return
+        # Saved with the next commit
+        if duration is not None:
+            transcription.duration_seconds = duration
         
-        # Get custom vocabulary terms if provided
-        custom_vocabulary_terms = []
-        if custom_vocabulary:
-            try:
-                vocab_terms = json.loads(custom_vocabulary.terms)
-                custom_vocabulary_terms = list(vocab_terms.keys())
-            except json.JSONDecodeError:
-                print(f"Error parsing custom vocabulary terms: {custom_vocabulary.terms}")
+        # Workers compile the vocabulary once per version of its terms and keep it cached
+        vocabulary = vocabulary_reference(custom_vocabulary, result_cache.vocabulary_digest(custom_vocabulary))
         
-        # Determine if we should use speaker diarization
-        use_diarization = True  # You can make this configurable
+        try:
+            # Decode the file once; every later stage reads this buffer from shared memory.
+            # The job was admitted when it was created, so don't bound it again here.
+            inference_pool = get_inference_pool()
+            decoded = await inference_pool.submit("decode_shared", bounded=False, file_path=file_path)
+            timings.update(decoded["timings"])
+        except Exception as e:
+            print(f"Error decoding audio: {str(e)}")
+            transcription.status = "failed"
+            transcription.error_message = f"Failed to load audio file: {str(e)}"
+            db.commit()
+            progress.finish(transcription.error_message)
+            if not is_input_error(e):
+                raise RetryableTranscriptionError(transcription.error_message) from e
+            return
         
         try:
-            # Choose model size based on audio duration
-            model_size = "base"  # Default
-            if duration > 600:  # 10+ minutes
-                model_size = "small"
-            elif duration > 1800:  # 30+ minutes
-                model_size = "medium"
+            # Files without a duration in their metadata are measured once decoded
+            if duration is None:
+                duration = decoded["duration"]
+                transcription.duration_seconds = duration
             
-            # Process the audio with Whisper
-            if use_diarization:
-                transcription_result = transcribe_with_diarization(
-                    file_path=file_path,
-                    language_code=language_code,
-                    model_size=model_size
-                )
+            # Choose the model; a resumed job keeps its decision so that its chunk checkpoints match
+            resumed = bool(transcription.model_decision)
+            if resumed:
+                model_decision = json.loads(transcription.model_decision)
             else:
-                transcription_result = transcribe_audio(
-                    file_path=file_path,
+                created_at = transcription.created_at.timestamp() if transcription.created_at else time.time()
+                model_decision = get_model_policy().choose(PolicyInput(
+                    duration,
                     language_code=language_code,
-                    model_size=model_size,
-                    custom_vocabulary=custom_vocabulary_terms if custom_vocabulary_terms else None
-                )
+                    tier=transcription.user.subscription_tier,
+                    quantized=quantized,
+                    queued_seconds=max(time.time() - created_at, 0.0),
+                    queue_depth=get_job_backend().depth(),
+                    deadline_seconds=deadline_seconds
+                )).to_dict()
+            
+            # Identify the language once up front instead of in every decoding window,
+            # falling back to Whisper's own detection with the multilingual variant of the chosen model
+            decode_language = language_code
+            language_report = None
+            if is_auto_language(language_code):
+                progress.stage("language_id")
+                with timed(timings, "language_id"):
+                    language_report = await identify_language(
+                        decoded, transcription.audio_sha256, multilingual_variant(model_decision["model_size"])
+                    )
+                if language_report and language_report["language"]:
+                    decode_language = language_report["language"]
+            
+            if not resumed:
+                model_decision = with_language(model_decision, decode_language)
+                transcription.model_size = model_decision["model_size"]
+                transcription.model_decision = json.dumps(model_decision)
+                db.commit()
+            model_size = model_decision["model_size"]
+            print(f"Transcription {transcription_id} uses {model_size}: " + "; ".join(model_decision["reasons"]))
+            progress.plan(duration, model_size)
+            
+            # Draft with a much faster model first, unless it is the selected model.
+            # A resumed job whose draft was already stored goes straight to refining it.
+            draft_model_size = None
+            draft_document_id = ObjectId(transcription.mongo_document_id) if transcription.mongo_document_id else None
+            if (draft if draft is not None else duration >= settings.DRAFT_MIN_SECONDS) and draft_document_id is None:
+                draft_model_size = resolve_model_key(english_variant(settings.DRAFT_MODEL, decode_language), quantized)
+                if draft_model_size == model_size:
+                    draft_model_size = None
+            progress.plan(duration, model_size, draft_model_size)
+            
+            async def store_draft(draft_result: Dict[str, Any]):
+                nonlocal draft_document_id
+                try:
+                    document_id = ObjectId()
+                    draft_document_id = mongo_db.transcription_results.insert_one({
+                        "_id": document_id,
+                        "text": draft_result["text"],
+                        "segments_revision": segment_store.store_segments(mongo_db, document_id, draft_result["segments"]),
+                        "segment_count": len(draft_result["segments"]),
+                        "language": draft_result.get("language"),
+                        "draft": True,
+                        "model_size": draft_model_size,
+                        "created_at": datetime.now()
+                    }).inserted_id
+                    transcription.mongo_document_id = str(draft_document_id)
+                    transcription.word_count = len(draft_result["text"].split())
+                    transcription.confidence_score = draft_result["confidence"]
+                    db.commit()
+                    print(f"Stored {draft_model_size} draft of transcription {transcription_id}")
+                except Exception as e:
+                    print(f"Could not store draft of transcription {transcription_id}: {str(e)}")
+            
+            # Process the audio with Whisper in the inference workers; long audio is checkpointed per chunk
+            if duration > settings.LONG_FORM_MIN_SECONDS:
+                transcribe = functools.partial(transcribe_long_form, transcription_id=transcription_id)
+            else:
+                transcribe = transcribe_decoded
+            transcription_result = await transcribe(
+                decoded=decoded,
+                language_code=decode_language,
+                model_size=model_size,
+                timings=timings,
+                custom_vocabulary=vocabulary,
+                use_diarization=use_diarization,
+                num_speakers=num_speakers,
+                draft_model_size=draft_model_size,
+                on_draft=store_draft,
+                progress=progress
+            )
         except Exception as e:
             print(f"Error during transcription: {str(e)}")
             transcription.status = "failed"
             transcription.error_message = f"Transcription failed: {str(e)}"
             db.commit()
+            progress.finish(transcription.error_message)
+            if not is_input_error(e):
+                raise RetryableTranscriptionError(transcription.error_message) from e
             return
+        finally:
+            release_shared_audio(decoded["shared_audio"])
+        
+        print(f"Transcription {transcription_id} stage timings: " + ", ".join(
+            f"{stage} {seconds:.2f}s" for stage, seconds in timings.items()
+        ))
         
-        # Store the transcription result in MongoDB
-        result_id = mongo_db.transcription_results.insert_one({
+        progress.stage("save")
+        
+        # Store the transcription result in MongoDB, replacing the draft in
+        # place so that readers of the draft never find the document missing.
+        # Segments go to time buckets, so long transcripts stay clear of the
+        # document size limit and can be read by time range.
+        result_id = draft_document_id or ObjectId()
+        segments_revision = segment_store.store_segments(mongo_db, result_id, transcription_result["segments"])
+        document = {
             "text": transcription_result["text"],
-            "segments": transcription_result["segments"],
+            "segments_revision": segments_revision,
+            "segment_count": len(transcription_result["segments"]),
+            "vad": transcription_result.get("vad"),
+            "language": transcription_result.get("language"),
+            "language_id": language_report,
+            "model": model_decision,
+            "vocabulary": transcription_result.get("vocabulary"),
+            "timings": timings,
             "created_at": datetime.now()
-        }).inserted_id
+        }
+        if draft_document_id:
+            mongo_db.transcription_results.replace_one({"_id": draft_document_id}, document)
+            segment_store.drop_old_revisions(mongo_db, result_id, segments_revision)
+        else:
+            mongo_db.transcription_results.insert_one({"_id": result_id, **document})
         
         # Update the transcription record
         transcription.status = "completed"
@@ -117,30 +550,96 @@ async def process_transcription(
         transcription.mongo_document_id = str(result_id)
         transcription.word_count = len(transcription_result["text"].split())
         transcription.confidence_score = transcription_result["confidence"]
-        transcription.has_speaker_diarization = True if transcription_result["segments"] else False
-        transcription.speaker_count = len(set(segment["speaker_id"] for segment in transcription_result["segments"])) if transcription_result["segments"] else 0
-        
-        # Update user's usage statistics
-        user = transcription.user
-        user.total_transcription_seconds += transcription.duration_seconds
-        user.total_transcription_count += 1
+        transcription.has_speaker_diarization = use_diarization
+        transcription.speaker_count = len(set(segment["speaker_id"] for segment in transcription_result["segments"])) if use_diarization else 0
         
         db.commit()
         
+        # The job is committed as completed; a failure below must not mark it
+        # failed or have it transcribed again, so each step only logs errors
+        try:
+            # Counted once the job is committed as completed, so a redelivered job isn't counted twice
+            usage.record(transcription.user_id, transcription.duration_seconds)
+        except Exception as e:
+            print(f"Could not record the usage of transcription {transcription_id}: {str(e)}")
+        try:
+            clear_checkpoints(mongo_db, transcription_id)
+        except Exception as e:
+            print(f"Could not clear the checkpoints of transcription {transcription_id}: {str(e)}")
+        
+        # Let later uploads of the same audio reuse this result
+        if transcription.audio_sha256:
+            try:
+                result_cache.store(
+                    transcription.audio_sha256,
+                    language_code,
+                    result_cache.vocabulary_digest(custom_vocabulary),
+                    result_cache.diarization_option(use_diarization, num_speakers),
+                    model_size,
+                    duration,
+                    transcription
+                )
+            except Exception as e:
+                print(f"Could not cache the result of transcription {transcription_id}: {str(e)}")
+        
+        progress.finish()
+        
+    except RetryableTranscriptionError:
+        # Already recorded
+        raise
     except Exception as e:
-        # Handle any exceptions
+        # Handle any exceptions, e.g. the databases being unreachable
         try:
             transcription.status = "failed"
             transcription.error_message = str(e)
             db.commit()
         except:
             pass
+        progress.finish(str(e))
         print(f"Error processing transcription {transcription_id}: {str(e)}")
+        raise RetryableTranscriptionError(str(e)) from e
     
     finally:
         # Close the database session
         db.close()
 
+def resume_interrupted_jobs() -> int:
+    """
+    Resubmit to the local job executor the transcriptions that were pending or
+    processing when the API stopped; long ones continue from their chunk checkpoints.
+    
+    Must be called from the event loop, e.g. at API startup.
+    
+    Returns:
+        The number of resubmitted jobs
+    """
+    db = SessionLocal()
+    try:
+        interrupted = db.query(Transcription).filter(
+            Transcription.status.in_(("pending", "processing")),
+            Transcription.job_options.isnot(None)
+        ).order_by(Transcription.id).all()
+        
+        job_executor = get_job_executor()
+        resumed = 0
+        for transcription in interrupted:
+            job = {"transcription_id": transcription.id, **json.loads(transcription.job_options)}
+            try:
+                job_executor.submit(
+                    transcription.id,
+                    functools.partial(process_transcription, **job),
+                    transcription.file_size_bytes or 0,
+                    user_id=transcription.user_id,
+                    tier=transcription.user.subscription_tier
+                )
+            except JobQueueFullError:
+                print(f"Job queue is full, leaving {len(interrupted) - resumed} interrupted transcriptions")
+                break
+            resumed += 1
+        return resumed
+    finally:
+        db.close()
+
 async def process_real_time_audio(websocket: WebSocket, language_code: str) -> AsyncGenerator[Dict[str, Any], None]:
     """
     Process audio in real-time from a WebSocket connection.
@@ -148,7 +647,8 @@ async def process_real_time_audio(websocket: WebSocket, language_code: str) -> A
     """
     buffer = []
     audio_data = bytearray()
-    model_size = "tiny"  # Use the smallest model for real-time processing
+    model_size = resolve_model_key("tiny")  # Use the smallest model for real-time processing
+    inference_pool = get_inference_pool()
     
     try:
         # Create a temporary file for storing audio chunks
@@ -182,7 +682,8 @@ async def process_real_time_audio(websocket: WebSocket, language_code: str) -> A
                 
                 try:
                     # Process with Whisper
-                    result = transcribe_audio(
+                    result = await inference_pool.submit(
+                        "transcribe_audio",
                         file_path=temp_file_path,
                         language_code=language_code,
                         model_size=model_size
@@ -197,6 +698,9 @@ async def process_real_time_audio(websocket: WebSocket, language_code: str) -> A
                         "is_final": False,
                         "confidence": result["confidence"]
                     }
+                except PoolSaturatedError as e:
+                    # Skip this update; the next buffer includes the same audio
+                    yield {"error": str(e), "retryable": True}
                 except Exception as e:
                     print(f"Error in real-time transcription: {str(e)}")
                     yield {"error": str(e)}
@@ -212,7 +716,9 @@ async def process_real_time_audio(websocket: WebSocket, language_code: str) -> A
             
             try:
                 # Process with Whisper
-                result = transcribe_audio(
+                result = await inference_pool.submit(
+                    "transcribe_audio",
+                    bounded=False,
                     file_path=temp_file_path,
                     language_code=language_code,
                     model_size=model_size
@@ -0,0 +1,246 @@
+import uuid
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Tuple, List, Any, Optional
+
+import redis
+from sqlalchemy import update, delete, bindparam, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from api.core.config import settings
+from api.db.database import get_redis_client, SessionLocal
+from api.models.user import User
+from api.models.usage import UsageDaily, UsageFlushBatch
+
+# Redis keys
+PENDING_KEY = "stt:usage:pending"  # Hash: "user_id|day|counter" -> increment not yet in Postgres
+FLUSHING_KEY = "stt:usage:flushing"  # The batch being written to Postgres; kept until it is
+FLUSH_BATCH_KEY = "stt:usage:flushing_batch"  # Id of the batch in FLUSHING_KEY
+FLUSH_LOCK_KEY = "stt:usage:flush_lock"
+
+# A flush that takes longer than this loses its lock to the next flusher
+FLUSH_LOCK_SECONDS = 60
+
+# Applied batch ids are kept this long; a batch is only retried while it is still in Redis
+FLUSH_BATCH_RETENTION = timedelta(days=7)
+
+# Counters kept per user and day. "billed" sums each job's seconds rounded to
+# an integer, as users.total_transcription_seconds (an Integer column) stores them.
+COUNTERS = ("seconds", "count", "billed")
+
+
+def _field(user_id: int, day: date, counter: str) -> str:
+    return f"{user_id}|{day.isoformat()}|{counter}"
+
+
+def record(user_id: int, seconds: float, day: Optional[date] = None):
+    """
+    Count one completed transcription of `seconds` of audio towards a user's usage.
+
+    The increments are accumulated atomically in Redis and written to
+    Postgres in batches by `flush`, instead of updating the users row once
+    per job. If Redis is unavailable they are written to Postgres right away.
+    """
+    day = day or date.today()
+    try:
+        pipe = get_redis_client().pipeline()
+        pipe.hincrbyfloat(PENDING_KEY, _field(user_id, day, "seconds"), seconds)
+        pipe.hincrby(PENDING_KEY, _field(user_id, day, "count"), 1)
+        pipe.hincrby(PENDING_KEY, _field(user_id, day, "billed"), round(seconds))
+        pipe.execute()
+        return
+    except redis.RedisError as e:
+        print(f"Could not buffer the usage of user {user_id}, writing it directly: {str(e)}")
+    db = SessionLocal()
+    try:
+        apply_usage(db, {(user_id, day): {"seconds": seconds, "count": 1, "billed": round(seconds)}})
+        db.commit()
+    finally:
+        db.close()
+
+
+def apply_usage(db: Session, deltas: Dict[Tuple[int, date], Dict[str, float]]):
+    """
+    Add usage increments to the users' totals and to the daily rollup, in the session's transaction.
+
+    Each table gets one executemany statement that adds the increments in
+    the database (`SET x = x + :delta`), so concurrent writers never lose
+    each other's updates.
+    """
+    if not deltas:
+        return
+    per_user: Dict[int, Dict[str, float]] = {}
+    for (user_id, _), counters in deltas.items():
+        totals = per_user.setdefault(user_id, {"count": 0, "billed": 0})
+        totals["count"] += counters.get("count", 0)
+        totals["billed"] += counters.get("billed", 0)
+
+    users = User.__table__
+    db.execute(
+        update(users)
+        .where(users.c.id == bindparam("b_user_id"))
+        .values(
+            total_transcription_seconds=func.coalesce(users.c.total_transcription_seconds, 0) + bindparam("b_billed"),
+            total_transcription_count=func.coalesce(users.c.total_transcription_count, 0) + bindparam("b_count")
+        ),
+        [
+            {"b_user_id": user_id, "b_billed": int(totals["billed"]), "b_count": int(totals["count"])}
+            for user_id, totals in per_user.items()
+        ]
+    )
+
+    rollup = UsageDaily.__table__
+    statement = insert(rollup)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["user_id", "day"],
+            set_={
+                "transcription_seconds": rollup.c.transcription_seconds + statement.excluded.transcription_seconds,
+                "transcription_count": rollup.c.transcription_count + statement.excluded.transcription_count
+            }
+        ),
+        [
+            {
+                "user_id": user_id,
+                "day": day,
+                "transcription_seconds": float(counters.get("seconds", 0.0)),
+                "transcription_count": int(counters.get("count", 0))
+            }
+            for (user_id, day), counters in deltas.items()
+        ]
+    )
+
+
+def _parse(fields: Dict[str, str]) -> Dict[Tuple[int, date], Dict[str, float]]:
+    deltas: Dict[Tuple[int, date], Dict[str, float]] = {}
+    for field, value in fields.items():
+        user_id, day, counter = field.split("|")
+        deltas.setdefault((int(user_id), date.fromisoformat(day)), {})[counter] = float(value)
+    return deltas
+
+
+def flush() -> int:
+    """
+    Write the buffered usage to Postgres in one transaction. Returns the number of (user, day) rows written.
+
+    The buffer is renamed atomically before it is read, so increments
+    recorded meanwhile go to a new buffer. A batch whose transaction fails
+    stays in Redis and is retried by the next flush. Each batch has an id,
+    recorded in usage_flush_batches in the same transaction as the usage, so
+    a batch that was committed but not removed from Redis (or written by a
+    flusher whose lock expired) is skipped instead of being counted twice.
+    """
+    redis_client = get_redis_client()
+    token = uuid.uuid4().hex
+    try:
+        if not redis_client.set(FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_SECONDS):
+            return 0
+    except redis.RedisError as e:
+        print(f"Could not flush usage: {str(e)}")
+        return 0
+    try:
+        # A batch left over from a failed flush goes first
+        if not redis_client.exists(FLUSHING_KEY):
+            if not redis_client.exists(PENDING_KEY):
+                return 0
+            pipe = redis_client.pipeline()
+            pipe.rename(PENDING_KEY, FLUSHING_KEY)
+            pipe.set(FLUSH_BATCH_KEY, uuid.uuid4().hex)
+            pipe.execute()
+        batch_id = redis_client.get(FLUSH_BATCH_KEY)
+        if batch_id is None:
+            # Left over from before batches had ids
+            batch_id = uuid.uuid4().hex
+            redis_client.set(FLUSH_BATCH_KEY, batch_id)
+        deltas = _parse(redis_client.hgetall(FLUSHING_KEY))
+        db = SessionLocal()
+        try:
+            already_applied = db.execute(
+                insert(UsageFlushBatch.__table__)
+                .values(batch_id=batch_id)
+                .on_conflict_do_nothing(index_elements=["batch_id"])
+            ).rowcount == 0
+            if already_applied:
+                print(f"Usage batch {batch_id} was already written, dropping it")
+            else:
+                apply_usage(db, deltas)
+            db.execute(
+                delete(UsageFlushBatch.__table__)
+                .where(UsageFlushBatch.applied_at < datetime.now(timezone.utc) - FLUSH_BATCH_RETENTION)
+            )
+            if not _renew_lock(redis_client, token):
+                # Another flusher took over; it skips this batch if we had committed it
+                print("Lost the usage flush lock, leaving the batch to the next flush")
+                db.rollback()
+                return 0
+            db.commit()
+        finally:
+            db.close()
+        pipe = redis_client.pipeline()
+        pipe.delete(FLUSHING_KEY, FLUSH_BATCH_KEY)
+        pipe.execute()
+        return 0 if already_applied else len(deltas)
+    except redis.RedisError as e:
+        print(f"Could not flush usage: {str(e)}")
+        return 0
+    except SQLAlchemyError as e:
+        print(f"Could not write usage to the database, will retry: {str(e)}")
+        return 0
+    finally:
+        try:
+            if redis_client.get(FLUSH_LOCK_KEY) == token:
+                redis_client.delete(FLUSH_LOCK_KEY)
+        except redis.RedisError:
+            pass
+
+
+def _renew_lock(redis_client, token: str) -> bool:
+    """Extend the flush lock if it is still ours. Returns False if it expired and was taken."""
+    with redis_client.pipeline() as pipe:
+        try:
+            pipe.watch(FLUSH_LOCK_KEY)
+            if pipe.get(FLUSH_LOCK_KEY) != token:
+                return False
+            pipe.multi()
+            pipe.expire(FLUSH_LOCK_KEY, FLUSH_LOCK_SECONDS)
+            pipe.execute()
+            return True
+        except redis.WatchError:
+            return False
+
+
+async def run_flusher(interval: Optional[float] = None):
+    """Flush the buffered usage every `interval` seconds (settings.USAGE_FLUSH_INTERVAL_SECONDS) until cancelled."""
+    interval = interval or settings.USAGE_FLUSH_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(flush)
+
+
+def pending_usage(user_id: int) -> Dict[str, float]:
+    """A user's usage recorded but not yet flushed to Postgres."""
+    pending = {counter: 0.0 for counter in COUNTERS}
+    try:
+        redis_client = get_redis_client()
+        for key in (PENDING_KEY, FLUSHING_KEY):
+            for field, value in redis_client.hscan_iter(key, match=f"{user_id}|*"):
+                counter = field.rsplit("|", 1)[1]
+                pending[counter] = pending.get(counter, 0) + float(value)
+    except redis.RedisError as e:
+        print(f"Could not read the pending usage of user {user_id}: {str(e)}")
+    return pending
+
+
+def daily_usage(db: Session, user_id: int, days: int) -> List[Dict[str, Any]]:
+    """A user's usage per day over the last `days` days, from the rollup, oldest first."""
+    since = date.today() - timedelta(days=days - 1)
+    rows = db.query(UsageDaily).filter(
+        UsageDaily.user_id == user_id,
+        UsageDaily.day >= since
+    ).order_by(UsageDaily.day).all()
+    return [
+        {"day": row.day, "transcription_seconds": row.transcription_seconds, "transcription_count": row.transcription_count}
+        for row in rows
+    ]
@@ -0,0 +1,136 @@
+from typing import Dict, Any, Tuple
+
+import numpy as np
+
+FRAME_MS = 30
+
+# Frames this far below the loud (95th percentile) level always count as
+# speech-level, so recordings with almost no silence are not skipped entirely
+SPEECH_DYNAMIC_RANGE_DB = 30.0
+
+# Silence inserted between packed speech regions so words are not glued together
+PACK_GAP_MS = 300
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """Return [start, end) index pairs of the True runs in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.stack((np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)), axis=1)
+
+
+def detect_speech(
+    audio: np.ndarray,
+    sample_rate: int = 16000,
+    threshold_db: float = 12.0,
+    min_energy_db: float = -55.0,
+    min_speech_ms: int = 250,
+    min_silence_ms: int = 500,
+    pad_ms: int = 200
+) -> np.ndarray:
+    """
+    Find speech regions with an adaptive frame-energy detector.
+
+    A frame is speech when its energy is `threshold_db` above the recording's
+    noise floor (10th percentile of frame energy), or within
+    SPEECH_DYNAMIC_RANGE_DB of its loud level, and above `min_energy_db`.
+    Pauses shorter than `min_silence_ms` are bridged, bursts shorter than
+    `min_speech_ms` are dropped and each region is padded by `pad_ms`.
+
+    Args:
+        audio: Mono float32 audio
+        sample_rate: Sample rate of `audio`
+
+    Returns:
+        Array of shape (n, 2) with [start, end) sample indices of speech regions
+    """
+    frame = sample_rate * FRAME_MS // 1000
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    energy_db = 10.0 * np.log10(np.einsum("ij,ij->i", frames, frames) / frame + 1e-10)
+
+    noise_floor, loud_level = np.percentile(energy_db, [10, 95])
+    threshold = min(noise_floor + threshold_db, loud_level - SPEECH_DYNAMIC_RANGE_DB)
+    speech = energy_db > max(threshold, min_energy_db)
+
+    # Bridge short pauses
+    runs = _runs(~speech)
+    short = (runs[:, 1] - runs[:, 0]) * FRAME_MS < min_silence_ms
+    inner = (runs[:, 0] > 0) & (runs[:, 1] < n_frames)
+    bridged = runs[short & inner]
+    fill = np.zeros(n_frames + 1, dtype=np.int64)
+    np.add.at(fill, bridged[:, 0], 1)
+    np.add.at(fill, bridged[:, 1], -1)
+    speech |= np.cumsum(fill[:-1]) > 0
+
+    # Drop short bursts
+    runs = _runs(speech)
+    runs = runs[(runs[:, 1] - runs[:, 0]) * FRAME_MS >= min_speech_ms]
+    if len(runs) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Pad, convert to samples and merge regions that now overlap
+    pad = sample_rate * pad_ms // 1000
+    regions = runs * frame
+    regions[:, 0] = np.maximum(regions[:, 0] - pad, 0)
+    regions[:, 1] = np.minimum(regions[:, 1] + pad, len(audio))
+    first = np.flatnonzero(np.concatenate(([True], regions[1:, 0] > regions[:-1, 1])))
+    ends = np.maximum.reduceat(regions[:, 1], first)
+    return np.stack((regions[first, 0], ends), axis=1).astype(np.int64)
+
+
+class SpeechMap:
+    """Maps times in packed (speech-only) audio back to times in the original audio."""
+
+    def __init__(self, regions: np.ndarray, sample_rate: int, gap_samples: int):
+        lengths = regions[:, 1] - regions[:, 0]
+        self.sample_rate = sample_rate
+        self.original_starts = regions[:, 0] / sample_rate
+        self.lengths = lengths / sample_rate
+        self.packed_starts = (np.concatenate(([0], np.cumsum(lengths + gap_samples)[:-1])) / sample_rate
+                              if len(regions) else np.empty(0))
+
+    def to_original(self, times) -> np.ndarray:
+        """Convert packed-audio times in seconds to original-audio times."""
+        times = np.asarray(times, dtype=np.float64)
+        if len(self.packed_starts) == 0:
+            return times
+        index = np.clip(np.searchsorted(self.packed_starts, times, side="right") - 1, 0, None)
+        # Times inside an inserted gap snap to the end of the preceding region
+        offset = np.clip(times - self.packed_starts[index], 0, self.lengths[index])
+        return self.original_starts[index] + offset
+
+
+def pack_speech(audio: np.ndarray, regions: np.ndarray, sample_rate: int = 16000) -> Tuple[np.ndarray, SpeechMap]:
+    """
+    Concatenate the speech regions of `audio`, separated by short silences.
+
+    Returns:
+        The packed audio and a SpeechMap for converting its timestamps back
+    """
+    gap = sample_rate * PACK_GAP_MS // 1000
+    lengths = regions[:, 1] - regions[:, 0]
+    packed = np.zeros(int(lengths.sum() + gap * max(len(regions) - 1, 0)), dtype=np.float32)
+
+    position = 0
+    for (start, end), length in zip(regions, lengths):
+        packed[position:position + length] = audio[start:end]
+        position += length + gap
+
+    return packed, SpeechMap(regions, sample_rate, gap)
+
+
+def summarize(audio: np.ndarray, regions: np.ndarray, sample_rate: int = 16000) -> Dict[str, Any]:
+    """Per-job report of how much audio the VAD skipped."""
+    audio_seconds = len(audio) / sample_rate
+    speech_seconds = float((regions[:, 1] - regions[:, 0]).sum()) / sample_rate if len(regions) else 0.0
+    skipped = audio_seconds - speech_seconds
+    return {
+        "audio_seconds": audio_seconds,
+        "speech_seconds": speech_seconds,
+        "skipped_seconds": skipped,
+        "skipped_ratio": skipped / audio_seconds if audio_seconds else 0.0,
+        "regions": int(len(regions))
+    }
@@ -0,0 +1,274 @@
+import re
+import json
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, Any, List, Optional, Tuple
+
+# Soundex consonant classes; vowels, h, w and y carry no code
+_PHONETIC_CODES = {
+    letter: code
+    for code, letters in (("1", "bfpv"), ("2", "cgjkqsxz"), ("3", "dt"), ("4", "l"), ("5", "mn"), ("6", "r"))
+    for letter in letters
+}
+
+_WORD = re.compile(r"[A-Za-z0-9']+")
+
+# Terms are matched over at most this many transcript words
+MAX_TERM_WORDS = 6
+
+# Keys shorter than this collide with too many ordinary words, so they only match exactly
+MIN_FUZZY_KEY_LENGTH = 3
+
+# Spelling comparisons remembered per compiled vocabulary; transcripts repeat the same words
+SIMILARITY_CACHE_SIZE = 100000
+
+# Characters of the decoding prompt; Whisper keeps at most 223 prompt tokens
+PROMPT_MAX_CHARS = 600
+
+
+def phonetic_key(word: str) -> str:
+    """
+    Soundex-style key of a word without truncation, e.g. "Kubernetes" and "kuberneties" -> "216532".
+    """
+    codes = []
+    previous = None
+    for char in word.lower():
+        code = char if char.isdigit() else _PHONETIC_CODES.get(char)
+        if code and code != previous:
+            codes.append(code)
+        # As in Soundex, h and w don't separate letters with the same code
+        if char not in "hw":
+            previous = code
+    return "".join(codes)
+
+
+def _letters(text: str) -> str:
+    return "".join(char for char in text.lower() if char.isalnum())
+
+
+def parse_terms(terms_json: str) -> Dict[str, List[str]]:
+    """
+    Parse CustomVocabulary.terms into {term: [sounds-like aliases]}.
+
+    Accepts a list of terms, or an object mapping each term to an alias or a
+    list of aliases. Other values (stored before they were validated, see
+    `validate_terms`) count as no aliases.
+    """
+    parsed = json.loads(terms_json) if terms_json else {}
+    if isinstance(parsed, list):
+        return {str(term): [] for term in parsed if term}
+    terms = {}
+    for term, aliases in parsed.items():
+        if isinstance(aliases, str):
+            aliases = [aliases]
+        elif not isinstance(aliases, list):
+            aliases = []
+        terms[str(term)] = [str(alias) for alias in aliases if alias]
+    return terms
+
+
+def validate_terms(terms_json: str):
+    """
+    Check the shape of CustomVocabulary.terms before it is stored.
+
+    Raises:
+        ValueError: If the terms are not valid JSON, a list of strings, or an
+            object mapping each term to a string or a list of strings
+    """
+    parsed = json.loads(terms_json)
+    if isinstance(parsed, list):
+        if not all(isinstance(term, str) for term in parsed):
+            raise ValueError("Terms must be strings")
+    elif isinstance(parsed, dict):
+        for term, aliases in parsed.items():
+            is_list = isinstance(aliases, list) and all(isinstance(alias, str) for alias in aliases)
+            if not (isinstance(aliases, str) or is_list):
+                raise ValueError(f"The aliases of {term!r} must be a string or a list of strings")
+    else:
+        raise ValueError("Terms must be a list of terms or an object mapping terms to aliases")
+
+
+class CompiledVocabulary:
+    """
+    A custom vocabulary compiled for decoding and post-correction.
+
+    `prompt` biases Whisper towards the terms' spelling. `correct` replaces
+    near-misses of the terms in a transcript in one pass over its words, by
+    walking a trie of the terms' phonetic keys (so cost does not grow with the
+    number of terms) and confirming candidates by spelling similarity.
+    """
+
+    def __init__(self, terms: Dict[str, List[str]], min_similarity: float = 0.8):
+        self.terms = list(terms)
+        self.min_similarity = min_similarity
+        self.prompt = self._build_prompt(self.terms)
+        self._similarity: Dict[Tuple[str, str], bool] = {}
+
+        # Trie over the characters of phonetic keys; "$" holds (spelling, term) of keys ending at a node
+        self._trie: Dict[str, Any] = {}
+        for term, aliases in terms.items():
+            for variant in [term] + aliases:
+                words = _WORD.findall(variant)
+                if not words or len(words) > MAX_TERM_WORDS:
+                    continue
+                key = "".join(phonetic_key(word) for word in words)
+                node = self._trie
+                for char in key:
+                    node = node.setdefault(char, {})
+                node.setdefault("$", []).append((_letters(variant), term, len(key) >= MIN_FUZZY_KEY_LENGTH))
+
+    @staticmethod
+    def _build_prompt(terms: List[str]) -> Optional[str]:
+        selected = []
+        length = 0
+        for term in terms:
+            length += len(term) + 2
+            if length > PROMPT_MAX_CHARS:
+                break
+            selected.append(term)
+        return ", ".join(selected) + "." if selected else None
+
+    def correct(self, text: str, counts: Optional[Dict[str, int]] = None) -> str:
+        """
+        Replace near-miss spellings of vocabulary terms in `text`.
+
+        Args:
+            text: Transcript text
+            counts: Updated with the number of corrections per term
+
+        Returns:
+            The corrected text
+        """
+        if not self._trie or not text:
+            return text
+
+        words = [(m.start(), m.end(), m.group()) for m in _WORD.finditer(text)]
+        keys = [phonetic_key(word) for _, _, word in words]
+
+        pieces = []
+        position = 0
+        i = 0
+        while i < len(words):
+            match = self._longest_match(words, keys, i)
+            if match is None:
+                i += 1
+                continue
+            last, term = match
+            start, end = words[i][0], words[last][1]
+            if text[start:end] != term:
+                pieces.append(text[position:start])
+                pieces.append(term)
+                position = end
+                if counts is not None:
+                    counts[term] = counts.get(term, 0) + 1
+            i = last + 1
+
+        pieces.append(text[position:])
+        return "".join(pieces)
+
+    def _longest_match(self, words, keys, first: int) -> Optional[Tuple[int, str]]:
+        # Don't start a match on a word without consonants ("a", "you")
+        if not keys[first]:
+            return None
+
+        node = self._trie
+        spelling = ""
+        best = None
+        exact_only = False
+        for j in range(first, min(len(words), first + MAX_TERM_WORDS)):
+            # A word without consonants doesn't move in the trie, so a fuzzy
+            # match would swallow it ("Kubernetes a lot"); only an exact
+            # multi-word variant may span it
+            if not keys[j]:
+                exact_only = True
+            for char in keys[j]:
+                node = node.get(char)
+                if node is None:
+                    return best
+            spelling += _letters(words[j][2])
+            for variant, term, fuzzy in node.get("$", ()):
+                if variant == spelling or (fuzzy and not exact_only and self._similar(spelling, variant)):
+                    best = (j, term)
+                    break
+        return best
+
+    def _similar(self, spelling: str, variant: str) -> bool:
+        similar = self._similarity.get((spelling, variant))
+        if similar is None:
+            if len(self._similarity) >= SIMILARITY_CACHE_SIZE:
+                self._similarity.clear()
+            similar = self._similarity[(spelling, variant)] = self._compare(spelling, variant, self.min_similarity)
+        return similar
+
+    @staticmethod
+    def _compare(spelling: str, variant: str, min_similarity: float) -> bool:
+        # Same first letter, as in Soundex; aliases cover terms heard with another one
+        if spelling[0] != variant[0]:
+            return False
+        matcher = SequenceMatcher(None, spelling, variant, autojunk=False)
+        # The cheap upper bounds reject most candidates before the full comparison
+        return (
+            matcher.real_quick_ratio() >= min_similarity
+            and matcher.quick_ratio() >= min_similarity
+            and matcher.ratio() >= min_similarity
+        )
+
+    def correct_segments(self, segments: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Correct the text of each segment in place and return the corrections per term."""
+        counts: Dict[str, int] = {}
+        for segment in segments:
+            segment["text"] = self.correct(segment["text"], counts)
+        return counts
+
+
+class VocabularyCache:
+    """Compiled vocabularies keyed by (vocabulary id, version), least recently used evicted first."""
+
+    def __init__(self, max_entries: int = 64, min_similarity: float = 0.8):
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[Any, str], CompiledVocabulary]" = OrderedDict()
+        self._counters = {"hits": 0, "compiles": 0}
+
+    def get(self, reference: Dict[str, Any]) -> CompiledVocabulary:
+        """
+        Return the compiled form of a vocabulary reference from `vocabulary_reference`.
+
+        An edited vocabulary has a new version, so it is compiled again.
+        """
+        key = (reference["id"], reference["version"])
+        with self._lock:
+            if key in self._entries:
+                self._counters["hits"] += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        compiled = CompiledVocabulary(parse_terms(reference["terms"]), self.min_similarity)
+
+        with self._lock:
+            self._counters["compiles"] += 1
+            self._entries[key] = compiled
+            # Drop older versions of the same vocabulary right away
+            for stale in [k for k in self._entries if k[0] == key[0] and k != key]:
+                del self._entries[stale]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._counters, "entries": len(self._entries)}
+
+
+def vocabulary_reference(custom_vocabulary, version: str) -> Optional[Dict[str, Any]]:
+    """
+    What a job sends to the inference worker for a CustomVocabulary.
+
+    The terms are passed unparsed; workers only parse and compile them when
+    (id, version) is not in their cache.
+    """
+    if custom_vocabulary is None or not custom_vocabulary.terms:
+        return None
+    return {"id": custom_vocabulary.id, "version": version, "terms": custom_vocabulary.terms}
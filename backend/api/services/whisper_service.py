@@ -1,77 +1,173 @@
 import os
-import tempfile
 import subprocess
 import json
+import time
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
 import torch
 import numpy as np
-import librosa
 import whisper
-from pydub import AudioSegment
+
+from api.core.config import settings
+from api.services.audio_decoder import decode_audio, SAMPLE_RATE
+from api.services.model_registry import ModelRegistry, split_model_key
+from api.services.model_snapshot import load_whisper_model
+from api.services.batch_engine import BatchInferenceEngine, transcribe_batched
+from api.services import vad
+from api.services import diarization
+from api.services import language_id
+from api.services.vocabulary import VocabularyCache
+from api.services.shared_audio import create_shared_audio, open_shared_audio
+from api.services.long_form import find_cut_points, plan_chunks
 
 # Check if CUDA is available
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
 
-# Load Whisper models - we'll use a dictionary to cache models
-whisper_models = {}
+def quantize_int8(model):
+    """
+    Convert the Linear layers of a Whisper model to dynamic int8 quantization.
+    
+    Weights are stored as int8 and activations are quantized per call, which
+    cuts the model's memory and speeds up its matrix multiplications on CPU.
+    The token embedding (also used for the output logits) stays FP32.
+    
+    Args:
+        model: FP32 Whisper model, converted in place
+    
+    Returns:
+        The quantized model
+    """
+    if DEVICE != "cpu":
+        print("int8 quantization is only supported on CPU, keeping FP32 weights")
+        return model
+    
+    # whisper's Linear subclass is not recognized by quantize_dynamic, so swap
+    # in plain torch Linear layers sharing the same weights first
+    for module in list(model.modules()):
+        for name, child in module.named_children():
+            if isinstance(child, whisper.model.Linear):
+                linear = torch.nn.Linear(child.in_features, child.out_features, bias=child.bias is not None, device="meta")
+                linear.weight = child.weight
+                linear.bias = child.bias
+                setattr(module, name, linear)
+    
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def create_whisper_model(key: str):
+    """
+    Load a Whisper model for a registry key such as "small" or "small:int8".
+    
+    Models are loaded from memory-mapped snapshots when settings.MODEL_SNAPSHOT_DIR
+    is set, so workers start fast and share the weights' physical pages.
+    """
+    model_size, quantized = split_model_key(key)
+    model = load_whisper_model(model_size, DEVICE, settings.MODEL_SNAPSHOT_DIR or None)
+    if quantized:
+        model = quantize_int8(model)
+    return model
+
+# Loaded Whisper models, evicted least-recently-used first to stay within the memory budget
+model_registry = ModelRegistry(
+    loader=create_whisper_model,
+    budget_bytes=settings.MODEL_MEMORY_BUDGET_MB * 1024 * 1024,
+    pinned=settings.MODEL_PINNED or None
+)
+
+# whisper installs per-call hooks on the model while decoding, so a model
+# instance must only run one decode, batch or language detection at a time
+_model_locks = defaultdict(threading.Lock)
+
+# Batches decoding windows across the jobs running concurrently in this process
+batch_engine = BatchInferenceEngine(
+    use_model=lambda model_size: model_registry.use(model_size),
+    max_batch_size=settings.INFERENCE_BATCH_MAX_SIZE,
+    max_wait_seconds=settings.INFERENCE_BATCH_MAX_WAIT_MS / 1000,
+    lock_model=lambda model_size: _model_locks[model_size]
+)
+
+# Custom vocabularies compiled for decoding prompts and post-correction
+vocabulary_cache = VocabularyCache(
+    max_entries=settings.VOCABULARY_CACHE_SIZE,
+    min_similarity=settings.VOCABULARY_MIN_SIMILARITY
+)
 
 def get_whisper_model(model_size: str = "base"):
     """
     Get or load a Whisper model.
     
     Args:
-        model_size: Size of the model to load. Options: "tiny", "base", "small", "medium", "large"
+        model_size: Size of the model to load. Options: "tiny", "base", "small", "medium", "large",
+            with an ":int8" suffix for the quantized variant
     
     Returns:
-        Loaded Whisper model
+        Loaded Whisper model. It can be evicted while in use; run models with
+        `model_registry.use` instead, which holds them.
+    """
+    return model_registry.get(model_size)
+
+def warm_model(model_size: str) -> Dict[str, Any]:
     """
-    if model_size not in whisper_models:
-        print(f"Loading Whisper {model_size} model...")
-        whisper_models[model_size] = whisper.load_model(model_size, device=DEVICE)
+    Load a model and run it once on a second of silence so the first real
+    request doesn't pay for lazy initialization.
     
-    return whisper_models[model_size]
+    Args:
+        model_size: Size of the model to warm
+    
+    Returns:
+        Model registry statistics
+    """
+    with model_registry.use(model_size) as model, _model_locks[model_size]:
+        model.transcribe(np.zeros(16000, dtype=np.float32), language="en", fp16=False)
+    return model_registry.stats()
+
+def load_model(model_size: str) -> Dict[str, Any]:
+    """Load a model into the registry and return the registry statistics."""
+    model_registry.load(model_size)
+    return model_registry.stats()
+
+def unload_model(model_size: str) -> Dict[str, Any]:
+    """Unload a model from the registry and return the registry statistics."""
+    model_registry.unload(model_size)
+    return model_registry.stats()
 
-def preprocess_audio(file_path: str) -> np.ndarray:
+def get_model_stats() -> Dict[str, Any]:
+    """Return the model registry, batch engine and vocabulary cache statistics of this process."""
+    return {**model_registry.stats(), "batching": batch_engine.stats(), "vocabularies": vocabulary_cache.stats()}
+
+def preprocess_audio(file_path: str, start: Optional[float] = None, duration: Optional[float] = None) -> np.ndarray:
     """
     Preprocess audio file for Whisper model.
     
     Args:
         file_path: Path to the audio file
+        start: Offset in seconds to start from
+        duration: Maximum number of seconds to decode
     
     Returns:
-        Preprocessed audio as numpy array
-    """
-    # Convert audio to WAV format if it's not already
-    file_ext = os.path.splitext(file_path)[1].lower()
-    
-    if file_ext != '.wav':
-        # Create a temporary WAV file
-        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-            temp_wav_path = temp_wav.name
-        
-        # Convert to WAV using pydub
-        audio = AudioSegment.from_file(file_path)
-        audio.export(temp_wav_path, format='wav')
-        
-        # Use the temporary WAV file
-        audio_path = temp_wav_path
-    else:
-        audio_path = file_path
-    
-    # Load audio using librosa
-    audio, sr = librosa.load(audio_path, sr=16000, mono=True)
-    
-    # Clean up temporary file if created
-    if file_ext != '.wav':
-        os.unlink(temp_wav_path)
-    
-    return audio
+        Preprocessed audio as a float32 16 kHz mono numpy array
+    """
+    return decode_audio(file_path, start=start, duration=duration, sample_rate=SAMPLE_RATE)
+
+def detect_speech(audio: np.ndarray) -> np.ndarray:
+    """Run the VAD with the configured thresholds and return speech regions in samples."""
+    return vad.detect_speech(
+        audio,
+        sample_rate=SAMPLE_RATE,
+        threshold_db=settings.VAD_THRESHOLD_DB,
+        min_energy_db=settings.VAD_MIN_ENERGY_DB,
+        min_speech_ms=settings.VAD_MIN_SPEECH_MS,
+        min_silence_ms=settings.VAD_MIN_SILENCE_MS,
+        pad_ms=settings.VAD_PAD_MS
+    )
 
 def transcribe_audio(
     file_path: str, 
     language_code: Optional[str] = None, 
     model_size: str = "base",
-    custom_vocabulary: Optional[List[str]] = None
+    custom_vocabulary: Optional[Dict[str, Any]] = None,
+    use_vad: Optional[bool] = None
 ) -> Dict[str, Any]:
     """
     Transcribe audio file using Whisper.
@@ -80,87 +176,334 @@ def transcribe_audio(
         file_path: Path to the audio file
         language_code: Language code (e.g., "en", "fr", "de")
         model_size: Size of the Whisper model to use
-        custom_vocabulary: List of custom vocabulary terms
+        custom_vocabulary: Custom vocabulary reference from `vocabulary.vocabulary_reference`
+        use_vad: Skip non-speech audio before decoding. Defaults to settings.VAD_ENABLED.
     
     Returns:
         Dictionary containing transcription results
     """
-    # Load the model
-    model = get_whisper_model(model_size)
-    
     # Preprocess audio
     audio = preprocess_audio(file_path)
     
+    return transcribe_array(audio, language_code, model_size, custom_vocabulary, use_vad)
+
+def transcribe_array(
+    audio: np.ndarray,
+    language_code: Optional[str] = None,
+    model_size: str = "base",
+    custom_vocabulary: Optional[Dict[str, Any]] = None,
+    use_vad: Optional[bool] = None,
+    time_offset: float = 0.0,
+    speech_regions: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe decoded 16 kHz mono audio using Whisper.
+    
+    Args:
+        audio: Audio as returned by preprocess_audio
+        language_code: Language code (e.g., "en", "fr", "de")
+        model_size: Size of the Whisper model to use
+        custom_vocabulary: Custom vocabulary reference from `vocabulary.vocabulary_reference`
+        use_vad: Skip non-speech audio before decoding. Defaults to settings.VAD_ENABLED.
+        time_offset: Seconds added to every timestamp, for audio cut from a longer file
+        speech_regions: VAD regions already computed for this audio
+    
+    Returns:
+        Dictionary containing transcription results
+    """
+    # Load the compiled vocabulary
+    vocabulary = vocabulary_cache.get(custom_vocabulary) if custom_vocabulary else None
+    
+    # Only decode speech; timestamps are mapped back to the original audio below
+    speech_map = None
+    vad_report = None
+    if settings.VAD_ENABLED if use_vad is None else use_vad:
+        regions = speech_regions if speech_regions is not None else detect_speech(audio)
+        vad_report = vad.summarize(audio, regions, SAMPLE_RATE)
+        print(
+            f"VAD skipped {vad_report['skipped_seconds']:.1f}s of {vad_report['audio_seconds']:.1f}s "
+            f"({vad_report['skipped_ratio']:.0%}) in {vad_report['regions']} speech regions"
+        )
+        audio, speech_map = vad.pack_speech(audio, regions, SAMPLE_RATE)
+    
     # Prepare transcription options
     options = {}
     
-    # Set language if provided
-    if language_code:
-        # Convert language code format (e.g., "en-US" to "en")
-        language = language_code.split('-')[0]
+    # Set language if provided (e.g., "en-US" becomes "en"; "auto" lets Whisper detect it)
+    language = language_id.normalize_language(language_code)
+    if language:
         options["language"] = language
     
-    # Perform transcription
-    result = model.transcribe(audio, **options)
+    # Prime the decoder with the vocabulary's spelling
+    if vocabulary is not None and vocabulary.prompt:
+        options["initial_prompt"] = vocabulary.prompt
+    
+    # Perform transcription, holding the model so it isn't evicted meanwhile
+    if len(audio) == 0:
+        result = {"text": "", "segments": [], "language": options.get("language")}
+    else:
+        with model_registry.use(model_size) as model:
+            if settings.INFERENCE_BATCHING:
+                result = transcribe_batched(
+                    batch_engine, model, model_size, audio,
+                    language=options.get("language"), initial_prompt=options.get("initial_prompt")
+                )
+            else:
+                with _model_locks[model_size]:
+                    result = model.transcribe(audio, **options)
+    
+    if speech_map is not None and result["segments"]:
+        starts = speech_map.to_original([segment["start"] for segment in result["segments"]])
+        ends = speech_map.to_original([segment["end"] for segment in result["segments"]])
+        for segment, start, end in zip(result["segments"], starts, ends):
+            segment["start"] = float(start)
+            segment["end"] = float(end)
     
     # Extract segments with timing information
     segments = []
     for segment in result["segments"]:
         segments.append({
             "speaker_id": "speaker_1",  # Default single speaker
-            "start_time": segment["start"],
-            "end_time": segment["end"],
+            "start_time": segment["start"] + time_offset,
+            "end_time": segment["end"] + time_offset,
             "text": segment["text"],
             "confidence": float(segment.get("confidence", 0.9))  # Default confidence if not provided
         })
     
+    # Fix near-miss spellings of vocabulary terms the prompt didn't catch. Only
+    # the segments are corrected; the text is rebuilt from them so both agree.
+    text = result["text"]
+    vocabulary_report = None
+    if vocabulary is not None:
+        corrections = vocabulary.correct_segments(segments)
+        text = " ".join(segment["text"].strip() for segment in segments)
+        vocabulary_report = {"id": custom_vocabulary["id"], "corrections": corrections}
+    
     # Prepare the result
     transcription_result = {
-        "text": result["text"],
+        "text": text,
         "segments": segments,
-        "confidence": float(np.mean([segment["confidence"] for segment in segments])),
-        "language": result.get("language", language_code if language_code else "en")
+        "confidence": float(np.mean([segment["confidence"] for segment in segments])) if segments else 0.0,
+        "language": result.get("language") or (language_code if language_code else "en"),
+        "vad": vad_report,
+        "vocabulary": vocabulary_report
     }
     
     return transcription_result
 
+def identify_language(
+    shared_audio: Dict[str, Any],
+    fallback_model_size: Optional[str] = None,
+    speech_regions: Optional[List[List[int]]] = None
+) -> Dict[str, Any]:
+    """
+    Identify the spoken language of audio decoded by `decode_shared` with the
+    language-ID model on a few speech windows.
+    
+    Only the first settings.LANGUAGE_ID_MAX_SECONDS of the audio are looked at.
+    
+    Args:
+        shared_audio: Shared audio handle from `decode_shared`
+        fallback_model_size: Model that decides when the language-ID model is not confident
+        speech_regions: Speech regions from `decode_shared`
+    
+    Returns:
+        Language-ID report, see `language_id.identify_language`
+    """
+    limit = int(settings.LANGUAGE_ID_MAX_SECONDS * SAMPLE_RATE)
+    with open_shared_audio(shared_audio) as audio:
+        audio = np.array(audio[:limit])
+    
+    if speech_regions is not None:
+        regions = clip_speech_regions(speech_regions, 0, len(audio))
+    else:
+        regions = detect_speech(audio)
+    
+    report = language_id.identify_language(
+        audio,
+        regions,
+        model_registry.use,
+        lock_model=lambda model_size: _model_locks[model_size],
+        sample_rate=SAMPLE_RATE,
+        model_size=settings.LANGUAGE_ID_MODEL,
+        fallback_model_size=fallback_model_size,
+        max_windows=settings.LANGUAGE_ID_WINDOWS,
+        min_confidence=settings.LANGUAGE_ID_MIN_CONFIDENCE
+    )
+    print(
+        f"Identified language {report['language']} ({report['confidence']:.0%}) "
+        f"with the {report['model_size']} model on {report['speech_seconds']:.0f}s of speech"
+    )
+    return report
+
 def transcribe_with_diarization(
     file_path: str,
     language_code: Optional[str] = None,
     model_size: str = "base",
-    num_speakers: Optional[int] = None
+    num_speakers: Optional[int] = None,
+    custom_vocabulary: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """
     Transcribe audio with speaker diarization.
-    This requires additional libraries like pyannote.audio for speaker diarization.
     
-    For this implementation, we'll use a simplified approach with a subprocess call
-    to a hypothetical diarization script.
+    Diarization runs on a second thread while Whisper decodes the same
+    buffer, so it adds little to the wall time.
     
     Args:
         file_path: Path to the audio file
         language_code: Language code (e.g., "en", "fr", "de")
         model_size: Size of the Whisper model to use
         num_speakers: Number of speakers (if known)
+        custom_vocabulary: Custom vocabulary reference from `vocabulary.vocabulary_reference`
     
     Returns:
         Dictionary containing transcription results with speaker information
     """
-    # First, get the basic transcription
-    result = transcribe_audio(file_path, language_code, model_size)
+    audio = preprocess_audio(file_path)
+    regions = detect_speech(audio)
     
-    # For now, we'll simulate speaker diarization by alternating speakers
-    # In a real implementation, you would use a proper diarization library
-    segments = result["segments"]
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        speakers = executor.submit(diarization.diarize, audio, regions, SAMPLE_RATE, num_speakers)
+        result = transcribe_array(audio, language_code, model_size, custom_vocabulary, speech_regions=regions)
+        turns = speakers.result()["turns"]
     
-    # Determine number of speakers (default to 2 if not specified)
-    speaker_count = num_speakers if num_speakers is not None else 2
+    result["segments"] = diarization.align_speakers(result["segments"], turns)
     
-    # Assign speakers to segments
-    for i, segment in enumerate(segments):
-        segment["speaker_id"] = f"speaker_{(i % speaker_count) + 1}"
+    return result
+
+def speech_regions_array(speech_regions: List[List[int]]) -> np.ndarray:
+    """Convert speech regions from `decode_shared` back to the VAD's array form."""
+    return np.array(speech_regions, dtype=np.int64).reshape(-1, 2)
+
+def clip_speech_regions(speech_regions: List[List[int]], start: int, end: int) -> np.ndarray:
+    """The speech regions from `decode_shared` within samples [start, end), relative to `start`."""
+    regions = speech_regions_array(speech_regions)
+    regions = regions[(regions[:, 0] < end) & (regions[:, 1] > start)]
+    return np.clip(regions, start, end) - start
+
+def decode_shared(file_path: str) -> Dict[str, Any]:
+    """
+    Decode a file once into shared memory and find its speech, for every
+    later stage of the job: language ID, long-form planning, draft and
+    refined transcription, and diarization.
     
-    # Update the result
-    result["segments"] = segments
+    The caller runs the stages with the *_shared tasks, possibly in several
+    worker processes, and must release the shared audio afterwards.
     
+    Returns:
+        Dictionary with the shared audio handle, duration, speech regions,
+        VAD report and the time spent decoding and in the VAD
+    """
+    started = time.perf_counter()
+    audio = preprocess_audio(file_path)
+    decoded = time.perf_counter()
+    regions = detect_speech(audio)
+    
+    return {
+        "shared_audio": create_shared_audio(audio),
+        "duration": len(audio) / SAMPLE_RATE,
+        # As a list, so the API process can hold the handle without numpy
+        "speech_regions": regions.tolist(),
+        "vad": vad.summarize(audio, regions, SAMPLE_RATE) if settings.VAD_ENABLED else None,
+        "timings": {"decode": decoded - started, "vad": time.perf_counter() - decoded}
+    }
+
+def transcribe_shared(
+    shared_audio: Dict[str, Any],
+    language_code: Optional[str] = None,
+    model_size: str = "base",
+    custom_vocabulary: Optional[Dict[str, Any]] = None,
+    speech_regions: Optional[List[List[int]]] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe audio decoded by `decode_shared`, reusing its speech regions.
+    """
+    with open_shared_audio(shared_audio) as audio:
+        audio = np.array(audio)
+    
+    regions = None if speech_regions is None else speech_regions_array(speech_regions)
+    return transcribe_array(audio, language_code, model_size, custom_vocabulary, speech_regions=regions)
+
+def diarize_shared(
+    shared_audio: Dict[str, Any],
+    num_speakers: Optional[int] = None,
+    speech_regions: Optional[List[List[int]]] = None
+) -> Dict[str, Any]:
+    """
+    Diarize audio decoded by `decode_shared`, concurrently with its transcription.
+    
+    Returns:
+        Speaker turns for `diarization.align_speakers` and the speaker count
+    """
+    with open_shared_audio(shared_audio) as audio:
+        if speech_regions is not None:
+            regions = speech_regions_array(speech_regions)
+        else:
+            regions = detect_speech(audio)
+        return diarization.diarize(audio, regions, SAMPLE_RATE, num_speakers)
+
+def plan_long_form(
+    shared_audio: Dict[str, Any],
+    chunk_seconds: float,
+    overlap_seconds: float,
+    search_seconds: float
+) -> List[Dict[str, int]]:
+    """
+    Split audio decoded by `decode_shared` into chunks at quiet points.
+    
+    The caller transcribes the chunks with `transcribe_chunk`, possibly in
+    several worker processes.
+    
+    Returns:
+        The chunk plan
+    """
+    with open_shared_audio(shared_audio) as audio:
+        cuts = find_cut_points(audio, SAMPLE_RATE, chunk_seconds, search_seconds)
+        return plan_chunks(cuts, int(overlap_seconds * SAMPLE_RATE), len(audio))
+
+def transcribe_chunk(
+    shared_audio: Dict[str, Any],
+    chunk: Dict[str, int],
+    language_code: Optional[str] = None,
+    model_size: str = "base",
+    custom_vocabulary: Optional[Dict[str, Any]] = None,
+    speech_regions: Optional[List[List[int]]] = None
+) -> Dict[str, Any]:
+    """
+    Transcribe one chunk of audio decoded by `decode_shared`, planned by
+    `plan_long_form`, with timestamps in file time. The chunk reuses the
+    file's speech regions from `decode_shared` rather than running the VAD again.
+    """
+    with open_shared_audio(shared_audio) as audio:
+        chunk_audio = np.array(audio[chunk["start"]:chunk["end"]])
+    
+    regions = None
+    if speech_regions is not None:
+        regions = clip_speech_regions(speech_regions, chunk["start"], chunk["end"])
+    result = transcribe_array(
+        chunk_audio,
+        language_code,
+        model_size,
+        custom_vocabulary,
+        time_offset=chunk["start"] / SAMPLE_RATE,
+        speech_regions=regions
+    )
+    result["own_start_time"] = chunk["own_start"] / SAMPLE_RATE
+    result["own_end_time"] = chunk["own_end"] / SAMPLE_RATE
     return result
+
+# Tasks that inference worker processes can run (see api/services/inference_pool.py)
+WORKER_TASKS = {
+    "transcribe_audio": transcribe_audio,
+    "transcribe_with_diarization": transcribe_with_diarization,
+    "identify_language": identify_language,
+    "decode_shared": decode_shared,
+    "transcribe_shared": transcribe_shared,
+    "plan_long_form": plan_long_form,
+    "transcribe_chunk": transcribe_chunk,
+    "diarize_shared": diarize_shared,
+    "load_model": load_model,
+    "unload_model": unload_model,
+    "warm_model": warm_model,
+    "model_stats": get_model_stats,
+}
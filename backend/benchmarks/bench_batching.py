@@ -0,0 +1,68 @@
+"""
+Throughput of cross-job batched inference against one model.transcribe call per job.
+
+Runs 1, 4 and 16 concurrent jobs on the same audio file in one process, the way
+jobs share an inference worker, and reports audio seconds transcribed per wall second.
+
+Usage: python benchmarks/bench_batching.py <audio_file> [model_size] [max_batch_size]
+"""
+
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CONCURRENCY_LEVELS = (1, 4, 16)
+
+
+def run_jobs(concurrency, job):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda _: job(), range(concurrency)))
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        return
+
+    file_path = sys.argv[1]
+    model_size = sys.argv[2] if len(sys.argv) > 2 else "base"
+    max_batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    import whisper
+    from api.services.audio_decoder import decode_audio, SAMPLE_RATE
+    from api.services.batch_engine import BatchInferenceEngine, transcribe_batched
+
+    audio = decode_audio(file_path)
+    audio_seconds = len(audio) / SAMPLE_RATE
+    model = whisper.load_model(model_size, device="cpu")
+    engine = BatchInferenceEngine(lambda _: model, max_batch_size=max_batch_size, max_wait_seconds=0.05)
+    model_lock = threading.Lock()
+
+    def sequential_job():
+        with model_lock:
+            model.transcribe(audio, language="en", fp16=False)
+
+    def batched_job():
+        transcribe_batched(engine, model, model_size, audio, language="en")
+
+    # Warm up both paths so lazy initialization is not measured
+    sequential_job()
+    batched_job()
+
+    print(f"{audio_seconds:.1f}s of audio, model {model_size}, max batch size {max_batch_size}")
+    print(f"{'jobs':>5} {'mode':<12} {'wall (s)':>10} {'audio s / wall s':>17}")
+    for concurrency in CONCURRENCY_LEVELS:
+        for mode, job in (("sequential", sequential_job), ("batched", batched_job)):
+            wall = run_jobs(concurrency, job)
+            print(f"{concurrency:>5} {mode:<12} {wall:>10.2f} {concurrency * audio_seconds / wall:>17.1f}")
+    print(f"Batch engine: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    main()
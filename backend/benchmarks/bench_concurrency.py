@@ -0,0 +1,81 @@
+"""
+Aggregate throughput of concurrent transcriptions with and without the CPU scheduler.
+
+Runs 1 to N concurrent transcribe_audio jobs on the inference pool, once with
+every job using torch's default thread count and once with the scheduler
+splitting physical cores between the jobs, and reports audio seconds
+transcribed per wall second.
+
+Usage: python benchmarks/bench_concurrency.py <audio_file> [max_jobs] [model_size] [workers]
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def run_level(pool, concurrency, file_path, model_size):
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        pool.submit("transcribe_audio", bounded=False, file_path=file_path, language_code="en",
+                    model_size=model_size, use_vad=False)
+        for _ in range(concurrency)
+    ))
+    return time.perf_counter() - start
+
+
+async def run_mode(cpu_scheduling, file_path, max_jobs, model_size, workers, audio_seconds):
+    from api.services.inference_pool import InferencePool
+
+    # One task slot per job, so concurrency comes from the jobs and not from batching
+    pool = InferencePool(
+        num_workers=workers,
+        max_queue_size=max_jobs,
+        worker_models=[[model_size]] * workers,
+        worker_concurrency=max(1, -(-max_jobs // workers)),
+        cpu_scheduling=cpu_scheduling
+    )
+    try:
+        # Warm up every worker so model loading is not measured
+        await pool.broadcast("warm_model", model_size=model_size)
+        mode = "scheduled" if cpu_scheduling else "default"
+        for concurrency in range(1, max_jobs + 1):
+            wall = await run_level(pool, concurrency, file_path, model_size)
+            print(f"{concurrency:>5} {mode:<10} {wall:>10.2f} {concurrency * audio_seconds / wall:>17.2f}")
+        if cpu_scheduling:
+            for allocation in pool.stats()["job_allocations"][:max_jobs]:
+                print(f"      job {allocation['job_id']} on worker {allocation['worker']}: "
+                      f"threads {allocation['threads']}, cpus {allocation['cpus']}")
+    finally:
+        pool.stop()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        return
+
+    file_path = os.path.abspath(sys.argv[1])
+    max_jobs = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    model_size = sys.argv[3] if len(sys.argv) > 3 else "base"
+    workers = int(sys.argv[4]) if len(sys.argv) > 4 else 1
+
+    # Batching would merge the jobs' windows; measure independent jobs
+    os.environ["INFERENCE_BATCHING"] = "false"
+
+    from api.services.audio_decoder import decode_audio, SAMPLE_RATE
+    from api.services.cpu_scheduler import physical_cores
+
+    audio_seconds = len(decode_audio(file_path)) / SAMPLE_RATE
+    print(f"{audio_seconds:.1f}s of audio, model {model_size}, {workers} worker(s), "
+          f"{len(physical_cores())} physical cores")
+    print(f"{'jobs':>5} {'threads':<10} {'wall (s)':>10} {'audio s / wall s':>17}")
+    for cpu_scheduling in (False, True):
+        asyncio.run(run_mode(cpu_scheduling, file_path, max_jobs, model_size, workers, audio_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark the streaming ffmpeg decoder against the previous pydub + temp WAV + librosa path.
+
+Each decoder runs in a fresh subprocess so peak RSS is measured in isolation.
+
+Usage: python benchmarks/bench_decode.py <audio_file> [<audio_file> ...]
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def decode_legacy(file_path):
+    """The decode path used by preprocess_audio before the streaming decoder."""
+    import tempfile
+    import librosa
+    from pydub import AudioSegment
+
+    file_ext = os.path.splitext(file_path)[1].lower()
+    if file_ext != '.wav':
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
+            temp_wav_path = temp_wav.name
+        AudioSegment.from_file(file_path).export(temp_wav_path, format='wav')
+        audio_path = temp_wav_path
+    else:
+        audio_path = file_path
+
+    audio, sr = librosa.load(audio_path, sr=16000, mono=True)
+
+    if file_ext != '.wav':
+        os.unlink(temp_wav_path)
+    return audio
+
+
+def decode_streaming(file_path):
+    from api.services.audio_decoder import decode_audio
+    return decode_audio(file_path)
+
+
+DECODERS = {
+    "legacy": decode_legacy,
+    "streaming": decode_streaming,
+}
+
+
+def run_one(method, file_path):
+    """Run a single decoder in this process and print its measurements as JSON."""
+    # Import dependencies before timing so only decoding is measured
+    import numpy  # noqa: F401
+    if method == "legacy":
+        import librosa  # noqa: F401
+        import pydub  # noqa: F401
+
+    start = time.perf_counter()
+    audio = DECODERS[method](file_path)
+    wall = time.perf_counter() - start
+
+    # ru_maxrss is in KB on Linux
+    print(json.dumps({
+        "method": method,
+        "wall_seconds": wall,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "samples": int(len(audio)),
+        "audio_seconds": len(audio) / 16000
+    }))
+
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == "--run":
+        run_one(sys.argv[2], sys.argv[3])
+        return
+
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        return
+
+    print(f"{'file':<40} {'method':<10} {'audio (s)':>10} {'wall (s)':>10} {'peak RSS (MB)':>14}")
+    for file_path in sys.argv[1:]:
+        for method in DECODERS:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run", method, file_path],
+                capture_output=True, text=True
+            )
+            if output.returncode != 0:
+                print(f"{os.path.basename(file_path):<40} {method:<10} failed: {output.stderr.strip()}")
+                continue
+            stats = json.loads(output.stdout.strip().splitlines()[-1])
+            print(
+                f"{os.path.basename(file_path):<40} {method:<10} {stats['audio_seconds']:>10.1f} "
+                f"{stats['wall_seconds']:>10.2f} {stats['peak_rss_mb']:>14.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Time to get a file's duration and its 16 kHz samples, before and after the single-decode pipeline.
+
+"decode twice" is the previous path: librosa decodes the whole file at its
+native rate for the duration, then preprocess_audio decodes it again.
+"probe + decode" reads the duration from the container metadata with
+ffprobe and decodes once.
+
+Usage: python benchmarks/bench_duration_probe.py <audio_file> [<audio_file> ...]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def decode_twice(file_path):
+    import librosa
+    from api.services.audio_decoder import decode_audio
+
+    start = time.perf_counter()
+    audio, sample_rate = librosa.load(file_path, sr=None)
+    duration = len(audio) / sample_rate
+    probed = time.perf_counter()
+    decode_audio(file_path)
+    return duration, probed - start, time.perf_counter() - probed
+
+
+def probe_and_decode(file_path):
+    from api.services.audio_decoder import decode_audio, probe_duration
+
+    start = time.perf_counter()
+    duration = probe_duration(file_path)
+    probed = time.perf_counter()
+    decode_audio(file_path)
+    return duration, probed - start, time.perf_counter() - probed
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        return
+
+    # Import before timing so only the work is measured
+    import librosa  # noqa: F401
+
+    print(f"{'file':<32} {'method':<16} {'duration (s)':>13} {'probe (s)':>10} {'decode (s)':>11} {'total (s)':>10}")
+    for file_path in sys.argv[1:]:
+        name = os.path.basename(file_path)[:32]
+        for method, run in (("decode twice", decode_twice), ("probe + decode", probe_and_decode)):
+            duration, probe_seconds, decode_seconds = run(file_path)
+            print(
+                f"{name:<32} {method:<16} {duration or 0:>13.1f} {probe_seconds:>10.2f} "
+                f"{decode_seconds:>11.2f} {probe_seconds + decode_seconds:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
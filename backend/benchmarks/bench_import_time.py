@@ -0,0 +1,89 @@
+"""
+Measure how long importing the API app takes and check that it stays free of the ML stack.
+
+`import main` runs in fresh subprocesses; the median wall time is compared with
+a budget and the modules the API must not import are checked. Exits with status 1
+on a regression, so it can run in CI. The slowest imports of the last run are
+listed to help find the culprit.
+
+Usage: python benchmarks/bench_import_time.py [budget_seconds] [runs]
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_BUDGET_SECONDS = 2.0
+DEFAULT_RUNS = 5
+
+# Imported only by inference workers (or lazily on first use)
+FORBIDDEN_MODULES = ("torch", "whisper", "librosa", "pydub", "scipy", "numpy", "spacy")
+
+MEASURE = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+wall = time.perf_counter() - start
+print(json.dumps({{
+    "wall_seconds": wall,
+    "forbidden": sorted(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules)
+}}))
+"""
+
+
+def run_once():
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", MEASURE],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if output.returncode != 0:
+        # -X importtime writes to stderr, so only show the end of it
+        raise RuntimeError(output.stderr.strip().splitlines()[-1])
+    return json.loads(output.stdout.strip().splitlines()[-1]), output.stderr
+
+
+def slowest_imports(importtime_log, count=10):
+    """Parse `-X importtime` output into the top-level packages with the largest cumulative time."""
+    totals = {}
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        package = name.split(".")[0]
+        totals[package] = max(totals.get(package, 0), int(cumulative))
+    return sorted(totals.items(), key=lambda item: -item[1])[:count]
+
+
+def main():
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_SECONDS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_RUNS
+
+    walls = []
+    forbidden = set()
+    for _ in range(runs):
+        stats, importtime_log = run_once()
+        walls.append(stats["wall_seconds"])
+        forbidden.update(stats["forbidden"])
+
+    median = statistics.median(walls)
+    print(f"import main: median {median:.3f}s over {runs} runs (min {min(walls):.3f}s, budget {budget:.3f}s)")
+    print("Slowest imports (cumulative):")
+    for package, microseconds in slowest_imports(importtime_log):
+        print(f"  {package:<30} {microseconds / 1e6:>8.3f}s")
+
+    failed = False
+    if forbidden:
+        print(f"FAIL: the API imports {', '.join(sorted(forbidden))}")
+        failed = True
+    if median > budget:
+        print(f"FAIL: import time {median:.3f}s exceeds the {budget:.3f}s budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
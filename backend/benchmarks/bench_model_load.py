@@ -0,0 +1,95 @@
+"""
+Cold-start time and memory of loading a Whisper model from its checkpoint or its snapshot.
+
+Each load runs in fresh subprocesses, several at once, the way inference and
+gunicorn workers start on one host. Reports load time, RSS and PSS (RSS with
+shared pages split between the processes sharing them) after a short transcription.
+
+Usage: python benchmarks/bench_model_load.py [model_size] [processes]
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def memory_mb():
+    """RSS and PSS of this process in MB, from /proc/self/smaps_rollup (Linux)."""
+    values = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name.lower()] = int(rest.split()[0]) / 1024
+    return values
+
+
+def run_one(method, model_size, snapshot_dir):
+    """Load the model in this process and print its measurements as JSON."""
+    import numpy as np
+    import torch  # noqa: F401
+    import whisper
+    from api.services.model_snapshot import load_whisper_model
+
+    start = time.perf_counter()
+    if method == "checkpoint":
+        model = whisper.load_model(model_size, device="cpu")
+    else:
+        model = load_whisper_model(model_size, "cpu", snapshot_dir)
+    load_seconds = time.perf_counter() - start
+
+    # Touch every weight, as the first request would
+    model.transcribe(np.zeros(16000, dtype=np.float32), language="en", fp16=False)
+
+    # Measure only once every process has loaded, so PSS reflects the sharing,
+    # and stay alive until the others have measured too
+    print("ready", flush=True)
+    sys.stdin.readline()
+    print(json.dumps({"method": method, "load_seconds": load_seconds, **memory_mb()}), flush=True)
+    sys.stdin.read()
+
+
+def main():
+    if len(sys.argv) >= 5 and sys.argv[1] == "--run":
+        run_one(sys.argv[2], sys.argv[3], sys.argv[4])
+        return
+
+    model_size = sys.argv[1] if len(sys.argv) > 1 else "base"
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    from api.services.model_snapshot import DEFAULT_SNAPSHOT_DIR, build_snapshots
+
+    snapshot_dir = os.getenv("MODEL_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+    build_snapshots([model_size], snapshot_dir)
+
+    print(f"{processes} processes loading Whisper {model_size}")
+    print(f"{'method':<12} {'load (s)':>9} {'RSS (MB)':>9} {'PSS (MB)':>9}")
+    for method in ("checkpoint", "snapshot"):
+        runs = [
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--run", method, model_size, snapshot_dir],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+            )
+            for _ in range(processes)
+        ]
+        ready = [run for run in runs if run.stdout.readline().strip() == "ready"]
+        for run in ready:
+            run.stdin.write("measure\n")
+            run.stdin.flush()
+        results = [json.loads(run.stdout.readline()) for run in ready]
+        for run in runs:
+            run.stdin.close()
+            run.wait()
+
+        if len(ready) < len(runs):
+            print(f"{method:<12} {len(runs) - len(ready)} process(es) failed to load the model")
+        for stats in results:
+            print(f"{method:<12} {stats['load_seconds']:>9.2f} {stats['rss']:>9.0f} {stats['pss']:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
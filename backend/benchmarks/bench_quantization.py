@@ -0,0 +1,133 @@
+"""
+Compare FP32 and int8-quantized Whisper models on a local corpus.
+
+The corpus is a directory of audio files, each with a reference transcript in a
+.txt file of the same name (e.g. call1.wav and call1.txt). For each model size,
+both variants transcribe every file in a fresh subprocess and the report shows
+real-time factor (processing seconds per audio second), model size, peak RSS
+and word error rate against the references.
+
+Usage: python benchmarks/bench_quantization.py <corpus_dir> [model_size ...]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import resource
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_MODEL_SIZES = ("base", "small")
+
+
+def load_corpus(corpus_dir):
+    """Return (audio_path, reference_text) pairs for the audio files with a transcript."""
+    corpus = []
+    for name in sorted(os.listdir(corpus_dir)):
+        stem, ext = os.path.splitext(name)
+        reference_path = os.path.join(corpus_dir, f"{stem}.txt")
+        if ext.lower() == ".txt" or not os.path.exists(reference_path):
+            continue
+        with open(reference_path) as f:
+            corpus.append((os.path.join(corpus_dir, name), f.read()))
+    return corpus
+
+
+def normalize_words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level edit distance between two transcripts."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+
+def run_one(key, corpus_dir):
+    """Transcribe the corpus with one model variant in this process and print its measurements as JSON."""
+    from api.services.audio_decoder import decode_audio, SAMPLE_RATE
+    from api.services.model_registry import measure_model_bytes
+    from api.services.whisper_service import create_whisper_model
+
+    corpus = load_corpus(corpus_dir)
+    audio = [(decode_audio(path), reference) for path, reference in corpus]
+
+    start = time.perf_counter()
+    model = create_whisper_model(key)
+    load_seconds = time.perf_counter() - start
+
+    # Warm up so lazy initialization is not measured
+    model.transcribe(audio[0][0][:SAMPLE_RATE], language="en", fp16=False)
+
+    audio_seconds = processing_seconds = 0.0
+    errors = reference_words = 0
+    for samples, reference in audio:
+        start = time.perf_counter()
+        result = model.transcribe(samples, language="en", fp16=False, temperature=0.0)
+        processing_seconds += time.perf_counter() - start
+        audio_seconds += len(samples) / SAMPLE_RATE
+
+        reference = normalize_words(reference)
+        errors += word_errors(reference, normalize_words(result["text"]))
+        reference_words += len(reference)
+
+    # ru_maxrss is in KB on Linux
+    print(json.dumps({
+        "model": key,
+        "files": len(audio),
+        "audio_seconds": audio_seconds,
+        "load_seconds": load_seconds,
+        "rtf": processing_seconds / audio_seconds if audio_seconds else 0.0,
+        "model_mb": measure_model_bytes(model) / (1024 * 1024),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "wer": errors / reference_words if reference_words else 0.0
+    }))
+
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == "--run":
+        run_one(sys.argv[2], sys.argv[3])
+        return
+
+    if len(sys.argv) < 2:
+        print(__doc__.strip())
+        return
+
+    from api.services.model_registry import model_key
+
+    corpus_dir = sys.argv[1]
+    model_sizes = sys.argv[2:] or DEFAULT_MODEL_SIZES
+    corpus = load_corpus(corpus_dir)
+    if not corpus:
+        print(f"No audio files with a reference transcript in {corpus_dir}")
+        return
+    print(f"{len(corpus)} files in {corpus_dir}")
+
+    print(f"{'model':<16} {'RTF':>7} {'model (MB)':>11} {'peak RSS (MB)':>14} {'load (s)':>9} {'WER':>7}")
+    for model_size in model_sizes:
+        for quantized in (False, True):
+            key = model_key(model_size, quantized)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run", key, corpus_dir],
+                capture_output=True, text=True
+            )
+            if output.returncode != 0:
+                print(f"{key:<16} failed: {output.stderr.strip()}")
+                continue
+            stats = json.loads(output.stdout.strip().splitlines()[-1])
+            print(
+                f"{key:<16} {stats['rtf']:>7.3f} {stats['model_mb']:>11.0f} {stats['peak_rss_mb']:>14.0f} "
+                f"{stats['load_seconds']:>9.1f} {stats['wer']:>7.2%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
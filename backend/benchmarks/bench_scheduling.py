@@ -0,0 +1,81 @@
+"""
+Queue waits per subscription tier under FIFO and under the job scheduler.
+
+Simulates JOB_MAX_CONCURRENT slots serving a burst of twenty 2-hour uploads
+from one free user, plus a stream of short clips from other free and pro
+users, with job durations from job_scheduler.estimate_cost. Prints the p50
+and p95 queue wait per tier for plain FIFO and for the scheduler's priority
+order with the per-user concurrency cap.
+
+Usage: python benchmarks/bench_scheduling.py [clips]
+"""
+
+import os
+import sys
+import heapq
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.core.config import settings  # noqa: E402
+from api.services.job_scheduler import estimate_cost, priority, summarize_waits  # noqa: E402
+
+
+def workload(clips, rng):
+    """(arrival, user_id, tier, cost_seconds) per job."""
+    jobs = [(0.0, 1, "free", estimate_cost(7200, "medium")) for _ in range(20)]
+    for _ in range(clips):
+        duration = rng.uniform(30, 300)
+        tier = rng.choice(["free", "free", "pro"])
+        jobs.append((rng.uniform(0, 4 * 3600), rng.randint(2, 50), tier, estimate_cost(duration, "base")))
+    return sorted(jobs)
+
+
+def simulate(jobs, slots, scheduled):
+    """Run the jobs on `slots` workers; returns the queue waits per tier."""
+    waits = {}
+    pending = []
+    running = []  # heap of (finish time, user_id)
+    arrivals = list(jobs)
+    now = 0.0
+    while arrivals or pending or running:
+        # Advance to the next arrival or completion
+        next_arrival = arrivals[0][0] if arrivals else float("inf")
+        next_finish = running[0][0] if running else float("inf")
+        now = min(next_arrival, next_finish)
+        while arrivals and arrivals[0][0] <= now:
+            arrival, user_id, tier, cost = arrivals.pop(0)
+            score = priority(arrival, cost, tier) if scheduled else arrival
+            pending.append((score, arrival, user_id, tier, cost))
+        while running and running[0][0] <= now:
+            heapq.heappop(running)
+
+        pending.sort()
+        while len(running) < slots:
+            per_user = [user_id for _, user_id in running]
+            job = next((
+                job for job in pending
+                if not scheduled or per_user.count(job[2]) < settings.JOB_MAX_CONCURRENT_PER_USER
+            ), None)
+            if job is None:
+                break
+            pending.remove(job)
+            _, arrival, user_id, tier, cost = job
+            waits.setdefault(tier, []).append(now - arrival)
+            heapq.heappush(running, (now + cost, user_id))
+    return waits
+
+
+def main():
+    clips = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    jobs = workload(clips, random.Random(0))
+    slots = settings.JOB_MAX_CONCURRENT
+    print(f"{len(jobs)} jobs on {slots} slots")
+    print(f"{'order':>10} {'tier':>6} {'jobs':>5} {'p50 wait (s)':>13} {'p95 wait (s)':>13}")
+    for name, scheduled in (("fifo", False), ("scheduler", True)):
+        for tier, summary in sorted(summarize_waits(simulate(jobs, slots, scheduled)).items()):
+            print(f"{name:>10} {tier:>6} {summary['jobs']:>5} {summary['p50']:>13.0f} {summary['p95']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
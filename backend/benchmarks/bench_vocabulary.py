@@ -0,0 +1,61 @@
+"""
+Compile and post-correction time of custom vocabularies of growing size.
+
+Generates vocabularies of random product-like terms (plus a few known terms
+with misspellings in the transcript) and reports the time to compile each
+vocabulary and to correct a transcript of the given number of words.
+
+Usage: python benchmarks/bench_vocabulary.py [transcript_words]
+"""
+
+import os
+import sys
+import time
+import random
+import string
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.services.vocabulary import CompiledVocabulary  # noqa: E402
+
+KNOWN_TERMS = {"Kubernetes": ["cooper netties"], "PyTorch": [], "PostgreSQL": ["postgress"]}
+MISSPELLINGS = ["kuberneties", "cooper netties", "pie torch", "postgress"]
+FILLER = (
+    "the meeting about the release we should discuss budget numbers tomorrow and "
+    "people were thinking the customer wants quarterly revenue from engineering"
+).split()
+
+
+def random_terms(count, rng):
+    terms = {}
+    while len(terms) < count:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+        terms[word.capitalize()] = []
+    return terms
+
+
+def main():
+    transcript_words = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(0)
+    words = [rng.choice(FILLER) for _ in range(transcript_words)]
+    for position in range(0, transcript_words, 200):
+        words[position] = rng.choice(MISSPELLINGS)
+    text = " ".join(words)
+
+    print(f"{transcript_words} transcript words")
+    print(f"{'terms':>7} {'compile (ms)':>13} {'correct (ms)':>13} {'corrections':>12}")
+    for size in (10, 1000, 10000, 50000):
+        terms = {**random_terms(size, rng), **KNOWN_TERMS}
+        start = time.perf_counter()
+        vocabulary = CompiledVocabulary(terms)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        counts = {}
+        start = time.perf_counter()
+        vocabulary.correct(text, counts)
+        correct_ms = (time.perf_counter() - start) * 1000
+        print(f"{size:>7} {compile_ms:>13.1f} {correct_ms:>13.1f} {sum(counts.values()):>12}")
+
+
+if __name__ == "__main__":
+    main()
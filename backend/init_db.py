@@ -12,6 +12,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from api.db.database import Base, engine
 from api.models.user import User
 from api.models.transcription import Transcription, CustomVocabulary
+from api.models.usage import UsageDaily, UsageFlushBatch
 
 # Create password context for hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
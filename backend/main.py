@@ -35,12 +35,55 @@ async def health_check():
     }
 
 # Import and include routers
-from api.routers import auth, transcriptions, users, audio
+from api.routers import auth, transcriptions, users, audio, admin
 
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(transcriptions.router, prefix="/api/transcriptions", tags=["Transcriptions"])
 app.include_router(audio.router, prefix="/api/audio", tags=["Audio Processing"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Administration"])
+
+# The inference workers import the ML stack; the API process never does
+import asyncio
+from api.core.config import settings
+from api.services.inference_pool import get_inference_pool
+from api.services.transcription_service import resume_interrupted_jobs
+from api.services.checkpoints import ensure_indexes as ensure_checkpoint_indexes
+from api.services.segment_store import ensure_indexes as ensure_segment_indexes
+from api.services import usage
+from api.db.database import get_mongo_db
+
+@app.on_event("startup")
+async def warm_inference_pool():
+    # Warm up in the background so the API serves requests right away
+    model_sizes = [m.strip() for m in settings.INFERENCE_WARMUP_MODELS.split(",") if m.strip()]
+    if model_sizes:
+        app.state.warmup_task = asyncio.create_task(get_inference_pool().warm_up(model_sizes))
+
+@app.on_event("startup")
+async def resume_transcriptions():
+    ensure_checkpoint_indexes(get_mongo_db())
+    ensure_segment_indexes(get_mongo_db())
+    # Jobs of the Redis queue are redelivered to the workers instead
+    if settings.JOB_QUEUE_BACKEND == "local" and settings.JOB_RESUME_ON_STARTUP:
+        resumed = resume_interrupted_jobs()
+        if resumed:
+            print(f"Resumed {resumed} interrupted transcriptions")
+
+@app.on_event("startup")
+async def start_usage_flusher():
+    app.state.usage_flusher = asyncio.create_task(usage.run_flusher())
+
+# Stop the inference worker processes with the API
+@app.on_event("shutdown")
+async def stop_inference_pool():
+    get_inference_pool().stop()
+
+# Write the usage still buffered in Redis
+@app.on_event("shutdown")
+async def flush_usage():
+    app.state.usage_flusher.cancel()
+    await asyncio.to_thread(usage.flush)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
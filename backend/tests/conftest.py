@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the API packages the way main.py and worker.py do, from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def session_factory():
+    """Sessions on an in-memory SQLite database with every table created."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    from api.db.database import Base
+    import api.models.user, api.models.transcription, api.models.usage  # noqa: F401 (registers the tables)
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
@@ -0,0 +1,77 @@
+import numpy as np
+
+from api.services.diarization import cluster_embeddings, diarize, align_speakers
+
+SAMPLE_RATE = 16000
+
+
+def voice(seconds: float, pitch: float, brightness: float, seed: int) -> np.ndarray:
+    """A buzzy harmonic tone standing in for a speaker: its pitch and spectral tilt set its timbre."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    signal = sum(brightness ** k * np.sin(2 * np.pi * pitch * k * t) for k in range(1, 12))
+    signal = signal * (1 + 0.3 * np.sin(2 * np.pi * 3 * t)) + 0.01 * rng.standard_normal(len(t))
+    return (0.1 * signal / np.abs(signal).max()).astype(np.float32)
+
+
+def test_cluster_embeddings_finds_two_groups_numbered_by_first_appearance():
+    rng = np.random.default_rng(0)
+    a = rng.normal([5, 0, 0, 0], 0.3, size=(30, 4))
+    b = rng.normal([0, 5, 0, 0], 0.3, size=(30, 4))
+    embeddings = np.concatenate([b[:10], a[:20], b[10:], a[20:]])
+
+    labels = cluster_embeddings(embeddings)
+    assert list(labels[:10]) == [0] * 10
+    assert list(labels[10:30]) == [1] * 20
+    assert set(labels[30:50]) == {0}
+    assert set(labels[50:]) == {1}
+
+
+def test_cluster_embeddings_keeps_one_speaker_without_a_convincing_split():
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(0, 1, size=(60, 20))
+    assert set(cluster_embeddings(embeddings)) == {0}
+    assert set(cluster_embeddings(embeddings[:1])) == {0}
+    assert set(cluster_embeddings(embeddings, num_speakers=1)) == {0}
+
+
+def alternating_turns(turn_seconds: float) -> np.ndarray:
+    return np.concatenate([
+        voice(turn_seconds, 110, 0.9, seed) if seed % 2 == 0 else voice(turn_seconds, 240, 0.4, seed)
+        for seed in range(4)
+    ])
+
+
+def speaker_at(turns, time: float) -> int:
+    return next(label for start, end, label in turns if start <= time < end)
+
+
+def test_diarize_alternating_speakers():
+    audio = alternating_turns(20)
+    result = diarize(audio, np.array([[0, len(audio)]]), SAMPLE_RATE)
+
+    assert result["speaker_count"] == 2
+    assert [speaker_at(result["turns"], (turn + 0.5) * 20) for turn in range(4)] == [0, 1, 0, 1]
+    # Turn changes are found within a window hop
+    assert np.allclose([start for start, _, _ in result["turns"][1:]], [20, 40, 60], atol=0.75)
+
+
+def test_diarize_with_a_speaker_count_hint():
+    audio = alternating_turns(6)
+    result = diarize(audio, np.array([[0, len(audio)]]), SAMPLE_RATE, num_speakers=2)
+
+    assert result["speaker_count"] == 2
+    assert [speaker_at(result["turns"], (turn + 0.5) * 6) for turn in range(4)] == [0, 1, 0, 1]
+
+
+def test_align_speakers_by_overlap_and_nearest_turn():
+    turns = [[0.0, 5.0, 0], [5.0, 9.0, 1], [12.0, 15.0, 0]]
+    segments = [
+        {"start_time": 1.0, "end_time": 4.0},
+        {"start_time": 4.0, "end_time": 8.0},
+        {"start_time": 9.5, "end_time": 10.0},
+        {"start_time": 11.0, "end_time": 11.5},
+    ]
+    aligned = align_speakers(segments, turns)
+    assert [segment["speaker_id"] for segment in aligned] == ["speaker_1", "speaker_2", "speaker_2", "speaker_1"]
+    assert align_speakers([{"start_time": 0.0, "end_time": 1.0}], [])[0]["speaker_id"] == "speaker_1"
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from api.services.job_executor import JobExecutor, JobQueueFullError
+
+
+def blocking_job(release: asyncio.Event):
+    async def run():
+        await release.wait()
+    return run
+
+
+def test_one_user_flooding_uploads_is_rejected():
+    """With the per-user cap, one user's jobs wait while slots sit idle; the queue must still fill up."""
+    async def flood():
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=4, max_pending=5, max_per_user=2)
+        accepted = 0
+        with pytest.raises(JobQueueFullError) as rejected:
+            for job_id in range(48):
+                executor.submit(job_id, blocking_job(release), 1024, cost_seconds=60, user_id=1, tier="free")
+                accepted += 1
+        stats = executor.stats()
+        release.set()
+        return accepted, stats, rejected.value
+
+    accepted, stats, error = asyncio.run(flood())
+    # Two running (the user's cap) plus five waiting; the upload router answers the rest with 429
+    assert accepted == 7
+    assert stats["running"] == 2
+    assert stats["pending"] == 5
+    assert stats["rejected"] == 1
+    assert error.retry_after >= 1
+
+
+def test_waiting_jobs_start_when_a_slot_frees_up():
+    async def run():
+        release = asyncio.Event()
+        executor = JobExecutor(max_concurrent=1, max_pending=2)
+        executor.submit(1, blocking_job(release), 1024, cost_seconds=10)
+        executor.submit(2, blocking_job(release), 1024, cost_seconds=10)
+        assert executor.queue_status(1)["queue_position"] == 0
+        assert executor.queue_status(2)["queue_position"] == 1
+        release.set()
+        for _ in range(10):
+            await asyncio.sleep(0)
+        return executor.stats()
+
+    stats = asyncio.run(run())
+    assert stats["completed"] == 2
+    assert stats["pending"] == 0
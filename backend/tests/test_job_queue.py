@@ -0,0 +1,144 @@
+import time
+
+import fakeredis
+import pytest
+
+from api.services.job_queue import JobQueue, READY_KEY, DELAYED_KEY, PROCESSING_KEY, USER_RUNNING_KEY
+from api.services.job_executor import JobQueueFullError
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def make_queue(redis_client, **options):
+    defaults = {"visibility_timeout": 5.0, "max_attempts": 3, "backoff_seconds": 0.05, "max_backoff_seconds": 1.0}
+    return JobQueue(redis_client, **{**defaults, **options})
+
+
+def test_claim_runs_cheapest_job_first(redis_client):
+    queue = make_queue(redis_client)
+    queue.enqueue(1, {"transcription_id": 1}, cost_seconds=3600, tier="free")
+    queue.enqueue(2, {"transcription_id": 2}, cost_seconds=30, tier="free")
+
+    job = queue.claim("worker-a")
+    assert job.id == "2"
+    assert job.payload == {"transcription_id": 2}
+    assert job.attempts == 1
+    assert queue.queue_status(2)["queue_position"] == 0
+    assert queue.queue_status(1)["queue_position"] == 1
+
+    queue.ack(job)
+    assert queue.queue_status(2) is None
+    assert queue.claim("worker-a").id == "1"
+    assert queue.claim("worker-a") is None
+
+
+def test_full_queue_rejects_jobs(redis_client):
+    queue = make_queue(redis_client, max_pending=2)
+    queue.enqueue(1, {}, cost_seconds=10)
+    queue.enqueue(2, {}, cost_seconds=10)
+    with pytest.raises(JobQueueFullError):
+        queue.enqueue(3, {}, cost_seconds=10)
+
+
+def test_expired_job_is_claimed_again(redis_client):
+    queue = make_queue(redis_client, visibility_timeout=0.05)
+    queue.enqueue(1, {}, cost_seconds=10)
+    first = queue.claim("worker-a")
+    assert queue.claim("worker-b") is None
+
+    # The worker stops heartbeating; its deadline and lock expire, then the retry backoff passes
+    time.sleep(0.1)
+    assert queue.requeue_expired() == 1
+    assert queue.heartbeat(first) is False
+    time.sleep(0.1)
+    second = queue.claim("worker-b")
+    assert second.id == "1"
+    assert second.attempts == 2
+
+
+def test_heartbeat_keeps_job_claimed(redis_client):
+    queue = make_queue(redis_client, visibility_timeout=0.2)
+    queue.enqueue(1, {}, cost_seconds=10)
+    job = queue.claim("worker-a")
+    for _ in range(3):
+        time.sleep(0.1)
+        assert queue.heartbeat(job) is True
+    assert queue.requeue_expired() == 0
+    assert queue.claim("worker-b") is None
+
+
+def test_failed_job_is_retried_after_backoff(redis_client):
+    queue = make_queue(redis_client)
+    queue.enqueue(1, {}, cost_seconds=10)
+    queue.fail(queue.claim("worker-a"), "WorkerCrashedError")
+
+    assert redis_client.zscore(DELAYED_KEY, "1") is not None
+    assert queue.claim("worker-a") is None
+    time.sleep(0.1)
+    job = queue.claim("worker-a")
+    assert job.id == "1"
+    assert job.attempts == 2
+    assert redis_client.hget("stt:jobs:job:1", "last_error") == "WorkerCrashedError"
+
+
+def test_backoff_doubles_per_attempt(redis_client):
+    queue = make_queue(redis_client, backoff_seconds=10.0, max_backoff_seconds=60.0)
+    assert 8.0 <= queue.backoff(1) <= 12.0
+    assert 16.0 <= queue.backoff(2) <= 24.0
+    assert queue.backoff(10) <= 72.0
+
+
+def test_job_is_dead_lettered_after_last_attempt(redis_client):
+    queue = make_queue(redis_client, max_attempts=2)
+    queue.enqueue(1, {}, cost_seconds=10)
+    queue.fail(queue.claim("worker-a"), "first")
+    time.sleep(0.1)
+    queue.fail(queue.claim("worker-a"), "second")
+    time.sleep(0.1)
+
+    assert queue.claim("worker-a") is None
+    dead = queue.dead_letters()
+    assert [letter["id"] for letter in dead] == ["1"]
+    assert dead[0]["last_error"] == "second"
+    assert queue.stats()["dead"] == 1
+
+    assert queue.retry_dead(1) is True
+    job = queue.claim("worker-a")
+    assert job.id == "1"
+    assert job.attempts == 1
+
+
+def test_lock_keeps_a_transcription_on_one_worker(redis_client):
+    queue = make_queue(redis_client)
+    queue.enqueue(1, {}, cost_seconds=10)
+    first = queue.claim("worker-a")
+
+    # Its deadline is forced past while worker-a still holds the lock, e.g. after a long GC pause
+    redis_client.zadd(PROCESSING_KEY, {"1": time.time() - 1})
+    assert queue.requeue_expired() == 1
+    time.sleep(0.1)
+    assert queue.claim("worker-b") is None
+    assert redis_client.zscore(READY_KEY, "1") is not None
+
+    # Once worker-a gives it up, another worker can run it
+    queue.fail(first, "stopped")
+    second = queue.claim("worker-b")
+    assert second.id == "1"
+    assert second.token != first.token
+
+
+def test_per_user_cap_skips_to_other_users(redis_client):
+    queue = make_queue(redis_client, max_per_user=1)
+    queue.enqueue(1, {}, cost_seconds=10, user_id=7)
+    queue.enqueue(2, {}, cost_seconds=20, user_id=7)
+    queue.enqueue(3, {}, cost_seconds=30, user_id=8)
+
+    assert queue.claim("worker-a").id == "1"
+    job = queue.claim("worker-a")
+    assert job.id == "3"
+    assert queue.claim("worker-a") is None
+    queue.ack(job)
+    assert redis_client.hget(USER_RUNNING_KEY, "8") == "0"
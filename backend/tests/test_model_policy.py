@@ -0,0 +1,65 @@
+import pytest
+
+from api.core.config import settings
+from api.services import model_policy
+from api.services.model_policy import SlaPolicy, PolicyInput, multilingual_variant, with_language
+
+# Real-time factors per model size; .en and int8 variants run at the same speed here
+RTF = {"tiny": 0.1, "base": 0.2, "small": 0.6, "medium": 1.5, "large": 3.0}
+
+
+@pytest.fixture(autouse=True)
+def policy_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_TIER_MAX_SIZE", "free:small,pro:large")
+    monkeypatch.setattr(settings, "MODEL_TIER_DEADLINE_RATIO", "free:3,pro:1.5")
+    monkeypatch.setattr(settings, "MODEL_DEADLINE_MIN_SECONDS", 120.0)
+    monkeypatch.setattr(settings, "MODEL_DOWNGRADE_QUEUE_DEPTH", 8)
+    monkeypatch.setattr(settings, "MODEL_ENGLISH_VARIANTS", True)
+    monkeypatch.setattr(settings, "MODEL_QUANTIZED_SIZES", "")
+    monkeypatch.setattr(model_policy, "model_rtf", lambda key: RTF[key.split(":")[0].split(".")[0]])
+
+
+def choose(duration=600.0, **job):
+    job.setdefault("tier", "pro")
+    return SlaPolicy().choose(PolicyInput(duration, **job))
+
+
+def test_most_accurate_model_meeting_the_deadline():
+    # 900s to finish 600s of audio: large takes 1800s, medium exactly 900s
+    decision = choose()
+    assert decision.model_size == "medium"
+    assert decision.deadline_seconds == 900
+    assert decision.estimated_seconds == 900
+
+
+def test_tier_caps_the_model():
+    assert choose(tier="free", duration=60).model_size == "small"
+
+
+def test_queue_depth_drops_one_size_per_step():
+    # Every 8 waiting jobs remove the largest remaining size; the smallest always stays
+    sizes = [choose(duration=30, queue_depth=depth).model_size for depth in (0, 8, 16, 24, 32, 100)]
+    assert sizes == ["large", "medium", "small", "base", "tiny", "tiny"]
+
+
+def test_time_spent_queued_counts_against_the_deadline():
+    assert choose(queued_seconds=600).model_size == "base"
+
+
+def test_fastest_model_when_nothing_meets_the_deadline():
+    decision = choose(deadline_seconds=10)
+    assert decision.model_size == "tiny"
+    assert "no allowed model meets the deadline" in decision.reasons[-1]
+
+
+def test_english_jobs_use_the_english_variant():
+    assert choose(language_code="en-US").model_size == "medium.en"
+    assert choose(language_code="auto").model_size == "medium"
+
+
+def test_identified_language_switches_to_the_english_variant():
+    decision = choose(language_code="auto").to_dict()
+    assert with_language(decision, "en")["model_size"] == "medium.en"
+    assert with_language(decision, "fr") is decision
+    assert multilingual_variant("small.en:int8") == "small:int8"
+    assert multilingual_variant("large") == "large"
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from api.services.model_registry import ModelRegistry
+
+MB = 1024 * 1024
+
+
+class FakeModel:
+    def __init__(self, name: str):
+        self.name = name
+
+
+def make_registry(loader=FakeModel, budget_mb: int = 300):
+    # Every model measures 200 MB, so only one fits in the budget
+    return ModelRegistry(loader=loader, budget_bytes=budget_mb * MB, measure=lambda model: 200 * MB)
+
+
+def test_model_in_use_is_not_evicted():
+    registry = make_registry()
+    with registry.use("tiny") as tiny:
+        registry.get("base")
+        # Over budget rather than dropping a model another thread is running
+        assert registry.stats()["evictions"] == 0
+        assert registry.get("tiny") is tiny
+        assert not registry.unload("tiny")
+
+    registry.get("small")
+    assert [model["model_size"] for model in registry.stats()["models"]] == ["small"]
+
+
+def test_concurrent_requests_share_one_load():
+    started = threading.Event()
+    release = threading.Event()
+    loads = []
+
+    def slow_loader(name):
+        loads.append(name)
+        if name == "base":
+            started.set()
+            release.wait(5)
+        return FakeModel(name)
+
+    registry = make_registry(slow_loader, budget_mb=1000)
+    registry.get("tiny")
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("base"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    assert started.wait(5)
+
+    # Cache hits on other models don't wait for the load
+    assert registry.get("tiny").name == "tiny"
+    assert registry.stats()["loading"] == ["base"]
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert loads == ["tiny", "base"]
+    assert len(results) == 3 and all(model is results[0] for model in results)
+
+
+def test_failed_load_is_raised_and_retried():
+    attempts = []
+
+    def flaky_loader(name):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise RuntimeError("out of memory")
+        return FakeModel(name)
+
+    registry = make_registry(flaky_loader)
+    with pytest.raises(RuntimeError):
+        registry.get("base")
+    assert registry.stats()["loading"] == []
+    assert registry.resident_bytes() == 0
+    assert registry.get("base").name == "base"
@@ -0,0 +1,68 @@
+import mongomock
+import pytest
+from bson import ObjectId
+
+from api.core.config import settings
+from api.services import segment_store
+
+
+def segment(start, end, text=None):
+    return {"speaker_id": "speaker_1", "start_time": start, "end_time": end, "text": text or f"at {start}", "confidence": 0.9}
+
+
+@pytest.fixture
+def mongo_db(monkeypatch):
+    monkeypatch.setattr(settings, "SEGMENT_BUCKET_SECONDS", 10.0)
+    db = mongomock.MongoClient().db
+    segment_store.ensure_indexes(db)
+    return db
+
+
+def store(mongo_db, segments):
+    result = {"_id": ObjectId()}
+    result["segments_revision"] = segment_store.store_segments(mongo_db, result["_id"], segments)
+    return result
+
+
+def test_bucket_segments_by_start_time():
+    buckets = segment_store.bucket_segments([segment(0, 4), segment(9, 12), segment(10, 11), segment(35, 36)], 10)
+    assert [[s["start_time"] for s in bucket] for bucket in buckets] == [[0, 9], [10], [35]]
+
+
+def test_store_segments_in_buckets(mongo_db):
+    segments = [segment(0, 4), segment(9, 12), segment(10, 11), segment(35, 36)]
+    result = store(mongo_db, segments)
+
+    buckets = list(mongo_db.transcription_segments.find({"result_id": result["_id"]}).sort("start_time"))
+    # A bucket ends at its latest segment end, which can run past the bucket
+    assert [(b["start_time"], b["end_time"], b["count"]) for b in buckets] == [(0, 12, 2), (10, 11, 1), (35, 36, 1)]
+    assert list(segment_store.read_segments(mongo_db, result)) == segments
+    assert segment_store.store_segments(mongo_db, ObjectId(), []) is None
+
+
+def test_range_reads_include_segments_overlapping_the_range(mongo_db):
+    result = store(mongo_db, [segment(0, 4), segment(9, 12), segment(10, 11), segment(35, 36)])
+
+    def starts(start=None, end=None):
+        return [s["start_time"] for s in segment_store.read_segments(mongo_db, result, start, end)]
+
+    # The segment at 9s runs past its bucket into the range
+    assert starts(start=11) == [9, 35]
+    assert starts(end=10) == [0, 9]
+    assert starts(start=4, end=10.5) == [9, 10]
+    assert starts(start=36) == []
+
+
+def test_inline_segments_of_older_results_are_read(mongo_db):
+    result = {"_id": ObjectId(), "segments": [segment(0, 4), segment(5, 6)]}
+    assert [s["start_time"] for s in segment_store.read_segments(mongo_db, result, start=4.5)] == [5]
+    assert list(segment_store.read_segments(mongo_db, {"_id": ObjectId(), "segments_revision": None})) == []
+
+
+def test_new_revision_replaces_the_old_one(mongo_db):
+    result = store(mongo_db, [segment(0, 4, "draft")])
+    result["segments_revision"] = segment_store.store_segments(mongo_db, result["_id"], [segment(0, 4, "refined")])
+    segment_store.drop_old_revisions(mongo_db, result["_id"], result["segments_revision"])
+
+    assert [s["text"] for s in segment_store.read_segments(mongo_db, result)] == ["refined"]
+    assert mongo_db.transcription_segments.count_documents({"result_id": result["_id"]}) == 1
@@ -0,0 +1,112 @@
+import json
+
+import mongomock
+import pytest
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.core.config import settings
+from api.db.database import get_db, get_mongo_db
+from api.models.transcription import Transcription
+from api.models.user import User
+from api.routers import transcriptions
+from api.routers.auth import get_current_active_user, get_streaming_user
+from api.services import segment_store
+
+# Several segments start at the same time, across bucket and page boundaries
+STARTS = [0, 0, 0, 5, 5, 12, 12, 12, 12, 30]
+SEGMENTS = [
+    {"speaker_id": "speaker_1", "start_time": float(start), "end_time": float(start) + 1, "text": f"segment {i}", "confidence": 0.9}
+    for i, start in enumerate(STARTS)
+]
+
+
+@pytest.fixture
+def client(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "SEGMENT_BUCKET_SECONDS", 10.0)
+    mongo_db = mongomock.MongoClient().db
+    result_id = ObjectId()
+    revision = segment_store.store_segments(mongo_db, result_id, SEGMENTS)
+    mongo_db.transcription_results.insert_one({"_id": result_id, "text": "...", "segments_revision": revision})
+
+    db = session_factory()
+    db.add(User(id=1, email="a@example.com", username="a", is_active=True))
+    db.add(Transcription(id=7, user_id=1, status="completed", mongo_document_id=str(result_id), language_code="en"))
+    db.commit()
+    user = db.get(User, 1)
+    db.close()
+
+    def sessions():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    # The streaming endpoint opens its own short-lived session
+    monkeypatch.setattr(transcriptions, "SessionLocal", session_factory)
+    app = FastAPI()
+    app.include_router(transcriptions.router, prefix="/transcriptions")
+    app.dependency_overrides[get_db] = sessions
+    app.dependency_overrides[get_mongo_db] = lambda: mongo_db
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    app.dependency_overrides[get_streaming_user] = lambda: user
+    return TestClient(app)
+
+
+def stream(client, **params):
+    response = client.get("/transcriptions/7/segments", params=params)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_page_cursor_across_equal_start_times():
+    segments = iter(SEGMENTS)
+    taken, cursor = segment_store.page(segments, 2)
+    pages = [taken]
+    while cursor:
+        after = segment_store.decode_cursor(cursor)
+        taken, cursor = segment_store.page(segment_store.read_segments(None, {"segments": SEGMENTS}, after=after), 2, after)
+        pages.append(taken)
+
+    assert [segment for page in pages for segment in page] == SEGMENTS
+    assert [len(page) for page in pages] == [2, 2, 2, 2, 2]
+
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        segment_store.decode_cursor("not a cursor")
+
+
+def test_result_pages_cover_every_segment_once(client):
+    texts, cursor = [], None
+    while True:
+        params = {"limit": 3, "include_text": False}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/transcriptions/7/result", params=params).json()
+        texts += [segment["text"] for segment in page["segments"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert texts == [segment["text"] for segment in SEGMENTS]
+
+
+def test_stream_sends_one_segment_per_line(client):
+    assert stream(client) == SEGMENTS
+
+
+def test_stream_time_range_and_cursor(client):
+    assert [s["text"] for s in stream(client, start=4, end=13)] == [f"segment {i}" for i in range(3, 9)]
+
+    cursor = segment_store.encode_cursor((12.0, 2))
+    assert [s["text"] for s in stream(client, cursor=cursor)] == ["segment 7", "segment 8", "segment 9"]
+
+
+def test_stream_errors_before_streaming(client):
+    assert client.get("/transcriptions/7/segments", params={"cursor": "garbage"}).status_code == 400
+    assert client.get("/transcriptions/7/segments", params={"start": 5, "end": 1}).status_code == 400
+    assert client.get("/transcriptions/8/segments").status_code == 404
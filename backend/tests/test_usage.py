@@ -0,0 +1,82 @@
+from datetime import date
+
+import fakeredis
+import pytest
+
+from api.models.user import User
+from api.models.usage import UsageDaily, UsageFlushBatch
+from api.services import usage
+
+DAY = date(2024, 5, 1)
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(usage, "get_redis_client", lambda: client)
+    return client
+
+
+@pytest.fixture
+def db(session_factory, monkeypatch):
+    monkeypatch.setattr(usage, "SessionLocal", session_factory)
+    session = session_factory()
+    session.add(User(id=1, email="a@example.com", username="a", total_transcription_seconds=0, total_transcription_count=0))
+    session.commit()
+    yield session
+    session.close()
+
+
+def totals(db):
+    db.expire_all()
+    user = db.get(User, 1)
+    daily = db.query(UsageDaily).filter(UsageDaily.user_id == 1, UsageDaily.day == DAY).one()
+    return user.total_transcription_seconds, user.total_transcription_count, daily.transcription_seconds, daily.transcription_count
+
+
+def test_flush_writes_the_buffered_usage(redis_client, db):
+    usage.record(1, 30.4, DAY)
+    usage.record(1, 10.0, DAY)
+    assert usage.pending_usage(1)["seconds"] == pytest.approx(40.4)
+
+    assert usage.flush() == 1
+    assert totals(db) == (40, 2, pytest.approx(40.4), 2)
+    assert usage.pending_usage(1)["count"] == 0
+    assert not redis_client.exists(usage.FLUSHING_KEY, usage.FLUSH_BATCH_KEY, usage.FLUSH_LOCK_KEY)
+
+
+def test_batch_committed_but_left_in_redis_is_not_applied_twice(redis_client, db):
+    usage.record(1, 30.0, DAY)
+    redis_client.rename(usage.PENDING_KEY, usage.FLUSHING_KEY)
+    redis_client.set(usage.FLUSH_BATCH_KEY, "batch-1")
+    leftover = redis_client.hgetall(usage.FLUSHING_KEY)
+
+    assert usage.flush() == 1
+    # As if removing the batch from Redis had failed after the commit
+    redis_client.hset(usage.FLUSHING_KEY, mapping=leftover)
+    redis_client.set(usage.FLUSH_BATCH_KEY, "batch-1")
+
+    assert usage.flush() == 0
+    assert totals(db) == (30, 1, 30.0, 1)
+    assert not redis_client.exists(usage.FLUSHING_KEY)
+    assert db.query(UsageFlushBatch).count() == 1
+
+
+def test_flush_that_lost_its_lock_leaves_the_batch(redis_client, db, monkeypatch):
+    renew_lock = usage._renew_lock
+    usage.record(1, 30.0, DAY)
+    monkeypatch.setattr(usage, "_renew_lock", lambda client, token: False)
+    assert usage.flush() == 0
+    assert redis_client.exists(usage.FLUSHING_KEY)
+    assert db.query(UsageFlushBatch).count() == 0
+
+    monkeypatch.setattr(usage, "_renew_lock", renew_lock)
+    assert usage.flush() == 1
+    assert totals(db) == (30, 1, 30.0, 1)
+
+
+def test_flush_skips_while_another_flusher_holds_the_lock(redis_client, db):
+    usage.record(1, 30.0, DAY)
+    redis_client.set(usage.FLUSH_LOCK_KEY, "other")
+    assert usage.flush() == 0
+    assert redis_client.exists(usage.PENDING_KEY)
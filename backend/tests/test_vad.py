@@ -0,0 +1,52 @@
+import numpy as np
+
+from api.services.vad import detect_speech, pack_speech, summarize
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds: float, amplitude: float = 0.3) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def silence(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * SAMPLE_RATE)) * 1e-4).astype(np.float32)
+
+
+def test_detects_speech_between_silences():
+    audio = np.concatenate([silence(2), tone(2), silence(3), tone(1), silence(2)])
+    regions = detect_speech(audio, SAMPLE_RATE) / SAMPLE_RATE
+
+    assert len(regions) == 2
+    # Padded by 200 ms on each side
+    assert np.allclose(regions, [[1.8, 4.2], [6.8, 8.2]], atol=0.05)
+
+
+def test_bridges_short_pauses_and_drops_short_bursts():
+    audio = np.concatenate([silence(2), tone(1), silence(0.3), tone(1), silence(2), tone(0.1), silence(2)])
+    regions = detect_speech(audio, SAMPLE_RATE) / SAMPLE_RATE
+
+    assert len(regions) == 1
+    assert np.allclose(regions, [[1.8, 4.5]], atol=0.05)
+
+
+def test_silence_has_no_speech():
+    assert detect_speech(silence(5), SAMPLE_RATE).shape == (0, 2)
+    assert detect_speech(np.zeros(10, dtype=np.float32), SAMPLE_RATE).shape == (0, 2)
+
+
+def test_packed_times_map_back_to_the_original():
+    audio = np.concatenate([silence(2), tone(2), silence(3), tone(1), silence(2)])
+    regions = detect_speech(audio, SAMPLE_RATE)
+    packed, speech_map = pack_speech(audio, regions, SAMPLE_RATE)
+
+    first, second = regions / SAMPLE_RATE
+    second_packed = first[1] - first[0] + 0.3
+    assert len(packed) < len(audio)
+    assert np.allclose(speech_map.to_original([0.0, 1.0, second_packed + 0.5]), [first[0], first[0] + 1.0, second[0] + 0.5])
+
+    report = summarize(audio, regions, SAMPLE_RATE)
+    assert report["regions"] == 2
+    assert np.isclose(report["speech_seconds"] + report["skipped_seconds"], 10.0)
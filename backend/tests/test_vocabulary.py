@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from api.services.vocabulary import CompiledVocabulary, parse_terms, validate_terms, phonetic_key
+
+
+def compile_terms(terms):
+    return CompiledVocabulary(parse_terms(json.dumps(terms)))
+
+
+def test_phonetic_key_ignores_vowels_and_repeats():
+    assert phonetic_key("Kubernetes") == phonetic_key("kuberneties") == "216532"
+    assert phonetic_key("a") == phonetic_key("you") == ""
+
+
+def test_parse_terms_list_and_aliases():
+    assert parse_terms('["Kubernetes", ""]') == {"Kubernetes": []}
+    assert parse_terms('{"PostgreSQL": "postgres", "Kubernetes": ["k8s", "cube nets"]}') == {
+        "PostgreSQL": ["postgres"],
+        "Kubernetes": ["k8s", "cube nets"]
+    }
+    assert parse_terms("") == {}
+
+
+@pytest.mark.parametrize("aliases", [1, True, None, {"alias": "k8s"}])
+def test_parse_terms_treats_other_values_as_no_aliases(aliases):
+    assert parse_terms(json.dumps({"Kubernetes": aliases})) == {"Kubernetes": []}
+
+
+@pytest.mark.parametrize("terms", ['{"Kubernetes": 1}', '{"Kubernetes": true}', '{"Kubernetes": [1]}', '[1, 2]', '"Kubernetes"'])
+def test_validate_terms_rejects_other_shapes(terms):
+    with pytest.raises(ValueError):
+        validate_terms(terms)
+
+
+def test_validate_terms_accepts_lists_and_aliases():
+    validate_terms('["Kubernetes"]')
+    validate_terms('{"Kubernetes": "k8s", "PostgreSQL": ["postgres"]}')
+
+
+def test_correct_fixes_near_misses():
+    vocabulary = compile_terms(["Kubernetes"])
+    counts = {}
+    assert vocabulary.correct("we deploy on kuberneties daily", counts) == "we deploy on Kubernetes daily"
+    assert counts == {"Kubernetes": 1}
+
+
+def test_correct_multi_word_alias():
+    vocabulary = compile_terms({"Kubernetes": ["cube nets"]})
+    assert vocabulary.correct("the cube nets cluster") == "the Kubernetes cluster"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("we run Kubernetes a lot", "we run Kubernetes a lot"),
+    ("kubernetes? you bet", "Kubernetes? you bet"),
+    ("Kubernetes I think is great", "Kubernetes I think is great"),
+    ("we run kuberneties a lot", "we run Kubernetes a lot"),
+])
+def test_correct_keeps_words_without_consonants(text, expected):
+    assert compile_terms(["Kubernetes"]).correct(text) == expected
+
+
+def test_correct_segments_counts_every_segment():
+    vocabulary = compile_terms(["Kubernetes"])
+    segments = [{"text": " kuberneties is"}, {"text": " kubernetis a lot"}]
+    assert vocabulary.correct_segments(segments) == {"Kubernetes": 2}
+    assert [segment["text"] for segment in segments] == [" Kubernetes is", " Kubernetes a lot"]
+
+
+@pytest.fixture
+def client(session_factory):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api.db.database import get_db
+    from api.models.user import User
+    from api.routers import transcriptions
+    from api.routers.auth import get_current_active_user
+
+    db = session_factory()
+    db.add(User(id=1, email="a@example.com", username="a", is_active=True))
+    db.commit()
+    user = db.get(User, 1)
+
+    app = FastAPI()
+    app.include_router(transcriptions.router, prefix="/transcriptions")
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    yield TestClient(app)
+    db.close()
+
+
+def test_vocabulary_endpoints_validate_the_terms(client):
+    body = {"name": "infra", "terms": '{"Kubernetes": ["k8s"]}'}
+    created = client.post("/transcriptions/vocabulary", json=body)
+    assert created.status_code == 200
+    vocabulary_id = created.json()["id"]
+
+    assert client.post("/transcriptions/vocabulary", json={**body, "terms": '{"Kubernetes": 1}'}).status_code == 422
+    assert client.post("/transcriptions/vocabulary", json={**body, "terms": "not json"}).status_code == 400
+    assert client.put(f"/transcriptions/vocabulary/{vocabulary_id}", json={"terms": '{"Kubernetes": true}'}).status_code == 422
+    assert client.put(f"/transcriptions/vocabulary/{vocabulary_id}", json={"terms": '["Kubernetes"]'}).json()["terms"] == '["Kubernetes"]'
@@ -0,0 +1,98 @@
+"""
+Transcription worker: runs the jobs the API queues in Redis (JOB_QUEUE_BACKEND=redis).
+
+Each worker process claims up to --concurrency jobs at a time and runs
+process_transcription for them on its own inference pool, so inference
+scales separately from the API. Jobs of a worker that dies are retried by
+the other workers once their visibility timeout passes.
+
+Usage: python worker.py [--concurrency N] [--poll-interval SECONDS]
+"""
+
+import os
+import socket
+import signal
+import asyncio
+import argparse
+import traceback
+
+from api.core.config import settings
+from api.services.job_queue import get_job_queue, ClaimedJob
+from api.services.transcription_service import process_transcription
+from api.services.inference_pool import get_inference_pool
+from api.services.checkpoints import ensure_indexes as ensure_checkpoint_indexes
+from api.services.segment_store import ensure_indexes as ensure_segment_indexes
+from api.services import usage
+from api.db.database import get_mongo_db
+
+
+async def heartbeat(job_queue, job: ClaimedJob, task: asyncio.Task):
+    """Keep a running job's visibility deadline ahead, and stop the job if it was taken away."""
+    while True:
+        await asyncio.sleep(job_queue.visibility_timeout / 3)
+        if not await asyncio.to_thread(job_queue.heartbeat, job):
+            print(f"Job {job.id} was put back on the queue, stopping it here")
+            task.cancel()
+            return
+
+
+async def run_job(job_queue, job: ClaimedJob):
+    print(f"Running job {job.id} (attempt {job.attempts})")
+    task = asyncio.ensure_future(process_transcription(**job.payload))
+    beating = asyncio.ensure_future(heartbeat(job_queue, job, task))
+    try:
+        await task
+    except asyncio.CancelledError:
+        return
+    except Exception as e:
+        # RetryableTranscriptionError and the like: retried with backoff, then dead-lettered
+        await asyncio.to_thread(job_queue.fail, job, f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+        return
+    finally:
+        beating.cancel()
+    await asyncio.to_thread(job_queue.ack, job)
+    print(f"Finished job {job.id}")
+
+
+async def main(concurrency: int, poll_interval: float):
+    job_queue = get_job_queue()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stopping = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopping.set)
+
+    ensure_checkpoint_indexes(get_mongo_db())
+    ensure_segment_indexes(get_mongo_db())
+    usage_flusher = asyncio.ensure_future(usage.run_flusher())
+    print(f"Worker {worker_id} running up to {concurrency} jobs")
+    running = set()
+    while not stopping.is_set():
+        if len(running) < concurrency:
+            job = await asyncio.to_thread(job_queue.claim, worker_id)
+            if job is not None:
+                task = asyncio.ensure_future(run_job(job_queue, job))
+                running.add(task)
+                task.add_done_callback(running.discard)
+                continue
+        try:
+            await asyncio.wait_for(stopping.wait(), poll_interval)
+        except asyncio.TimeoutError:
+            pass
+
+    # Finish the jobs already claimed; unclaimed ones stay queued for other workers
+    print(f"Worker {worker_id} stopping, waiting for {len(running)} job(s)")
+    if running:
+        await asyncio.wait(running)
+    usage_flusher.cancel()
+    await asyncio.to_thread(usage.flush)
+    get_inference_pool().stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run queued transcription jobs")
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_MAX_CONCURRENT)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.poll_interval))
@@ -0,0 +1,22 @@
+# Gunicorn settings; gunicorn loads this file from the working directory
+import os
+
+# Created when the server starts; the first worker to remove it resumes the interrupted jobs
+RESUME_MARKER = os.path.join('transcriptions', '.resume_pending')
+
+
+def on_starting(server):
+    # Runs once, in the master process, before any worker is started
+    os.makedirs(os.path.dirname(RESUME_MARKER), exist_ok=True)
+    open(RESUME_MARKER, 'w').close()
+
+
+def post_worker_init(worker):
+    # Other workers, and workers respawned later, find the marker gone, so every
+    # interrupted job is restarted by a single process
+    try:
+        os.remove(RESUME_MARKER)
+    except FileNotFoundError:
+        return
+    from web_app import resume_interrupted_jobs
+    resume_interrupted_jobs()
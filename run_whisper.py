@@ -5,9 +5,10 @@ Script to run the Whisper model on an audio file
 import sys
 import os
 import time
-import whisper
 from datetime import datetime
 
+from backend.api.services.model_snapshot import load_whisper_model, DEFAULT_SNAPSHOT_DIR
+
 def transcribe_audio(file_path, language=None, model_size="tiny"):
     """
     Transcribe audio using Whisper model.
@@ -28,7 +29,7 @@ def transcribe_audio(file_path, language=None, model_size="tiny"):
     
     # Load the Whisper model
     print("Loading Whisper model...")
-    model = whisper.load_model(model_size)
+    model = load_whisper_model(model_size, snapshot_dir=os.environ.get("MODEL_SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR))
     
     # Transcribe the audio
     print("Transcribing audio...")
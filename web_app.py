@@ -7,9 +7,15 @@ import time
 import uuid
 import json
 import ssl
+import queue
+import shutil
 import subprocess
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for
+from flask import Flask, render_template, request, jsonify, send_from_directory, redirect, url_for, Response, stream_with_context
+
+from backend.api.services.model_snapshot import load_whisper_model, DEFAULT_SNAPSHOT_DIR
 
 # Fix SSL certificate verification issues on macOS
 ssl._create_default_https_context = ssl._create_unverified_context
@@ -20,6 +26,10 @@ app = Flask(__name__)
 UPLOAD_FOLDER = 'uploads'
 TRANSCRIPTION_FOLDER = 'transcriptions'
 TEMP_FOLDER = 'temp'
+# Results of the finished chunks of long jobs, per transcription, for resuming after a restart
+CHECKPOINT_FOLDER = os.path.join(TEMP_FOLDER, 'checkpoints')
+# Memory-mapped model snapshots, shared by all gunicorn workers on the host
+SNAPSHOT_FOLDER = os.environ.get('MODEL_SNAPSHOT_DIR', DEFAULT_SNAPSHOT_DIR)
 
 # Create necessary directories
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
@@ -34,6 +44,116 @@ app.config['MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024 * 1024
 # Supported file types
 ALLOWED_EXTENSIONS = {'mp3', 'wav', 'ogg', 'flac', 'm4a', 'mp4', 'mov', 'avi', 'mkv', 'webm'}
 
+class CoreScheduler:
+    """
+    Share the CPU cores between the transcriptions running in background threads.
+    
+    Each running job is pinned to its own slice of the cores and torch's intra-op
+    thread count is set to the slice size, so concurrent jobs don't oversubscribe
+    the CPU. Slices are rebalanced whenever a job starts or finishes.
+    """
+    
+    def __init__(self):
+        if hasattr(os, 'sched_getaffinity'):
+            self.cpus = sorted(os.sched_getaffinity(0))
+        else:
+            self.cpus = list(range(os.cpu_count() or 1))
+        self.lock = threading.Lock()
+        self.active = {}  # transcription_id -> native id of the job's thread, in start order
+        self.allocations = {}  # transcription_id -> allocations the job ran with
+    
+    @contextmanager
+    def job(self, transcription_id):
+        """Run the body with a share of the cores for the calling thread"""
+        with self.lock:
+            self.active[transcription_id] = threading.get_native_id()
+            self._rebalance()
+        try:
+            yield
+        finally:
+            with self.lock:
+                del self.active[transcription_id]
+                self._rebalance()
+    
+    def pop_allocations(self, transcription_id):
+        with self.lock:
+            return self.allocations.pop(transcription_id, [])
+    
+    def _rebalance(self):
+        if not self.active:
+            return
+        import torch
+        
+        share = max(1, len(self.cpus) // len(self.active))
+        # The thread count is process-wide, so every job gets the same share
+        torch.set_num_threads(share)
+        for i, (transcription_id, thread_id) in enumerate(self.active.items()):
+            start = (i * share) % len(self.cpus)
+            cpus = self.cpus[start:start + share]
+            if hasattr(os, 'sched_setaffinity'):
+                try:
+                    # Threads torch starts from this thread inherit its affinity
+                    os.sched_setaffinity(thread_id, cpus)
+                except OSError:
+                    pass
+            history = self.allocations.setdefault(transcription_id, [])
+            if not history or history[-1]['cpus'] != cpus:
+                history.append({'threads': share, 'cpus': cpus, 'at': time.time()})
+
+# Shares the cores between background transcriptions
+scheduler = CoreScheduler()
+
+class ProgressBus:
+    """
+    In-process publish/subscribe of job status updates for the /events stream.
+    
+    The background threads that run the jobs live in the same process as the
+    request handlers, so a queue per subscriber is enough; run gunicorn with
+    threads rather than several worker processes.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}  # transcription_id -> queues of the open streams
+    
+    def publish(self, transcription_id, status_data):
+        with self.lock:
+            subscribers = list(self.subscribers.get(transcription_id, []))
+        for updates in subscribers:
+            updates.put(status_data)
+    
+    @contextmanager
+    def subscribe(self, transcription_id):
+        updates = queue.Queue()
+        with self.lock:
+            self.subscribers.setdefault(transcription_id, []).append(updates)
+        try:
+            yield updates
+        finally:
+            with self.lock:
+                self.subscribers[transcription_id].remove(updates)
+                if not self.subscribers[transcription_id]:
+                    del self.subscribers[transcription_id]
+
+# Status updates of running jobs, streamed to the browser
+progress_bus = ProgressBus()
+
+# Each open /events stream occupies one of gunicorn's threads (--threads 16 in
+# the Procfile, Dockerfile and render.yaml) for as long as its job runs; past
+# this many streams the browser polls /status instead, so that uploads and
+# other requests always find a free thread
+MAX_EVENT_STREAMS = int(os.environ.get('MAX_EVENT_STREAMS', '8'))
+event_streams = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+
+# Measured seconds of processing per second of audio, per model size, for ETAs
+measured_rtf = {}
+RTF_SMOOTHING = 0.2
+
+def record_rtf(model_size, rtf):
+    """Fold a job's real-time factor into the model's moving average"""
+    previous = measured_rtf.get(model_size)
+    measured_rtf[model_size] = rtf if previous is None else previous + RTF_SMOOTHING * (rtf - previous)
+
 def allowed_file(filename):
     """Check if a file has an allowed extension"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -76,10 +196,127 @@ def extract_audio(video_path, output_path):
         print(f"Error extracting audio: {e}")
         return False
 
-def transcribe_audio(audio_path, model_size, language=None, chunk_size=30):
-    """Transcribe audio using Whisper, with support for chunking long audio"""
-    # Import whisper here to avoid loading it unnecessarily
+# Language identification for "auto" requests
+LANGUAGE_ID_WINDOWS = 3  # 30-second windows looked at
+LANGUAGE_ID_MAX_SECONDS = 600  # Only the start of the file is decoded
+LANGUAGE_ID_MIN_CONFIDENCE = 0.6  # Below this the requested model decides instead
+# One small file per audio hash; the least recently used are deleted beyond the limit
+LANGUAGE_CACHE_DIR = os.path.join(TRANSCRIPTION_FOLDER, 'language_cache')
+LANGUAGE_CACHE_MAX_ENTRIES = int(os.environ.get('LANGUAGE_CACHE_MAX_ENTRIES', '1000'))
+os.makedirs(LANGUAGE_CACHE_DIR, exist_ok=True)
+
+def cached_language(audio_hash):
+    """The cached language report of an audio hash, or None"""
+    path = os.path.join(LANGUAGE_CACHE_DIR, f'{audio_hash}.json')
+    try:
+        with open(path, 'r') as f:
+            report = json.load(f)
+        os.utime(path)  # Mark as recently used
+        return report
+    except (FileNotFoundError, ValueError):
+        return None
+
+def cache_language(audio_hash, report):
+    """Cache a language report and delete the least recently used reports beyond the limit"""
+    path = os.path.join(LANGUAGE_CACHE_DIR, f'{audio_hash}.json')
+    temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(report, f)
+    os.replace(temp_path, path)
+    
+    entries = [entry for entry in os.scandir(LANGUAGE_CACHE_DIR) if entry.name.endswith('.json')]
+    if len(entries) > LANGUAGE_CACHE_MAX_ENTRIES:
+        try:
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:len(entries) - LANGUAGE_CACHE_MAX_ENTRIES]:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            # Another job evicted the same entries
+            pass
+
+def detect_language_probabilities(model, windows):
+    """Average Whisper's language probabilities over audio windows"""
+    import torch
     import whisper
+    
+    if not model.is_multilingual:
+        return {'en': 1.0}
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(window), n_mels=model.dims.n_mels)
+        for window in windows
+    ]).to(model.device)
+    with torch.no_grad():
+        _, probabilities = model.detect_language(mels)
+    
+    averaged = {}
+    for probs in probabilities:
+        for language, p in probs.items():
+            averaged[language] = averaged.get(language, 0.0) + float(p) / len(windows)
+    return averaged
+
+def identify_language(audio_path, model_size):
+    """Identify the spoken language once with the tiny model, cached per audio hash"""
+    import hashlib
+    import numpy as np
+    import torch
+    
+    sha256 = hashlib.sha256()
+    with open(audio_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    audio_hash = sha256.hexdigest()
+    
+    cached = cached_language(audio_hash)
+    if cached:
+        return {**cached, 'cached': True}
+    
+    # Decode the start of the file as 16 kHz mono
+    output = subprocess.run(
+        ['ffmpeg', '-nostdin', '-i', audio_path, '-t', str(LANGUAGE_ID_MAX_SECONDS),
+         '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', '16000', '-'],
+        capture_output=True, check=True
+    ).stdout
+    audio = np.frombuffer(output, np.int16).astype(np.float32) / 32768.0
+    
+    # The loudest windows are the most likely to be speech
+    window = 30 * 16000
+    windows = [audio[start:start + window] for start in range(0, max(len(audio), 1), window)]
+    energy = [float(np.mean(w ** 2)) if len(w) else 0.0 for w in windows]
+    windows = [windows[i] for i in sorted(np.argsort(energy)[-LANGUAGE_ID_WINDOWS:])]
+    
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    probabilities = detect_language_probabilities(load_whisper_model('tiny', device, SNAPSHOT_FOLDER), windows)
+    decided_by = 'tiny'
+    if max(probabilities.values()) < LANGUAGE_ID_MIN_CONFIDENCE and model_size != 'tiny':
+        model = load_whisper_model(model_size, device, SNAPSHOT_FOLDER)
+        probabilities = detect_language_probabilities(model, windows)
+        decided_by = model_size
+    
+    language = max(probabilities, key=probabilities.get)
+    report = {
+        'language': language,
+        'confidence': probabilities[language],
+        'model_size': decided_by,
+        'windows': len(windows)
+    }
+    print(f"Identified language {language} ({report['confidence']:.0%}) with the {decided_by} model")
+    
+    cache_language(audio_hash, report)
+    
+    return report
+
+def transcribe_audio(audio_path, model_size, language=None, chunk_size=30, on_progress=None, checkpoint_dir=None):
+    """
+    Transcribe audio using Whisper, with support for chunking long audio.
+    
+    With checkpoint_dir, each chunk's result is saved there as JSON once it is
+    transcribed, and chunks already saved there are not transcribed again.
+    
+    on_progress, if given, is called as on_progress(chunks_done, chunks_total, eta_seconds)
+    before the first chunk and after each one. The ETA comes from the real-time factor
+    measured on this file's chunks so far, or on earlier jobs with the same model.
+    """
+    # Import torch here to avoid loading it unnecessarily
     import torch
     import numpy as np
     import os
@@ -115,13 +352,19 @@ def transcribe_audio(audio_path, model_size, language=None, chunk_size=30):
     print(f"Loading Whisper model: {model_size}")
     # Use CUDA if available, otherwise CPU
     device = 'cuda' if torch.cuda.is_available() else 'cpu'
-    model = whisper.load_model(model_size, device=device)
+    model = load_whisper_model(model_size, device, SNAPSHOT_FOLDER)
     
     # Prepare options
     options = {}
     if language and language != "auto":
         options["language"] = language
     
+    chunks_total = -(-len(audio) // (chunk_size * 60 * 1000)) if use_chunking else 1
+    transcribe_started = time.time()
+    if on_progress:
+        rtf = measured_rtf.get(model_size)
+        on_progress(0, chunks_total, duration_seconds * rtf if rtf else None)
+    
     # For shorter files, process normally
     if not use_chunking:
         print("Processing entire audio file at once")
@@ -134,6 +377,8 @@ def transcribe_audio(audio_path, model_size, language=None, chunk_size=30):
                 temperature=0,
                 **options
             )
+            if duration_seconds > 0:
+                record_rtf(model_size, (time.time() - transcribe_started) / duration_seconds)
             # Clean up to free memory
             del model
             gc.collect()
@@ -149,7 +394,7 @@ def transcribe_audio(audio_path, model_size, language=None, chunk_size=30):
             # Try again with tiny model if not already using it
             if model_size != 'tiny':
                 print("Retrying with tiny model to save memory")
-                model = whisper.load_model('tiny', device='cpu')
+                model = load_whisper_model('tiny', 'cpu', SNAPSHOT_FOLDER)
                 result = model.transcribe(
                     audio_path,
                     verbose=True,
@@ -169,41 +414,55 @@ def transcribe_audio(audio_path, model_size, language=None, chunk_size=30):
     # Create temp directory for chunks
     chunk_dir = os.path.join(TEMP_FOLDER, "chunks")
     os.makedirs(chunk_dir, exist_ok=True)
+    if checkpoint_dir:
+        os.makedirs(checkpoint_dir, exist_ok=True)
     
-    # Split audio into chunks
-    chunk_paths = []
     chunk_duration_ms = chunk_size * 60 * 1000  # Convert minutes to milliseconds
-    
-    for i, start_ms in enumerate(range(0, len(audio), chunk_duration_ms)):
-        # Extract chunk
-        end_ms = min(start_ms + chunk_duration_ms, len(audio))
-        chunk = audio[start_ms:end_ms]
-        
-        # Save chunk
-        chunk_path = os.path.join(chunk_dir, f"chunk_{i}.wav")
-        chunk.export(chunk_path, format="wav")
-        chunk_paths.append(chunk_path)
-        
-        print(f"Created chunk {i+1}: {start_ms/1000:.1f}s to {end_ms/1000:.1f}s")
+    chunk_starts = list(range(0, len(audio), chunk_duration_ms))
     
     # Process each chunk
     all_segments = []
     full_text = ""
+    processed_seconds = 0.0
     
-    for i, chunk_path in enumerate(chunk_paths):
-        print(f"Processing chunk {i+1}/{len(chunk_paths)}")
+    for i, start_ms in enumerate(chunk_starts):
+        end_ms = min(start_ms + chunk_duration_ms, len(audio))
+        checkpoint_file = os.path.join(checkpoint_dir, f"chunk_{i}.json") if checkpoint_dir else None
         
-        # Transcribe chunk
-        chunk_result = model.transcribe(
-            chunk_path,
-            verbose=True,
-            fp16=False,
-            temperature=0,
-            **options
-        )
+        if checkpoint_file and os.path.exists(checkpoint_file):
+            # Transcribed before the job was interrupted
+            print(f"Restoring chunk {i+1}/{len(chunk_starts)} from its checkpoint")
+            with open(checkpoint_file, 'r') as f:
+                chunk_result = json.load(f)
+        else:
+            print(f"Processing chunk {i+1}/{len(chunk_starts)}")
+            
+            # Extract chunk, named per thread as concurrent jobs share the directory
+            chunk_path = os.path.join(chunk_dir, f"chunk_{threading.get_ident()}_{i}.wav")
+            audio[start_ms:end_ms].export(chunk_path, format="wav")
+            
+            # Transcribe chunk
+            chunk_result = model.transcribe(
+                chunk_path,
+                verbose=True,
+                fp16=False,
+                temperature=0,
+                **options
+            )
+            
+            # Clean up chunk file
+            os.remove(chunk_path)
+            
+            # Save the chunk's result, so that a restart resumes after it
+            if checkpoint_file:
+                with open(checkpoint_file + '.tmp', 'w') as f:
+                    json.dump(chunk_result, f)
+                os.replace(checkpoint_file + '.tmp', checkpoint_file)
+            
+            processed_seconds += (end_ms - start_ms) / 1000
         
         # Adjust timestamps for this chunk
-        time_offset = (i * chunk_duration_ms) / 1000  # Convert to seconds
+        time_offset = start_ms / 1000  # Convert to seconds
         
         for segment in chunk_result["segments"]:
             segment["start"] += time_offset
@@ -215,13 +474,19 @@ def transcribe_audio(audio_path, model_size, language=None, chunk_size=30):
             full_text += "\n\n"
         full_text += chunk_result["text"]
         
-        # Clean up chunk file
-        os.remove(chunk_path)
+        if on_progress:
+            remaining_seconds = max(duration_seconds - end_ms / 1000, 0.0)
+            # Restored chunks took no time, so only the transcribed ones measure the RTF
+            rtf = (time.time() - transcribe_started) / processed_seconds if processed_seconds else measured_rtf.get(model_size)
+            on_progress(i + 1, len(chunk_starts), remaining_seconds * rtf if rtf else None)
     
     # Clean up chunks directory if empty
     if not os.listdir(chunk_dir):
         os.rmdir(chunk_dir)
     
+    if processed_seconds > 0:
+        record_rtf(model_size, (time.time() - transcribe_started) / processed_seconds)
+    
     # Combine results
     combined_result = {
         "text": full_text,
@@ -244,7 +509,9 @@ def save_transcription(result, output_file):
         'text': result.get('text', ''),
         'segments': result.get('segments', []),
         'language': result.get('language', ''),
-        'processing_time': result.get('processing_time', 0)
+        'processing_time': result.get('processing_time', 0),
+        'cpu_allocation': result.get('cpu_allocation', []),
+        'language_id': result.get('language_id')
     }
     
     # Save to file
@@ -360,14 +627,33 @@ def upload_file():
             'progress': 0,
             'model_size': model_size,
             'language': language,
-            'created_at': datetime.now().isoformat()
+            'created_at': datetime.now().isoformat(),
+            # Arguments of process_file_background, to resume the job after a restart
+            'job': {
+                'file_path': upload_path,
+                'file_extension': file_extension,
+                'model_size': model_size,
+                'language': language,
+                'chunk_size': chunk_size
+            }
         }, f)
     
     # Start background processing
-    import threading
+    start_job(transcription_id, upload_path, file_extension, model_size, language, chunk_size)
+    
+    # Return immediate response with job ID
+    return jsonify({
+        'id': transcription_id,
+        'original_filename': original_filename,
+        'status': 'processing',
+        'message': 'File uploaded and processing started. Check status endpoint for updates.'
+    })
+
+def start_job(transcription_id, file_path, file_extension, model_size, language, chunk_size):
+    """Run a transcription job in a background thread"""
     thread = threading.Thread(
         target=process_file_background,
-        args=(transcription_id, upload_path, file_extension, model_size, language, chunk_size)
+        args=(transcription_id, file_path, file_extension, model_size, language, chunk_size)
     )
     thread.daemon = True
     thread.start()
@@ -378,14 +664,6 @@ def upload_file():
         'status': 'processing',
         'start_time': time.time()
     }
-    
-    # Return immediate response with job ID
-    return jsonify({
-        'id': transcription_id,
-        'original_filename': original_filename,
-        'status': 'processing',
-        'message': 'File uploaded and processing started. Check status endpoint for updates.'
-    })
 
 def process_file_background(transcription_id, file_path, file_extension, model_size, language, chunk_size):
     """Process file in background thread"""
@@ -411,14 +689,40 @@ def process_file_background(transcription_id, file_path, file_extension, model_s
         
         # Transcribe audio
         start_time = time.time()
-        result = transcribe_audio(audio_path, model_size, language, int(chunk_size))
+        language_report = None
+        with scheduler.job(transcription_id):
+            # Identify the language once, instead of in every chunk with the big model
+            if not language or language == 'auto':
+                update_status(transcription_id, "identifying_language", 25)
+                try:
+                    language_report = identify_language(audio_path, model_size)
+                    language = language_report['language']
+                except Exception as e:
+                    print(f"Language identification failed, Whisper will detect the language: {e}")
+                update_status(transcription_id, "transcribing", 30)
+            
+            def report_chunks(chunks_done, chunks_total, eta_seconds):
+                update_status(transcription_id, "transcribing", 30 + 50 * chunks_done // chunks_total, details={
+                    'chunks_done': chunks_done,
+                    'chunks_total': chunks_total,
+                    'eta_seconds': eta_seconds
+                })
+            
+            result = transcribe_audio(
+                audio_path, model_size, language, int(chunk_size),
+                on_progress=report_chunks,
+                checkpoint_dir=os.path.join(CHECKPOINT_FOLDER, transcription_id)
+            )
         processing_time = time.time() - start_time
+        cpu_allocation = scheduler.pop_allocations(transcription_id)
         
         # Update status to saving
         update_status(transcription_id, "saving", 80)
         
-        # Add processing time to result
+        # Add processing time and the CPU shares the job ran with to result
         result['processing_time'] = processing_time
+        result['cpu_allocation'] = cpu_allocation
+        result['language_id'] = language_report
         
         # Save transcription
         output_file = os.path.join(TRANSCRIPTION_FOLDER, f"{transcription_id}.json")
@@ -435,8 +739,11 @@ def process_file_background(transcription_id, file_path, file_extension, model_s
             "text": result.get("text", ""),
             "language": result.get("language", ""),
             "processing_time": processing_time,
+            "cpu_allocation": cpu_allocation,
+            "language_id": language_report,
             "has_notes": True
         })
+        shutil.rmtree(os.path.join(CHECKPOINT_FOLDER, transcription_id), ignore_errors=True)
         
         # Remove job from active jobs
         if transcription_id in jobs:
@@ -445,13 +752,14 @@ def process_file_background(transcription_id, file_path, file_extension, model_s
     except Exception as e:
         print(f"Error processing file: {e}")
         update_status(transcription_id, "failed", 0, error=str(e))
+        scheduler.pop_allocations(transcription_id)
         
         # Remove job from active jobs
         if transcription_id in jobs:
             del jobs[transcription_id]
 
-def update_status(transcription_id, status, progress, error=None, result=None):
-    """Update the status file for a transcription job"""
+def update_status(transcription_id, status, progress, error=None, result=None, details=None):
+    """Update the status file for a transcription job and publish the update"""
     status_file = os.path.join(TRANSCRIPTION_FOLDER, f"{transcription_id}_status.json")
     
     # Get current time
@@ -473,6 +781,10 @@ def update_status(transcription_id, status, progress, error=None, result=None):
     if result:
         status_data["result"] = result
     
+    # Stage details such as chunk counts and the ETA
+    if details:
+        status_data.update(details)
+    
     # If file exists, update while preserving some fields
     if os.path.exists(status_file):
         with open(status_file, 'r') as f:
@@ -483,6 +795,8 @@ def update_status(transcription_id, status, progress, error=None, result=None):
             status_data["created_at"] = existing_data["created_at"]
         if "original_filename" in existing_data:
             status_data["original_filename"] = existing_data["original_filename"]
+        if "job" in existing_data:
+            status_data["job"] = existing_data["job"]
         
         # Track processing time if we're completing the job
         if status == "completed" and "created_at" in existing_data:
@@ -501,6 +815,17 @@ def update_status(transcription_id, status, progress, error=None, result=None):
     with open(status_file, 'w') as f:
         json.dump(status_data, f, indent=2)
     
+    progress_bus.publish(transcription_id, status_data)
+    return status_data
+
+def with_job_info(transcription_id, status_data):
+    """Add the elapsed time and CPU allocation of a running job to its status"""
+    if transcription_id in jobs:
+        job_info = jobs[transcription_id]
+        if 'start_time' in job_info:
+            status_data['elapsed_time'] = time.time() - job_info['start_time']
+        if transcription_id in scheduler.allocations:
+            status_data['cpu_allocation'] = scheduler.allocations[transcription_id]
     return status_data
 
 @app.route('/transcriptions/<transcription_id>')
@@ -534,13 +859,49 @@ def get_status(transcription_id):
     with open(status_file, 'r') as f:
         status_data = json.load(f)
     
-    # Add additional info from jobs dictionary
-    if transcription_id in jobs:
-        job_info = jobs[transcription_id]
-        if 'start_time' in job_info:
-            status_data['elapsed_time'] = time.time() - job_info['start_time']
+    return jsonify(with_job_info(transcription_id, status_data))
+
+@app.route('/events/<transcription_id>')
+def stream_status(transcription_id):
+    """Stream the status updates of a transcription job as server-sent events"""
+    status_file = os.path.join(TRANSCRIPTION_FOLDER, f"{transcription_id}_status.json")
+    
+    if not os.path.exists(status_file):
+        return jsonify({'error': 'Transcription job not found'}), 404
     
-    return jsonify(status_data)
+    if not event_streams.acquire(blocking=False):
+        response = jsonify({'error': 'Too many open status streams, poll /status instead'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    def generate():
+        with progress_bus.subscribe(transcription_id) as updates:
+            # Read after subscribing, so that no update is missed in between
+            with open(status_file, 'r') as f:
+                status_data = json.load(f)
+            while True:
+                yield f"event: status\ndata: {json.dumps(with_job_info(transcription_id, status_data))}\n\n"
+                if status_data['status'] in ('completed', 'failed'):
+                    return
+                if transcription_id not in jobs:
+                    # Not running in this process (e.g. lost in a restart); let the browser retry slowly
+                    yield "retry: 30000\n\n"
+                    return
+                while True:
+                    try:
+                        status_data = updates.get(timeout=15)
+                        break
+                    except queue.Empty:
+                        yield ": keepalive\n\n"
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Also runs if the client leaves before the stream starts
+    response.call_on_close(event_streams.release)
+    return response
 
 @app.route('/view/<transcription_id>')
 def view_transcription(transcription_id):
@@ -619,6 +980,26 @@ def list_jobs():
     
     return jsonify(list(job_statuses.values()))
 
+def resume_interrupted_jobs():
+    """
+    Restart the jobs that were running when the server stopped. Their daemon
+    threads died with the process; long files continue from their chunk checkpoints.
+    """
+    for filename in os.listdir(TRANSCRIPTION_FOLDER):
+        if not filename.endswith('_status.json'):
+            continue
+        with open(os.path.join(TRANSCRIPTION_FOLDER, filename), 'r') as f:
+            status_data = json.load(f)
+        job = status_data.get('job')
+        if status_data.get('status') in ('completed', 'failed') or not job or not os.path.exists(job['file_path']):
+            continue
+        transcription_id = status_data['id']
+        print(f"Resuming interrupted transcription {transcription_id}")
+        start_job(transcription_id, job['file_path'], job['file_extension'], job['model_size'], job['language'], job['chunk_size'])
+
+# Under gunicorn, gunicorn.conf.py resumes jobs once per server start; the
+# development server resumes them in its serving process below
+
 # Get port from environment variable for compatibility with hosting platforms
 import os
 
@@ -634,8 +1015,13 @@ if __name__ == '__main__':
     # Get port from environment variable or use default
     port = int(os.environ.get('PORT', 8090))
     
+    # With the debug reloader, only the child process that serves requests runs jobs
+    debug = os.environ.get('FLASK_ENV') != 'production'
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resume_interrupted_jobs()
+    
     # Run the app
-    app.run(debug=os.environ.get('FLASK_ENV') != 'production', 
+    app.run(debug=debug, 
             host='0.0.0.0', 
             port=port, 
             threaded=True)